@@ -1,6 +1,6 @@
 """
 Fetcha Weather - Main Flask Application
-Version: v1.0 • Updated: 2025-11-01 19:38 AEST (Brisbane)
+Version: v1.1 • Updated: 2026-10-16 16:20 AEST (Brisbane)
 Force redeploy to fix /api/auth/me 404 issue
 """
 
@@ -72,6 +72,11 @@ def create_app(config_name=None):
     # Register blueprints
     register_blueprints(app)
     
+    # Background warm-up of popular station-months (BOM_PREFETCH_ENABLED; one worker runs it)
+    from services.bom_weather_service import get_weather_service
+    from services.prefetch_scheduler import start_prefetch_scheduler
+    start_prefetch_scheduler(app, get_weather_service)
+    
     # Register error handlers
     register_error_handlers(app)
     
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Backfill BOM Observations
+Version: v1.0 • Updated: 2026-10-16 16:50 AEST (Brisbane)
+
+Preloads every DWO station in the selected states for every month BOM still
+publishes (the current month and the 13 before it) into the local CSV store,
+and optionally the observation warehouse.
+
+- Stations are enumerated from the state DWO pages via the station directory
+- Stations are spread across a process pool; every worker takes tokens from
+  the same SQLite token bucket, so the pool as a whole stays within
+  BOM_RATE_LIMIT_PER_SECOND however many workers run
+- Progress is checkpointed to BOM_DATA_DIR/backfill/checkpoint.json; an
+  interrupted run (Ctrl-C, crash, deploy) resumes where it stopped
+"""
+
+import sys
+import time
+import signal
+import argparse
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent / "services"))
+
+from bom_storage import get_data_dir, atomic_write_json, read_json
+from rate_limiter import RateLimitExceeded
+from observation_records import ObservationBlock
+from smart_html_parsing_scraper import SmartHTMLParsingBOMScraper
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_EVERY_SECONDS = 30
+
+# One scraper per pool worker, created by _init_worker
+_worker_scraper = None
+
+
+def published_months(count: int = 14, today: Optional[datetime] = None) -> List[str]:
+    """The last `count` months (YYYYMM, oldest first) ending with the current month"""
+    today = today or datetime.now()
+    year, month = today.year, today.month
+    months = []
+    for _ in range(count):
+        months.append(f"{year}{month:02d}")
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return months[::-1]
+
+
+def _init_worker():
+    global _worker_scraper
+    # Ctrl-C is handled by the parent, which checkpoints and cancels pending stations
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_scraper = SmartHTMLParsingBOMScraper()
+
+
+def _backfill_station(station_id: str, month_keys: List[str], keep_records: bool) -> Dict:
+    """
+    Download and parse the given months for one station (runs in a pool worker)
+
+    Returns:
+        Dict with 'station_id', 'done' (month_key → record count),
+        'failed' (month keys) and, if keep_records, 'blocks' (month_key → ObservationBlock bytes)
+    """
+    result = {'station_id': station_id, 'done': {}, 'failed': [], 'blocks': {}}
+
+    for month_key in month_keys:
+        try:
+            csv_content = _worker_scraper._download_month_csv(station_id, month_key)
+        except RateLimitExceeded:
+            # Budget exhausted for now - leave the month for the next run
+            result['failed'].append(month_key)
+            continue
+
+        if csv_content is None:
+            result['failed'].append(month_key)
+            continue
+
+        records = _worker_scraper._parse_bom_csv(csv_content, month_key)
+        result['done'][month_key] = len(records)
+        if keep_records and records:
+            result['blocks'][month_key] = ObservationBlock.from_records(records, station_id, month_key).to_bytes()
+
+    return result
+
+
+class BackfillCheckpoint:
+    """Completed and failed station-months, persisted atomically"""
+
+    def __init__(self, path: Path, reset: bool = False):
+        self.path = path
+        data = None if reset else read_json(path)
+        if not isinstance(data, dict) or data.get('version') != CHECKPOINT_VERSION:
+            data = {'version': CHECKPOINT_VERSION, 'started': datetime.now().isoformat(),
+                    'done': {}, 'failed': {}}
+        self.data = data
+        self._saved_at = time.monotonic()
+
+    def pending_months(self, station_id: str, month_keys: List[str]) -> List[str]:
+        done = set(self.data['done'].get(station_id, ()))
+        return [month_key for month_key in month_keys if month_key not in done]
+
+    def record(self, result: Dict) -> None:
+        station_id = result['station_id']
+        done = set(self.data['done'].get(station_id, ())) | set(result['done'])
+        self.data['done'][station_id] = sorted(done)
+        if result['failed']:
+            self.data['failed'][station_id] = sorted(result['failed'])
+        else:
+            self.data['failed'].pop(station_id, None)
+
+    def save(self, force: bool = True) -> None:
+        if not force and time.monotonic() - self._saved_at < CHECKPOINT_EVERY_SECONDS:
+            return
+        self.data['updated'] = datetime.now().isoformat()
+        atomic_write_json(self.path, self.data)
+        self._saved_at = time.monotonic()
+
+
+def enumerate_stations(scraper: SmartHTMLParsingBOMScraper, states: List[str]) -> List[Dict]:
+    """Every DWO station in the given states (crawling states not yet in the station directory)"""
+    incomplete = [state for state in states if scraper.station_directory.get_missing_groups(state) != {}]
+    if incomplete:
+        print(f"🗺️ Crawling station pages for: {', '.join(incomplete)}")
+        scraper.refresh_station_directory(incomplete)
+
+    wanted_states = {state.lower().strip() for state in states}
+    stations, seen = [], set()
+    for station in scraper.station_directory.get_catalogue():
+        if station['state'] in wanted_states and station['station_id'] not in seen:
+            seen.add(station['station_id'])
+            stations.append(station)
+    return stations
+
+
+def _store_in_warehouse(app, scraper: SmartHTMLParsingBOMScraper, result: Dict) -> None:
+    from models.observation import Observation
+
+    with app.app_context():
+        for month_key, block_bytes in result['blocks'].items():
+            records = ObservationBlock.from_bytes(block_bytes).records()
+            is_final = scraper.csv_store.is_closed_month(month_key)
+            outcome = Observation.upsert_records(result['station_id'], records, is_final=is_final)
+            if not outcome['success']:
+                print(f"⚠️ Warehouse write failed for {result['station_id']} {month_key}: {outcome['error']}")
+
+
+def backfill(states: Optional[List[str]] = None, months: int = 14, workers: int = 4,
+             warehouse: bool = False, reset: bool = False) -> bool:
+    """
+    Backfill station-months into the local store
+
+    Args:
+        states: State names (defaults to all states)
+        months: Number of published months to fetch, ending with the current month
+        workers: Pool processes (they share one BOM rate limit)
+        warehouse: Also upsert parsed records into the Observation table
+        reset: Ignore any existing checkpoint
+
+    Returns:
+        True if every station-month was stored
+    """
+    scraper = SmartHTMLParsingBOMScraper()
+    states = states or list(scraper.state_daily_codes.keys())
+    month_keys = published_months(months)
+    checkpoint = BackfillCheckpoint(get_data_dir("backfill") / "checkpoint.json", reset=reset)
+
+    app = None
+    if warehouse:
+        from app import create_app
+        app = create_app()
+
+    stations = enumerate_stations(scraper, states)
+    work = [(station['station_id'], checkpoint.pending_months(station['station_id'], month_keys))
+            for station in stations]
+    work = [(station_id, pending) for station_id, pending in work if pending]
+
+    print(f"📦 Backfill: {len(stations)} stations × {len(month_keys)} months "
+          f"({month_keys[0]}–{month_keys[-1]}), {len(work)} stations pending, {workers} workers")
+    if not work:
+        print("✅ Nothing to do - checkpoint is complete")
+        return True
+
+    started = time.monotonic()
+    completed = fetched_months = 0
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    try:
+        futures = [executor.submit(_backfill_station, station_id, pending, warehouse)
+                   for station_id, pending in work]
+        for future in as_completed(futures):
+            result = future.result()
+            if app is not None and result['blocks']:
+                _store_in_warehouse(app, scraper, result)
+            checkpoint.record(result)
+            checkpoint.save(force=False)
+
+            completed += 1
+            fetched_months += len(result['done'])
+            failed_note = f", {len(result['failed'])} failed" if result['failed'] else ""
+            print(f"✅ [{completed}/{len(work)}] {result['station_id']}: "
+                  f"{len(result['done'])} months{failed_note} ({time.monotonic() - started:.0f}s)")
+    except KeyboardInterrupt:
+        print("\n⏸️ Interrupted - saving checkpoint (run again to resume)")
+        executor.shutdown(wait=False, cancel_futures=True)
+        checkpoint.save()
+        return False
+    finally:
+        executor.shutdown(wait=True)
+        checkpoint.save()
+
+    failed = sum(len(months_failed) for months_failed in checkpoint.data['failed'].values())
+    print(f"\n{'='*60}")
+    print(f"✅ Station-months stored this run: {fetched_months}")
+    print(f"⚠️ Station-months failed (retried next run): {failed}")
+    print(f"⏱️ Elapsed: {time.monotonic() - started:.0f}s")
+    print(f"{'='*60}\n")
+    return failed == 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backfill BOM daily observations into the local store")
+    parser.add_argument('states', nargs='*', help="State names (default: all states)")
+    parser.add_argument('--months', type=int, default=14, help="Months to fetch, ending with the current month")
+    parser.add_argument('--workers', type=int, default=4, help="Worker processes sharing the BOM rate limit")
+    parser.add_argument('--warehouse', action='store_true', help="Also write the Observation table")
+    parser.add_argument('--reset', action='store_true', help="Ignore the existing checkpoint")
+    args = parser.parse_args()
+
+    success = backfill(args.states or None, months=args.months, workers=args.workers,
+                       warehouse=args.warehouse, reset=args.reset)
+    sys.exit(0 if success else 1)
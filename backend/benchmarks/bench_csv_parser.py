@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark - BOM Monthly CSV Parsing
+Version: v1.0 • Updated: 2026-10-16 13:05 AEST (Brisbane)
+
+Compares the per-month parse cost of the original line-by-line parser
+(a fresh csv.reader per row and header cleaning per cell) with the
+single-pass streaming parser in services/bom_csv_parser.py, and the
+typed ObservationRecord path (parse_observations).
+
+Usage:
+    python benchmarks/bench_csv_parser.py [--iterations 2000] [--json]
+"""
+
+import io
+import sys
+import csv
+import json
+import time
+import argparse
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "services"))
+
+from fixtures import recorded_month_csvs
+from bom_csv_parser import parse_bom_csv, parse_observations
+
+
+def legacy_parse_bom_csv(csv_content: str, month_key: str) -> List[Dict]:
+    """Original SmartHTMLParsingBOMScraper._parse_bom_csv (baseline)"""
+
+    lines = csv_content.strip().split('\n')
+    daily_records = []
+
+    header_line_idx = None
+    for i, line in enumerate(lines):
+        if line.startswith(',"Date"'):
+            header_line_idx = i
+            break
+
+    if header_line_idx is None:
+        return []
+
+    header_line = lines[header_line_idx]
+    reader = csv.reader(io.StringIO(header_line))
+    headers = next(reader)[1:]
+
+    for line_idx in range(header_line_idx + 1, len(lines)):
+        line = lines[line_idx].strip()
+
+        if not line or line.startswith('"'):
+            continue
+
+        try:
+            reader = csv.reader(io.StringIO(line))
+            row_data = next(reader)[1:]
+
+            if len(row_data) >= len(headers) and row_data[0]:
+                record = {'month_key': month_key}
+
+                for i, header in enumerate(headers):
+                    if i < len(row_data):
+                        clean_header = (header
+                                        .replace('(', '').replace(')', '')
+                                        .replace('°C', 'c').replace('°', '_degrees')
+                                        .replace(' ', '_').replace('-', '_')
+                                        .replace('/', '_').replace('%', 'percent')
+                                        .lower())
+                        record[clean_header] = row_data[i]
+
+                if 'date' in record and record['date']:
+                    try:
+                        date_obj = datetime.strptime(record['date'], "%Y-%m-%d")
+                        record['date'] = date_obj.strftime("%Y-%m-%d")
+                    except:
+                        pass
+
+                daily_records.append(record)
+
+        except:
+            continue
+
+    return daily_records
+
+
+def measure(parser, csv_content: str, month_key: str, iterations: int) -> Dict:
+    """Time a parser and measure peak allocation for a single parse"""
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        parser(csv_content, month_key)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    parser(csv_content, month_key)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'per_month_us': round(elapsed / iterations * 1e6, 1),
+        'peak_alloc_bytes': peak
+    }
+
+
+def run(iterations: int) -> Dict:
+    month_key = "202510"
+    results = {'iterations': iterations, 'month_key': month_key, 'stations': {}}
+
+    for station_id, csv_content in recorded_month_csvs(month_key).items():
+        legacy_records = legacy_parse_bom_csv(csv_content, month_key)
+        streaming_records = parse_bom_csv(csv_content, month_key)
+        assert legacy_records == streaming_records, f"Parser output differs for {station_id}"
+
+        before = measure(legacy_parse_bom_csv, csv_content, month_key, iterations)
+        after = measure(parse_bom_csv, csv_content, month_key, iterations)
+        typed = measure(parse_observations, csv_content, month_key, iterations)
+
+        results['stations'][station_id] = {
+            'records': len(streaming_records),
+            'csv_bytes': len(csv_content.encode('utf-8')),
+            'before': before,
+            'after': after,
+            'typed': typed,
+            'speedup': round(before['per_month_us'] / after['per_month_us'], 2)
+        }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BOM monthly CSV parsing")
+    parser.add_argument('--iterations', type=int, default=2000, help="Parses per measurement")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable JSON only")
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("📊 BOM CSV PARSE BENCHMARK (per month)")
+    print("=" * 72)
+    print(f"{'Station':<12} {'Records':>7} {'Before µs':>10} {'After µs':>10} {'Speedup':>8} "
+          f"{'Before peak':>12} {'After peak':>11} {'Typed µs':>9} {'Typed peak':>11}")
+    for station_id, result in results['stations'].items():
+        print(f"{station_id:<12} {result['records']:>7} {result['before']['per_month_us']:>10} "
+              f"{result['after']['per_month_us']:>10} {result['speedup']:>7}x "
+              f"{result['before']['peak_alloc_bytes']:>12} {result['after']['peak_alloc_bytes']:>11} "
+              f"{result['typed']['per_month_us']:>9} {result['typed']['peak_alloc_bytes']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark - DWO Page Link Extraction
+Version: v1.0 • Updated: 2026-10-16 17:10 AEST (Brisbane)
+
+Compares the original full BeautifulSoup tree (html.parser) with a
+SoupStrainer that only builds <a> tags, and with the anchor-only
+extractors in services/html_links.py (streaming HTMLParser, and lxml
+when it is installed), on DWO state and letter group pages.
+
+Usage:
+    python benchmarks/bench_link_extraction.py [--iterations 200] [--pages DIR] [--json]
+"""
+
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "services"))
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from fixtures import dwo_pages
+from html_links import extract_links_htmlparser, extract_links_lxml, lxml_html
+
+
+def legacy_extract_links(html: str) -> List[Tuple[str, str]]:
+    """Original scraper approach - full tree, then find_all('a', href=True) (baseline)"""
+    soup = BeautifulSoup(html, 'html.parser')
+    return [(link['href'], link.get_text().strip()) for link in soup.find_all('a', href=True)]
+
+
+def strainer_extract_links(html: str) -> List[Tuple[str, str]]:
+    """BeautifulSoup restricted to <a href> tags with a SoupStrainer"""
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('a', href=True))
+    return [(link['href'], link.get_text().strip()) for link in soup.find_all('a', href=True)]
+
+
+def measure(extractor: Callable, html: str, iterations: int) -> Dict:
+    """Time an extractor and measure peak allocation for a single page"""
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        extractor(html)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    extractor(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'per_page_us': round(elapsed / iterations * 1e6, 1),
+        'peak_alloc_bytes': peak
+    }
+
+
+def run(iterations: int, pages_dir: Path = None) -> Dict:
+    extractors = {
+        'bs4_full': legacy_extract_links,
+        'bs4_strainer': strainer_extract_links,
+        'htmlparser': extract_links_htmlparser,
+    }
+    if lxml_html is not None:
+        extractors['lxml'] = extract_links_lxml
+
+    results = {'iterations': iterations, 'extractors': list(extractors), 'pages': {}}
+
+    for name, html in dwo_pages(pages_dir).items():
+        expected = legacy_extract_links(html)
+        for extractor_name, extractor in extractors.items():
+            assert extractor(html) == expected, f"{extractor_name} output differs for {name}"
+
+        page = {'html_bytes': len(html.encode('utf-8')), 'links': len(expected)}
+        for extractor_name, extractor in extractors.items():
+            page[extractor_name] = measure(extractor, html, iterations)
+        baseline = page['bs4_full']['per_page_us']
+        page['speedup'] = {extractor_name: round(baseline / page[extractor_name]['per_page_us'], 2)
+                           for extractor_name in extractors}
+        results['pages'][name] = page
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DWO page link extraction")
+    parser.add_argument('--iterations', type=int, default=200, help="Parses per measurement")
+    parser.add_argument('--pages', type=Path, help="Directory of captured DWO pages (default: built pages)")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable JSON only")
+    args = parser.parse_args()
+
+    results = run(args.iterations, args.pages)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("📊 DWO LINK EXTRACTION BENCHMARK (per page)")
+    print("=" * 72)
+    print(f"{'Page':<24} {'Links':>5} {'Extractor':<13} {'µs':>9} {'Speedup':>8} {'Peak bytes':>11}")
+    for name, page in results['pages'].items():
+        for extractor_name in results['extractors']:
+            result = page[extractor_name]
+            print(f"{name:<24} {page['links']:>5} {extractor_name:<13} {result['per_page_us']:>9} "
+                  f"{page['speedup'][extractor_name]:>7}x {result['peak_alloc_bytes']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Benchmark - End-to-End Scraper Pipeline
+Version: v1.0 • Updated: 2026-10-16 19:40 AEST (Brisbane)
+
+Runs the five phases of extract_weather_smart_parsing against the local
+fake BOM server (benchmarks/fake_bom_server.py, built from the recorded
+fixtures) for 1-day, 1-month and 12-month date ranges, and measures each
+phase's latency, retained allocations and peak traced memory:
+
+- state_page:    fetch the DWO state page and extract its letter group links
+- letter_groups: fetch every letter group page into the station directory
+- station_match: build the location index and rank stations for the location
+- csv_download:  download the required monthly CSVs (into the CSV store)
+- parse_filter:  parse each month and keep the target dates
+
+Every iteration starts cold (fresh BOM_DATA_DIR and scraper). Rate limit
+and fetch spacing sleeps are disabled and the observation archive is off,
+so timings reflect our own code plus loopback HTTP. Results are JSON so
+runs from different releases can be diffed.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--iterations 5] [--latency-ms 0] [--output FILE] [--json]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import logging
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import statistics
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "services"))
+
+# No sleeping on our own politeness limits - only the code path is measured
+os.environ['BOM_RATE_LIMIT_PER_SECOND'] = '1000000'
+os.environ['BOM_RATE_LIMIT_BURST'] = '1000000'
+os.environ['BOM_FETCH_MIN_INTERVAL_SECONDS'] = '0'
+os.environ['BOM_ARCHIVE_ENABLED'] = 'false'
+
+from fake_bom_server import FakeBOMServer
+from smart_html_parsing_scraper import SmartHTMLParsingBOMScraper
+
+# Service INFO logs would swamp the output (and the timings)
+logging.disable(logging.INFO)
+
+PHASES = ['state_page', 'letter_groups', 'station_match', 'csv_download', 'parse_filter']
+
+
+def date_ranges(today: date = None) -> Dict[str, List[str]]:
+    """1-day, 1-month and 12-month ranges ending on the last day of the previous (closed) month"""
+    today = today or date.today()
+    end = today.replace(day=1) - timedelta(days=1)
+    month_start = end.replace(day=1)
+
+    year_start = month_start
+    for _ in range(11):
+        year_start = (year_start - timedelta(days=1)).replace(day=1)
+
+    def days(start: date) -> List[str]:
+        return [(start + timedelta(days=offset)).strftime("%Y-%m-%d")
+                for offset in range((end - start).days + 1)]
+
+    return {
+        '1_day': [end.strftime("%Y-%m-%d")],
+        '1_month': days(month_start),
+        '12_months': days(year_start)
+    }
+
+
+class PipelineRun:
+    """One cold run of the pipeline, split into separately callable phases"""
+
+    def __init__(self, server: FakeBOMServer, location: str, state: str, target_dates: List[str]):
+        self.server = server
+        self.location = location
+        self.state = state
+        self.target_dates = target_dates
+
+        self.data_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+        os.environ['BOM_DATA_DIR'] = self.data_dir
+        os.environ['BOM_BASE_URL'] = server.url
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.scraper = SmartHTMLParsingBOMScraper()
+
+        self.letter_groups = {}
+        self.station_id = None
+        self.month_keys = sorted({target_date[:7].replace('-', '') for target_date in target_dates})
+        self.month_csvs = {}
+        self.target_records = []
+
+    def close(self) -> None:
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def state_page(self) -> None:
+        code = self.scraper._get_daily_obs_code(self.state)
+        self.letter_groups = self.scraper._parse_letter_group_links(f"{self.scraper.base_url}/climate/dwo/{code}.shtml")
+        self.scraper.station_directory.set_letter_groups(self.state, self.letter_groups)
+
+    def letter_groups_phase(self) -> None:
+        self.scraper._fetch_group_stations(self.state, self.scraper.station_directory.get_missing_groups(self.state))
+
+    def station_match(self) -> None:
+        candidates = self.scraper._get_location_index().search(self.location, state=self.state)
+        self.station_id = candidates[0]['station']['station_id']
+
+    def csv_download(self) -> None:
+        scraper = self.scraper
+        if len(self.month_keys) == 1:
+            month_key = self.month_keys[0]
+            self.month_csvs = {month_key: scraper._download_month_csv(self.station_id, month_key)}
+            return
+
+        def fetch(month_key, url, headers):
+            return scraper._download_month_csv(self.station_id, month_key, rate_limited=False)
+
+        jobs = [(month_key, scraper._csv_url(self.station_id, month_key)) for month_key in self.month_keys]
+        self.month_csvs = scraper.fetch_engine.fetch_all(jobs, lambda month_key, content: content, fetcher=fetch)
+
+    def parse_filter(self) -> None:
+        target_date_set = set(self.target_dates)
+        self.target_records = [
+            record
+            for month_key in self.month_keys
+            for record in self.scraper._parse_bom_csv(self.month_csvs[month_key], month_key)
+            if record.get('date') in target_date_set
+        ]
+
+    def steps(self) -> List[Tuple[str, Callable[[], None]]]:
+        return list(zip(PHASES, [self.state_page, self.letter_groups_phase, self.station_match,
+                                 self.csv_download, self.parse_filter]))
+
+
+def run_phases(server: FakeBOMServer, location: str, state: str, target_dates: List[str],
+               traced: bool) -> Dict[str, Dict]:
+    """One cold run; per phase wall time, upstream requests and (when traced) memory"""
+    run = PipelineRun(server, location, state, target_dates)
+    results = {}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name, step in run.steps():
+                requests_before = server.stats['requests']
+                if traced:
+                    tracemalloc.start()
+                    before = tracemalloc.take_snapshot()
+                    tracemalloc.reset_peak()
+                started = time.perf_counter()
+                step()
+                elapsed = time.perf_counter() - started
+                result = {'ms': elapsed * 1000, 'requests': server.stats['requests'] - requests_before}
+                if traced:
+                    _, peak = tracemalloc.get_traced_memory()
+                    diff = tracemalloc.take_snapshot().compare_to(before, 'filename')
+                    tracemalloc.stop()
+                    result['retained_bytes'] = sum(stat.size_diff for stat in diff)
+                    result['retained_blocks'] = sum(stat.count_diff for stat in diff)
+                    result['peak_bytes'] = peak
+                results[name] = result
+        assert run.target_records, f"no records extracted for {location}, {state}"
+        results['_records'] = len(run.target_records)
+    finally:
+        run.close()
+    return results
+
+
+def run_end_to_end(server: FakeBOMServer, location: str, state: str, target_dates: List[str]) -> float:
+    """One cold extract_weather_smart_parsing call (ms) - the phases should add up to about this"""
+    run = PipelineRun(server, location, state, target_dates)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            result = run.scraper.extract_weather_smart_parsing(location, state, target_dates)
+            elapsed = time.perf_counter() - started
+        assert result['success'], result.get('error')
+    finally:
+        run.close()
+    return elapsed * 1000
+
+
+def summarise(samples: List[float]) -> Dict:
+    return {
+        'median_ms': round(statistics.median(samples), 2),
+        'min_ms': round(min(samples), 2),
+        'max_ms': round(max(samples), 2)
+    }
+
+
+def run(iterations: int, latency_ms: float = 0.0, stations_per_state: int = 120,
+        location: str = "Launceston", state: str = "Tasmania") -> Dict:
+    ranges = date_ranges()
+    results = {
+        'benchmark': 'scraper_pipeline',
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'iterations': iterations,
+            'latency_ms': latency_ms,
+            'stations_per_state': stations_per_state,
+            'location': location,
+            'state': state
+        },
+        'ranges': {}
+    }
+
+    with FakeBOMServer(latency_ms=latency_ms, stations_per_state=stations_per_state) as server:
+        # Warm imports, sockets and the server's CSV cache before measuring
+        run_phases(server, location, state, ranges['1_day'], traced=False)
+
+        for range_name, target_dates in ranges.items():
+            timed = [run_phases(server, location, state, target_dates, traced=False) for _ in range(iterations)]
+            traced = run_phases(server, location, state, target_dates, traced=True)
+            end_to_end = [run_end_to_end(server, location, state, target_dates) for _ in range(iterations)]
+
+            phases = {}
+            for name in PHASES:
+                phase = summarise([sample[name]['ms'] for sample in timed])
+                phase['requests'] = traced[name]['requests']
+                for key in ('retained_bytes', 'retained_blocks', 'peak_bytes'):
+                    phase[key] = traced[name][key]
+                phases[name] = phase
+
+            results['ranges'][range_name] = {
+                'dates': len(target_dates),
+                'months': len({target_date[:7] for target_date in target_dates}),
+                'records': traced['_records'],
+                'phases': phases,
+                'phases_total_ms': round(sum(phase['median_ms'] for phase in phases.values()), 2),
+                'end_to_end': summarise(end_to_end)
+            }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper pipeline phase by phase")
+    parser.add_argument('--iterations', type=int, default=5, help="Cold runs per range")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Simulated BOM latency per request")
+    parser.add_argument('--stations', type=int, default=120, help="Stations listed per state")
+    parser.add_argument('--location', default="Launceston")
+    parser.add_argument('--state', default="Tasmania")
+    parser.add_argument('--output', type=Path, help="Also write the JSON results to this file")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable JSON only")
+    args = parser.parse_args()
+
+    results = run(args.iterations, args.latency_ms, args.stations, args.location, args.state)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + '\n')
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("📊 SCRAPER PIPELINE BENCHMARK (cold, per request)")
+    print("=" * 72)
+    print(f"{'Range':<10} {'Phase':<14} {'Median ms':>10} {'Reqs':>5} {'Retained B':>11} {'Peak B':>10}")
+    for range_name, result in results['ranges'].items():
+        for name, phase in result['phases'].items():
+            print(f"{range_name:<10} {name:<14} {phase['median_ms']:>10} {phase['requests']:>5} "
+                  f"{phase['retained_bytes']:>11} {phase['peak_bytes']:>10}")
+        print(f"{range_name:<10} {'(sum)':<14} {result['phases_total_ms']:>10}   "
+              f"end-to-end {result['end_to_end']['median_ms']} ms, {result['records']} records")
+    if args.output:
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
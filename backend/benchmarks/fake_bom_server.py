@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Fake BOM Server - Offline DWO Endpoints
+Version: v1.0 • Updated: 2026-10-16 19:10 AEST (Brisbane)
+
+Local HTTP server that serves BOM daily weather observation (DWO) pages so
+the scraper can be benchmarked and load-tested without touching
+bom.gov.au:
+
+- State pages          /climate/dwo/IDCJDWnn00.shtml
+- Letter group pages   /climate/dwo/IDCJDWnn00_X.shtml
+- Monthly CSVs         /climate/dwo/YYYYMM/text/IDCJDWnnnn.YYYYMM.csv
+  (values from the recordings in services/daily_observations_data; 404
+  outside the 14 months BOM publishes; ETag / 304 revalidation)
+- Station site list    /climate/data/lists_by_element/stations.txt
+
+Latency, 5xx error rate, and 403/429 injection are configurable.
+Point the scraper at it with BOM_BASE_URL (or scraper.base_url).
+
+Usage:
+    python benchmarks/fake_bom_server.py [--port 8765] [--latency-ms 80] [--jitter-ms 20]
+        [--error-rate 0.01] [--forbidden-rate 0.0] [--throttle-rate 0.0] [--stations-per-state 40]
+    BOM_BASE_URL=http://127.0.0.1:8765 python backfill_observations.py Tasmania
+"""
+
+import re
+import sys
+import time
+import random
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixtures import (LETTER_GROUPS, build_letter_group_page, build_month_csv, build_state_page,
+                      letter_group_for, load_recorded_extractions)
+
+# State → (DWO code, site list code, station number prefix, approximate centre lat/lon)
+STATES = {
+    'Queensland': ('IDCJDW0400', 'QLD', 4, (-22.5, 146.0)),
+    'New South Wales': ('IDCJDW0200', 'NSW', 2, (-32.5, 147.0)),
+    'Victoria': ('IDCJDW0300', 'VIC', 3, (-37.0, 144.5)),
+    'Western Australia': ('IDCJDW0600', 'WA', 6, (-26.0, 121.0)),
+    'South Australia': ('IDCJDW0500', 'SA', 5, (-32.0, 136.0)),
+    'Tasmania': ('IDCJDW0700', 'TAS', 7, (-42.0, 146.5)),
+    'Northern Territory': ('IDCJDW0800', 'NT', 8, (-19.5, 133.0)),
+    'Australian Capital Territory': ('IDCJDW0100', 'ACT', 1, (-35.3, 149.1)),
+}
+
+# Real station names (recorded ones keep their real IDs) ahead of generated fill
+KNOWN_STATIONS = {
+    'Tasmania': [('IDCJDW7025', 'Launceston (Ti Tree Bend)'), (None, 'Hobart'), (None, 'Devonport'),
+                 (None, 'Burnie'), (None, 'Low Head'), (None, 'Scottsdale')],
+    'Victoria': [('IDCJDW3050', 'Melbourne (Olympic Park)'), (None, 'Ballarat'), (None, 'Bendigo'),
+                 (None, 'Geelong Racecourse'), (None, 'Mildura'), (None, 'Wangaratta')],
+    'Queensland': [(None, 'Brisbane'), (None, 'Cairns'), (None, 'Townsville'), (None, 'Toowoomba')],
+    'New South Wales': [(None, 'Sydney (Observatory Hill)'), (None, 'Newcastle'), (None, 'Wagga Wagga')],
+    'Western Australia': [(None, 'Perth'), (None, 'Albany'), (None, 'Broome'), (None, 'Kalgoorlie-Boulder')],
+    'South Australia': [(None, 'Adelaide (West Terrace)'), (None, 'Mount Gambier'), (None, 'Port Augusta')],
+    'Northern Territory': [(None, 'Darwin'), (None, 'Alice Springs'), (None, 'Katherine')],
+    'Australian Capital Territory': [(None, 'Canberra'), (None, 'Tuggeranong')],
+}
+
+PUBLISHED_MONTHS = 14
+
+_CSV_PATH = re.compile(r'^/climate/dwo/(\d{6})/text/(IDCJDW\d+)\.(\d{6})\.csv$')
+_GROUP_PATH = re.compile(r'^/climate/dwo/(IDCJDW\d{2}00)_([A-Z])\.shtml$')
+_STATE_PATH = re.compile(r'^/climate/dwo/(IDCJDW\d{2}00)\.shtml$')
+
+
+class FakeBOMServer:
+    """Threaded local server that imitates the BOM DWO endpoints"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, error_rate: float = 0.0, forbidden_rate: float = 0.0,
+                 throttle_rate: float = 0.0, stations_per_state: int = 40, seed: int = 0):
+        """
+        Initialize the server (call start() to serve)
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            latency_ms: Delay added to every response
+            jitter_ms: Extra uniformly random delay (0 to jitter_ms)
+            error_rate: Fraction of requests answered 500
+            forbidden_rate: Fraction of requests answered 403 (bot blocking)
+            throttle_rate: Fraction of requests answered 429 with Retry-After
+            stations_per_state: Stations listed per state (known names first)
+            seed: Seed for station coordinates and fault injection
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.forbidden_rate = forbidden_rate
+        self.throttle_rate = throttle_rate
+        self.stations_per_state = stations_per_state
+
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._csv_cache: Dict[Tuple[str, str], Tuple[bytes, str]] = {}
+        self._records = [extraction['weather_data'] for extraction in load_recorded_extractions()]
+
+        self.stations = self._build_stations(random.Random(seed))
+        self._stations_by_id = {station['station_id']: station for station in self.stations}
+        self._pages = self._build_pages()
+        self.reset_stats()
+
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> 'FakeBOMServer':
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-bom", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve in the current thread (CLI)"""
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'FakeBOMServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self.stats = {'requests': 0, 'by_kind': {}, 'by_status': {}}
+
+    # ------------------------------------------------------------------
+    # Content
+    # ------------------------------------------------------------------
+
+    def _build_stations(self, rng: random.Random) -> List[Dict]:
+        stations = []
+        for state, (code, site_state, prefix, (centre_lat, centre_lon)) in STATES.items():
+            known = KNOWN_STATIONS.get(state, [])
+            names = known + [(None, f"{letter} Station {i}")
+                             for i, letter in zip(range(self.stations_per_state), "ABCDEFGHIJKLMNOPQRSTUVWXYZ" * 10)]
+            used_ids = {station_id for station_id, _ in known if station_id}
+            number = 1
+            for station_id, name in names[:max(self.stations_per_state, len(known))]:
+                if station_id is None:
+                    while f"IDCJDW{prefix}{number:03d}" in used_ids:
+                        number += 1
+                    station_id = f"IDCJDW{prefix}{number:03d}"
+                    used_ids.add(station_id)
+                stations.append({
+                    'station_id': station_id,
+                    'name': name,
+                    'state': state,
+                    'site_state': site_state,
+                    'code': code,
+                    'bom_site': f"{prefix}{len(stations) + 1:05d}",
+                    'latitude': round(centre_lat + rng.uniform(-3, 3), 4),
+                    'longitude': round(centre_lon + rng.uniform(-3, 3), 4),
+                })
+        return stations
+
+    def _build_pages(self) -> Dict[str, bytes]:
+        pages = {}
+        for state, (code, _, _, _) in STATES.items():
+            pages[f"/climate/dwo/{code}.shtml"] = build_state_page(state, code).encode('utf-8')
+            by_group: Dict[str, List[Tuple[str, str]]] = {group: [] for group in LETTER_GROUPS}
+            for station in self.stations:
+                if station['state'] == state:
+                    by_group[letter_group_for(station['name'])].append((station['station_id'], station['name']))
+            for group, links in by_group.items():
+                page = build_letter_group_page(state, station_links=sorted(links, key=lambda link: link[1]))
+                pages[f"/climate/dwo/{code}_{group[0]}.shtml"] = page.encode('utf-8')
+
+        lines = ["Bureau of Meteorology product IDCJMC0014.",
+                 "   Site  Dist  Site name                                 Start    End      Lat       Lon Source"
+                 "         STA Height (m)   Bar_ht    WMO",
+                 "------- ----- ---------------------------------------- ------- ------- -------- -------- "
+                 "-----------------  --- ---------- -------- ------"]
+        for station in self.stations:
+            lines.append(f"{station['bom_site']:>7} 000   {station['name'].upper():<40}    1990      .. "
+                         f"{station['latitude']:>9.4f} {station['longitude']:>8.4f} GPS               "
+                         f"{station['site_state']:<3}       10.0     11.0  ..")
+        pages["/climate/data/lists_by_element/stations.txt"] = ('\n'.join(lines) + '\n').encode('utf-8')
+        return pages
+
+    def published_months(self) -> List[str]:
+        """Months BOM currently publishes (oldest first)"""
+        today = datetime.now()
+        year, month = today.year, today.month
+        months = []
+        for _ in range(PUBLISHED_MONTHS):
+            months.append(f"{year}{month:02d}")
+            year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+        return months[::-1]
+
+    def month_csv(self, station_id: str, month_key: str) -> Optional[Tuple[bytes, str]]:
+        """(body, etag) for a station month, or None if BOM would 404"""
+        station = self._stations_by_id.get(station_id)
+        if station is None or month_key not in self.published_months():
+            return None
+
+        today = datetime.now()
+        current = month_key == today.strftime("%Y%m")
+        cache_key = (station_id, month_key)
+        cached = self._csv_cache.get(cache_key)
+        # The current month grows daily - rebuild it when the day changes
+        if cached is None or current:
+            records = self._records[sum(map(ord, station_id)) % len(self._records)]
+            body = build_month_csv(records, month_key, location=f"{station['name']}, {station['state']}",
+                                   station_name=station['name'],
+                                   last_day=today.day - 1 if current else None).encode('utf-8')
+            cached = (body, '"' + hashlib.sha1(body).hexdigest() + '"')
+            self._csv_cache[cache_key] = cached
+        return cached
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _fault(self) -> Optional[int]:
+        with self._random_lock:
+            roll = self._random.random()
+            delay = self.latency_ms + (self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+        if roll < self.forbidden_rate:
+            return 403
+        if roll < self.forbidden_rate + self.throttle_rate:
+            return 429
+        if roll < self.forbidden_rate + self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+    def _record(self, kind: str, status: int) -> None:
+        with self._stats_lock:
+            self.stats['requests'] += 1
+            self.stats['by_kind'][kind] = self.stats['by_kind'].get(kind, 0) + 1
+            self.stats['by_status'][status] = self.stats['by_status'].get(status, 0) + 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                kind = ('csv' if _CSV_PATH.match(path) else 'group' if _GROUP_PATH.match(path)
+                        else 'state' if _STATE_PATH.match(path) else 'site_list' if path.endswith('stations.txt')
+                        else 'other')
+
+                fault = server._fault()
+                if fault is not None:
+                    headers = {'Retry-After': '5'} if fault == 429 else {}
+                    return self._send(kind, fault, b'', 'text/plain', headers)
+
+                if kind == 'csv':
+                    month_key, station_id = _CSV_PATH.match(path).group(1, 2)
+                    csv = server.month_csv(station_id, month_key)
+                    if csv is None:
+                        return self._send(kind, 404, b'Not Found', 'text/plain')
+                    body, etag = csv
+                    if self.headers.get('If-None-Match') == etag:
+                        return self._send(kind, 304, b'', 'text/plain', {'ETag': etag})
+                    return self._send(kind, 200, body, 'text/plain; charset=utf-8', {'ETag': etag})
+
+                page = server._pages.get(path)
+                if page is None:
+                    return self._send(kind, 404, b'Not Found', 'text/plain')
+                content_type = 'text/plain; charset=utf-8' if kind == 'site_list' else 'text/html; charset=utf-8'
+                return self._send(kind, 200, page, content_type)
+
+            def _send(self, kind: str, status: int, body: bytes, content_type: str,
+                      headers: Optional[Dict[str, str]] = None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+                server._record(kind, status)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fake BOM DWO pages and CSVs locally")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Delay added to every response")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Extra random delay (0 to this)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of 500 responses")
+    parser.add_argument('--forbidden-rate', type=float, default=0.0, help="Fraction of 403 responses")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument('--stations-per-state', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeBOMServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate,
+                           args.forbidden_rate, args.throttle_rate, args.stations_per_state, args.seed)
+    print(f"🧪 Fake BOM server on {server.url} ({len(server.stations)} stations)")
+    print(f"   export BOM_BASE_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 Requests served: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Benchmark Fixtures - Recorded BOM Data
+Version: v1.2 • Updated: 2026-10-16 19:10 AEST (Brisbane)
+
+Rebuilds BOM monthly DWO CSV files from the extractions recorded in
+services/daily_observations_data, so benchmarks run offline and repeatably.
+Also builds DWO state and letter group pages in BOM's page layout, or loads
+real captures from a directory when one is given.
+
+The recorded JSON files hold normalised records; this module maps them back
+to BOM's CSV layout (quoted preamble, ,"Date",... header, unquoted rows).
+"""
+
+import json
+import calendar
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SERVICES_DIR = BACKEND_DIR / "services"
+RECORDED_DATA_DIR = SERVICES_DIR / "daily_observations_data"
+
+# BOM column headers, in file order
+BOM_CSV_HEADERS = [
+    'Date',
+    'Minimum temperature (°C)',
+    'Maximum temperature (°C)',
+    'Rainfall (mm)',
+    'Evaporation (mm)',
+    'Sunshine (hours)',
+    'Direction of maximum wind gust ',
+    'Speed of maximum wind gust (km/h)',
+    'Time of maximum wind gust',
+    '9am Temperature (°C)',
+    '9am relative humidity (%)',
+    '9am cloud amount (oktas)',
+    '9am wind direction',
+    '9am wind speed (km/h)',
+    '9am MSL pressure (hPa)',
+    '3pm Temperature (°C)',
+    '3pm relative humidity (%)',
+    '3pm cloud amount (oktas)',
+    '3pm wind direction',
+    '3pm wind speed (km/h)',
+    '3pm MSL pressure (hPa)',
+]
+
+# Normalised record keys, in the same order as BOM_CSV_HEADERS
+RECORD_KEYS = [
+    'date',
+    'minimum_temperature_c',
+    'maximum_temperature_c',
+    'rainfall_mm',
+    'evaporation_mm',
+    'sunshine_hours',
+    'direction_of_maximum_wind_gust_',
+    'speed_of_maximum_wind_gust_km_h',
+    'time_of_maximum_wind_gust',
+    '9am_temperature_c',
+    '9am_relative_humidity_percent',
+    '9am_cloud_amount_oktas',
+    '9am_wind_direction',
+    '9am_wind_speed_km_h',
+    '9am_msl_pressure_hpa',
+    '3pm_temperature_c',
+    '3pm_relative_humidity_percent',
+    '3pm_cloud_amount_oktas',
+    '3pm_wind_direction',
+    '3pm_wind_speed_km_h',
+    '3pm_msl_pressure_hpa',
+]
+
+
+def load_recorded_extractions() -> List[Dict]:
+    """Load every recorded extraction (metadata + weather_data) from daily_observations_data"""
+    extractions = []
+    for path in sorted(RECORDED_DATA_DIR.glob("*.json")):
+        with open(path, 'r', encoding='utf-8') as f:
+            extraction = json.load(f)
+        if extraction.get('weather_data'):
+            extraction['source_file'] = path.name
+            extractions.append(extraction)
+    return extractions
+
+
+def _csv_value(value) -> str:
+    """Render a recorded value (string, or number/null in typed extractions) as a CSV cell"""
+    return '' if value is None else str(value)
+
+
+def build_month_csv(records: List[Dict], month_key: str, location: str = "Melbourne, Victoria",
+                    station_name: str = "Melbourne (Olympic Park)", last_day: Optional[int] = None) -> str:
+    """
+    Build a full BOM monthly CSV for month_key by cycling through recorded days
+
+    Args:
+        records: Recorded (normalised) daily records to draw values from
+        month_key: Month in YYYYMM format
+        location: "Location, State" used in the preamble
+        station_name: Station name used in the preamble
+        last_day: Stop after this day (a month still in progress)
+
+    Returns:
+        CSV text in BOM's layout
+    """
+    year, month = int(month_key[:4]), int(month_key[4:6])
+    days = calendar.monthrange(year, month)[1]
+    if last_day is not None:
+        days = min(days, last_day)
+    month_name = calendar.month_name[month]
+
+    lines = [
+        f'"Daily Weather Observations for {location}"',
+        f'"Prepared at 13:00 UTC on 1 {month_name[:3]} {year}"',
+        f'"Copyright {year} Bureau of Meteorology"',
+        f'"Observations were drawn from {station_name}"',
+        '',
+        ',' + ','.join(f'"{header}"' for header in BOM_CSV_HEADERS),
+    ]
+
+    for day in range(1, days + 1):
+        source = records[(day - 1) % len(records)]
+        values = [f"{year}-{month:02d}-{day:02d}"] + [_csv_value(source.get(key)) for key in RECORD_KEYS[1:]]
+        lines.append(',' + ','.join(values))
+
+    lines.append('')
+    lines.append('"Observations from the Bureau of Meteorology - see notes at bottom of page"')
+    return '\r\n'.join(lines) + '\r\n'
+
+
+def recorded_month_csvs(month_key: str) -> Dict[str, str]:
+    """Build a month CSV for every recorded station, keyed by station ID"""
+    csvs = {}
+    for extraction in load_recorded_extractions():
+        metadata = extraction['metadata']
+        csvs[metadata['station_id']] = build_month_csv(
+            extraction['weather_data'], month_key, location=metadata['location']
+        )
+    return csvs
+
+
+# BOM page furniture around the DWO link lists (header navigation, menus, footer)
+_PAGE_HEAD = """<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml" lang="en"><head>
+<meta http-equiv="Content-Type" content="text/html; charset=UTF-8" />
+<title>{title}</title>
+<link rel="stylesheet" type="text/css" href="/css/bom.css" media="all" />
+<script type="text/javascript" src="/scripts/jquery.js"></script>
+<script type="text/javascript">var _gaq = _gaq || []; _gaq.push(['_setAccount', 'UA-0000000-1']); if (a < b && c) {{ track(); }}</script>
+</head><body><div id="container"><div id="header"><ul id="nav">
+"""
+_NAV_ITEMS = ["Home", "About", "Contacts", "Weather", "Warnings", "Radar", "Climate", "Water",
+              "Oceans", "Environment", "Data Services", "Media", "Learn", "Careers"]
+_PAGE_FOOT = """</div><div id="footer"><table class="footer"><tr>{cells}</tr></table>
+<p>&copy; Copyright Commonwealth of Australia, Bureau of Meteorology (ABN 92 637 533 532)</p>
+<p>Please note the <a href="/other/disclaimer.shtml">Copyright Notice and Disclaimer</a> statements
+relating to the use of the information on this site &amp; our <a href="/other/privacy.shtml">Privacy Policy</a>.</p>
+</div></div></body></html>
+"""
+
+
+def _page(title: str, body: str) -> str:
+    nav = ''.join(f'<li><a href="/{item.lower().replace(" ", "-")}/">{item}</a>'
+                  f'<ul><li><a href="/{item.lower()}/sub1.shtml">{item} one</a></li>'
+                  f'<li><a href="/{item.lower()}/sub2.shtml">{item} two</a></li></ul></li>'
+                  for item in _NAV_ITEMS)
+    cells = ''.join(f'<td class="f{i}"><a href="/footer/{i}.shtml">Link {i}</a> | <span>Info {i}</span></td>'
+                    for i in range(24))
+    return _PAGE_HEAD.format(title=title) + nav + '</ul></div><div id="content">' + body + _PAGE_FOOT.format(cells=cells)
+
+
+LETTER_GROUPS = ["A - B", "C - D", "E - G", "H - K", "L", "M", "N - R", "S - T", "U - Z"]
+
+
+def letter_group_for(name: str, groups: List[str] = LETTER_GROUPS) -> str:
+    """The letter group ("A - B", "L", ...) a station name is listed under"""
+    first = (name[:1] or 'A').upper()
+    for group in groups:
+        if group[0] <= first <= group[-1]:
+            return group
+    return groups[-1]
+
+
+def build_state_page(state: str = "Victoria", code: str = "IDCJDW0300",
+                     groups: List[str] = LETTER_GROUPS) -> str:
+    """Build a DWO state page (letter group links amid BOM page furniture)"""
+    links = ''.join(f'<li><a href="/climate/dwo/{code}_{group[0]}.shtml">{group}</a></li>' for group in groups)
+    body = (f'<h1>{state} Daily Weather Observations</h1>'
+            f'<p class="intro">Select the first letter of the location name.</p><ul class="groups">{links}</ul>'
+            + ''.join(f'<p>Notes paragraph {i} about observation practices &amp; station metadata.</p>'
+                      for i in range(12)))
+    return _page(f"{state} Daily Weather Observations", body)
+
+
+def build_letter_group_page(state: str = "Victoria", stations: int = 120, first_id: int = 3000,
+                            station_links: Optional[List[Tuple[str, str]]] = None) -> str:
+    """
+    Build a DWO letter group page with one table row (and station link) per station
+
+    Args:
+        state: State name for the headings
+        stations: Number of generated stations (when station_links is not given)
+        first_id: First generated station number
+        station_links: (station_id, name) pairs to list instead of generated stations
+    """
+    if station_links is None:
+        station_links = [(f"IDCJDW{first_id + i}", f"Station {i} (Site {i % 7})") for i in range(stations)]
+    rows = ''.join(
+        f'<tr class="rowleftcolumn"><th><a href="/climate/dwo/{station_id}.latest.shtml">'
+        f'{name}</a></th><td>{i % 50}.{i % 10}</td><td>{(i * 3) % 40}.0</td>'
+        f'<td class="rain">{i % 5}.2</td><td><a href="/climate/averages/{station_id[6:]}.shtml">averages</a></td></tr>'
+        for i, (station_id, name) in enumerate(station_links)
+    )
+    body = (f'<h1>{state} - Daily Weather Observations</h1>'
+            f'<table class="tabledata"><thead><tr><th>Station</th><th>Min</th><th>Max</th>'
+            f'<th>Rain</th><th>Averages</th></tr></thead><tbody>{rows}</tbody></table>')
+    return _page(f"{state} Daily Weather Observations - Station list", body)
+
+
+def dwo_pages(pages_dir: Optional[Path] = None) -> Dict[str, str]:
+    """
+    DWO pages to benchmark, keyed by name
+
+    Args:
+        pages_dir: Directory of captured pages (*.shtml / *.html); built pages are used if omitted
+    """
+    if pages_dir is not None:
+        return {path.name: path.read_text(encoding='utf-8', errors='replace')
+                for path in sorted(Path(pages_dir).glob("*.*html"))}
+    return {
+        'state_IDCJDW0300.shtml': build_state_page(),
+        'group_small.shtml': build_letter_group_page(stations=40),
+        'group_large.shtml': build_letter_group_page(stations=160),
+    }
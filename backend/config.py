@@ -1,7 +1,8 @@
 """
 Fetcha Weather - Backend Configuration
-Version: v1.1 • Updated: 2025-03-11 14:57 AEST (Brisbane)
+Version: v1.2 • Updated: 2026-10-16 19:55 AEST (Brisbane)
 Added Google OAuth support - includes GOOGLE_CLIENT_ID config
+Added REQUEST_TIMINGS_ENABLED - persist per-phase request timings
 """
 
 import os
@@ -112,6 +113,8 @@ class Config:
     # Monitoring
     SENTRY_DSN = os.environ.get('SENTRY_DSN', '')
     ENABLE_METRICS = True
+    # Store each weather request's phase breakdown in request_timings
+    REQUEST_TIMINGS_ENABLED = os.environ.get('REQUEST_TIMINGS_ENABLED', 'true').lower() == 'true'
 
 
 class DevelopmentConfig(Config):
@@ -12,5 +12,7 @@ db = SQLAlchemy()
 from .user import User
 from .api_key import APIKey
 from .usage import Usage, MonthlyUsage
+from .observation import Observation
+from .request_timing import RequestTiming
 
-__all__ = ['db', 'User', 'APIKey', 'Usage', 'MonthlyUsage']
+__all__ = ['db', 'User', 'APIKey', 'Usage', 'MonthlyUsage', 'Observation', 'RequestTiming']
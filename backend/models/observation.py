@@ -0,0 +1,222 @@
+"""
+Fetcha Weather - Observation Warehouse Model (SQLAlchemy ORM)
+Version: v1.1 • Updated: 2026-10-16 22:40 AEST (Brisbane)
+Failed reads roll the session back so the request can keep using it
+Local copy of every BOM daily observation fetched, keyed by (station_id, date),
+so repeat historical queries are answered with an indexed range scan
+"""
+
+import sys
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional
+
+# Typed record shared with the scraper (services/ uses flat imports)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "services"))
+from observation_records import ObservationRecord, FIELDS
+
+# Import db from __init__.py will be handled at runtime to avoid circular imports
+from . import db
+
+# Record field → column attribute (BOM's 9am/3pm keys are not valid identifiers)
+FIELD_COLUMNS = {
+    'month_key': 'month_key',
+    'date': 'date',
+    'minimum_temperature_c': 'minimum_temperature_c',
+    'maximum_temperature_c': 'maximum_temperature_c',
+    'rainfall_mm': 'rainfall_mm',
+    'evaporation_mm': 'evaporation_mm',
+    'sunshine_hours': 'sunshine_hours',
+    'direction_of_maximum_wind_gust_': 'max_wind_gust_direction',
+    'speed_of_maximum_wind_gust_km_h': 'max_wind_gust_speed_km_h',
+    'time_of_maximum_wind_gust': 'max_wind_gust_time',
+    '9am_temperature_c': 'temperature_9am_c',
+    '9am_relative_humidity_percent': 'relative_humidity_9am_percent',
+    '9am_cloud_amount_oktas': 'cloud_amount_9am_oktas',
+    '9am_wind_direction': 'wind_direction_9am',
+    '9am_wind_speed_km_h': 'wind_speed_9am_km_h',
+    '9am_msl_pressure_hpa': 'msl_pressure_9am_hpa',
+    '3pm_temperature_c': 'temperature_3pm_c',
+    '3pm_relative_humidity_percent': 'relative_humidity_3pm_percent',
+    '3pm_cloud_amount_oktas': 'cloud_amount_3pm_oktas',
+    '3pm_wind_direction': 'wind_direction_3pm',
+    '3pm_wind_speed_km_h': 'wind_speed_3pm_km_h',
+    '3pm_msl_pressure_hpa': 'msl_pressure_3pm_hpa',
+}
+
+
+class Observation(db.Model):
+    """One day of BOM observations for one station"""
+
+    __tablename__ = 'observations'
+
+    # Columns - (station_id, date) primary key doubles as the range scan index
+    station_id = db.Column(db.String(16), primary_key=True)
+    date = db.Column(db.String(10), primary_key=True)  # YYYY-MM-DD sorts chronologically
+    month_key = db.Column(db.String(6), nullable=False)
+    minimum_temperature_c = db.Column(db.Float, nullable=True)
+    maximum_temperature_c = db.Column(db.Float, nullable=True)
+    rainfall_mm = db.Column(db.Float, nullable=True)
+    evaporation_mm = db.Column(db.Float, nullable=True)
+    sunshine_hours = db.Column(db.Float, nullable=True)
+    max_wind_gust_direction = db.Column(db.String(8), nullable=True)
+    max_wind_gust_speed_km_h = db.Column(db.Integer, nullable=True)
+    max_wind_gust_time = db.Column(db.String(8), nullable=True)
+    temperature_9am_c = db.Column(db.Float, nullable=True)
+    relative_humidity_9am_percent = db.Column(db.Integer, nullable=True)
+    cloud_amount_9am_oktas = db.Column(db.Integer, nullable=True)
+    wind_direction_9am = db.Column(db.String(8), nullable=True)
+    wind_speed_9am_km_h = db.Column(db.Integer, nullable=True)
+    msl_pressure_9am_hpa = db.Column(db.Float, nullable=True)
+    temperature_3pm_c = db.Column(db.Float, nullable=True)
+    relative_humidity_3pm_percent = db.Column(db.Integer, nullable=True)
+    cloud_amount_3pm_oktas = db.Column(db.Integer, nullable=True)
+    wind_direction_3pm = db.Column(db.String(8), nullable=True)
+    wind_speed_3pm_km_h = db.Column(db.Integer, nullable=True)
+    msl_pressure_3pm_hpa = db.Column(db.Float, nullable=True)
+    is_final = db.Column(db.Boolean, default=False, nullable=False)  # Month closed when fetched
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_record(self) -> ObservationRecord:
+        """Convert to a typed observation record"""
+        return ObservationRecord([getattr(self, FIELD_COLUMNS[name]) for name in FIELDS])
+
+    def to_dict(self):
+        """Convert observation to dictionary (same keys as the weather API data rows)"""
+        return self.to_record().to_dict()
+
+    @staticmethod
+    def upsert_records(station_id: str, records: Iterable[ObservationRecord],
+                       is_final: bool = False) -> Dict[str, Any]:
+        """
+        Bulk insert or update observations for a station
+
+        Args:
+            station_id: BOM station ID (e.g. IDCJDW3050)
+            records: Typed records (typically one parsed month)
+            is_final: The records come from a closed month and will not change
+
+        Returns:
+            Dict with success status and rows written
+        """
+        fetched_at = datetime.utcnow()
+        rows = []
+        for record in records:
+            if not record.get('date'):
+                continue
+            row = {FIELD_COLUMNS[name]: value for name, value in zip(FIELDS, record.values)}
+            row.update(station_id=station_id, is_final=is_final, fetched_at=fetched_at)
+            rows.append(row)
+
+        if not rows:
+            return {'success': True, 'rows_written': 0}
+
+        try:
+            dialect = db.engine.dialect.name
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+                batch_size = 1000
+            elif dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+                batch_size = max(1, 900 // len(rows[0]))  # Stay under SQLite's bound parameter limit
+            else:
+                insert = None
+
+            if insert is None:
+                for row in rows:
+                    db.session.merge(Observation(**row))
+            else:
+                table = Observation.__table__
+                for start in range(0, len(rows), batch_size):
+                    stmt = insert(table).values(rows[start:start + batch_size])
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=['station_id', 'date'],
+                        set_={column: stmt.excluded[column] for column in rows[0]
+                              if column not in ('station_id', 'date')}
+                    )
+                    db.session.execute(stmt)
+
+            db.session.commit()
+
+            return {
+                'success': True,
+                'rows_written': len(rows)
+            }
+
+        except Exception as e:
+            db.session.rollback()
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    @staticmethod
+    def get_records(station_id: str, dates: List[str],
+                    fresh_after: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Get stored observations for a station on the given dates
+
+        One range scan over the primary key from the earliest to the latest date.
+
+        Args:
+            station_id: BOM station ID
+            dates: Dates in YYYY-MM-DD format
+            fresh_after: Ignore non-final rows fetched before this time (UTC)
+
+        Returns:
+            Dict with 'records' (date → ObservationRecord for the dates found) and
+            'final_months' (months stored complete - dates missing from them
+            do not exist upstream either)
+        """
+        result = {'records': {}, 'final_months': set()}
+        if not dates:
+            return result
+
+        wanted = set(dates)
+
+        try:
+            rows = Observation.query.filter(
+                Observation.station_id == station_id,
+                Observation.date.between(min(wanted), max(wanted))
+            ).all()
+        except Exception:
+            # Treated as a warehouse miss, but an aborted transaction (PostgreSQL)
+            # would fail the request's later usage and timing writes
+            db.session.rollback()
+            return result
+
+        for row in rows:
+            if row.is_final:
+                result['final_months'].add(row.month_key)
+            if row.date not in wanted:
+                continue
+            if not row.is_final and fresh_after is not None and row.fetched_at < fresh_after:
+                continue
+            result['records'][row.date] = row.to_record()
+
+        return result
+
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        """Get warehouse size statistics"""
+        try:
+            total, stations, final = db.session.query(
+                db.func.count(),
+                db.func.count(db.distinct(Observation.station_id)),
+                db.func.sum(db.case((Observation.is_final.is_(True), 1), else_=0))
+            ).select_from(Observation).one()
+
+            return {
+                'observations': total or 0,
+                'stations': stations or 0,
+                'final_observations': final or 0
+            }
+
+        except Exception as e:
+            db.session.rollback()
+            return {
+                'observations': 0,
+                'stations': 0,
+                'final_observations': 0,
+                'error': str(e)
+            }
@@ -0,0 +1,120 @@
+"""
+Fetcha Weather - Request Timing Model (SQLAlchemy ORM)
+Version: v1.0 • Updated: 2026-10-16 19:55 AEST (Brisbane)
+Per-phase duration of each weather request (one row per request and phase),
+linked to its usage log row so slow requests can be broken down and phases
+aggregated with plain GROUP BY queries
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+# Import db from __init__.py will be handled at runtime to avoid circular imports
+from . import db
+
+
+class RequestTiming(db.Model):
+    """Time spent in one phase of one API request"""
+
+    __tablename__ = 'request_timings'
+
+    # Columns
+    id = db.Column(db.Integer, primary_key=True)
+    usage_id = db.Column(db.Integer, db.ForeignKey('usage.id', ondelete='CASCADE'), nullable=True, index=True)
+    endpoint = db.Column(db.Text, nullable=False)
+    phase = db.Column(db.String(32), nullable=False)
+    duration_ms = db.Column(db.Float, nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        db.Index('idx_request_timings_phase_timestamp', 'phase', 'timestamp'),
+    )
+
+    def to_dict(self):
+        """Convert timing row to dictionary"""
+        return {
+            'id': self.id,
+            'usage_id': self.usage_id,
+            'endpoint': self.endpoint,
+            'phase': self.phase,
+            'duration_ms': self.duration_ms,
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None
+        }
+
+    @staticmethod
+    def record(endpoint: str, timings: Dict[str, float], usage_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Store a request's phase breakdown
+
+        Args:
+            endpoint: API endpoint called
+            timings: Phase name → milliseconds (as from PhaseTimer.as_dict)
+            usage_id: Usage log row of the request (optional)
+
+        Returns:
+            Dict with success status
+        """
+        try:
+            timestamp = datetime.utcnow()
+            db.session.add_all([
+                RequestTiming(usage_id=usage_id, endpoint=endpoint, phase=phase,
+                              duration_ms=duration_ms, timestamp=timestamp)
+                for phase, duration_ms in timings.items()
+            ])
+            db.session.commit()
+
+            return {
+                'success': True,
+                'rows_written': len(timings)
+            }
+
+        except Exception as e:
+            db.session.rollback()
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    @staticmethod
+    def get_phase_summary(days: int = 7, endpoint: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Aggregate phase durations over a recent window
+
+        Args:
+            days: Look back this many days
+            endpoint: Only include this endpoint (optional)
+
+        Returns:
+            Dict with per-phase count, average and maximum milliseconds
+        """
+        try:
+            query = db.session.query(
+                RequestTiming.phase,
+                db.func.count(RequestTiming.id),
+                db.func.avg(RequestTiming.duration_ms),
+                db.func.max(RequestTiming.duration_ms)
+            ).filter(RequestTiming.timestamp >= datetime.utcnow() - timedelta(days=days))
+
+            if endpoint:
+                query = query.filter(RequestTiming.endpoint == endpoint)
+
+            phases = {
+                phase: {
+                    'count': count,
+                    'avg_ms': round(avg_ms or 0, 2),
+                    'max_ms': round(max_ms or 0, 2)
+                }
+                for phase, count, avg_ms, max_ms in query.group_by(RequestTiming.phase).all()
+            }
+
+            return {
+                'success': True,
+                'days': days,
+                'phases': phases
+            }
+
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
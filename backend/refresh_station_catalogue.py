@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Refresh BOM Station Catalogue
+Version: v1.0 • Updated: 2026-10-16 15:40 AEST (Brisbane)
+
+Crawls the BOM DWO station pages and the BOM station site list, and rebuilds
+the station coordinates catalogue used for lat/lon queries. Run it once per
+deployment (and then weekly) against the same BOM_DATA_DIR as the workers.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "services"))
+
+from smart_html_parsing_scraper import SmartHTMLParsingBOMScraper
+
+
+def refresh_catalogue(states=None):
+    """
+    Rebuild the station directory and coordinates catalogue
+
+    Args:
+        states: State names to refresh (defaults to all states)
+    """
+    scraper = SmartHTMLParsingBOMScraper()
+    result = scraper.refresh_station_catalogue(states)
+
+    if not result['success']:
+        print(f"❌ Catalogue refresh failed: {result.get('error', 'no stations matched')}")
+        return False
+
+    print(f"\n{'='*60}")
+    print(f"✅ Stations with coordinates: {result['stations']}")
+    print(f"⚠️ Stations without coordinates: {result['unmatched']}")
+    for station_id in result['unmatched_station_ids'][:20]:
+        print(f"   - {station_id}")
+    print(f"{'='*60}\n")
+    return True
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] in ('-h', '--help'):
+        print("Usage:")
+        print("  python refresh_station_catalogue.py                      # All states")
+        print("  python refresh_station_catalogue.py Tasmania Victoria    # Specific states")
+    else:
+        success = refresh_catalogue(sys.argv[1:] or None)
+        sys.exit(0 if success else 1)
@@ -1,19 +1,30 @@
 """
 Fetcha Weather - Weather API Routes
-Version: v1.1 • Updated: 2025-10-28 19:23 AEST (Brisbane)
+Version: v1.6 • Updated: 2026-10-16 22:55 AEST (Brisbane)
 
 Integrates with BOM Weather Service for real Australian weather data
+/location times each phase (auth, quota, service internals, usage logging);
+the breakdown is logged, stored in request_timings and returned in
+meta.timings_ms when ?timings=true
+Failed lookups return the service's status_code (503 for upstream errors), else 400
 """
 
 from flask import Blueprint, request, jsonify, current_app
 from models.api_key import APIKey
 from models.usage import Usage
 from models.user import User
+from models.request_timing import RequestTiming
 from config import get_config
 from services.bom_weather_service import get_weather_service
 from datetime import datetime
+from pathlib import Path
+import sys
 import time
 
+# Same module instance as the services (services/ uses flat imports)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "services"))
+from phase_timer import start_request_timer, stop_request_timer
+
 weather_bp = Blueprint('weather', __name__)
 
 # Get config
@@ -67,16 +78,21 @@ def get_weather_by_location():
     Query parameters:
     - location: Location name (e.g., "Launceston", "Melbourne")
     - state: State name (e.g., "Tasmania", "Victoria") or code (e.g., "TAS", "VIC")
+    - lat, lon: Coordinates (alternative to location/state) - uses the nearest BOM station
     - date_from: Start date (YYYY-MM-DD) - optional, defaults to today
     - date_to: End date (YYYY-MM-DD) - optional, defaults to date_from
+    - timings: 'true' to include the per-phase breakdown in meta.timings_ms
     
     Returns:
         JSON response with real BOM weather data
     """
     start_time = time.time()
+    timer = start_request_timer()
+    include_timings = request.args.get('timings', '').lower() in ('1', 'true', 'yes')
     
     # Validate API key
-    is_valid, api_key_or_error = validate_api_key_header()
+    with timer.phase('auth'):
+        is_valid, api_key_or_error = validate_api_key_header()
     if not is_valid:
         return jsonify(api_key_or_error), 401
     
@@ -84,10 +100,11 @@ def get_weather_by_location():
     user_id = api_key_data['user_id']
     
     # Get user and check quota
-    user = User.get_by_id(user_id)
-    tier_config = config.TIERS.get(user.tier, config.TIERS['free'])
-    
-    quota_status = Usage.check_quota(user_id, user.tier, tier_config['monthly_quota'])
+    with timer.phase('quota'):
+        user = User.get_by_id(user_id)
+        tier_config = config.TIERS.get(user.tier, config.TIERS['free'])
+        
+        quota_status = Usage.check_quota(user_id, user.tier, tier_config['monthly_quota'])
     
     if not quota_status['within_quota']:
         return jsonify({
@@ -101,16 +118,33 @@ def get_weather_by_location():
     state = request.args.get('state')
     date_from = request.args.get('date_from')
     date_to = request.args.get('date_to')
+    latitude = request.args.get('lat') or request.args.get('latitude')
+    longitude = request.args.get('lon') or request.args.get('longitude')
     
-    if not location or not state:
+    coordinates = None
+    if latitude is not None and longitude is not None:
+        try:
+            coordinates = (float(latitude), float(longitude))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid coordinates: lat and lon must be decimal degrees',
+                'example': '/api/weather/location?lat=-41.42&lon=147.12&date_from=2025-01-01&date_to=2025-01-07'
+            }), 400
+    
+    if coordinates is None and (not location or not state):
         return jsonify({
             'success': False,
-            'error': 'Missing required parameters: location and state',
+            'error': 'Missing required parameters: location and state (or lat and lon)',
             'example': '/api/weather/location?location=Melbourne&state=Victoria&date_from=2025-01-01&date_to=2025-01-07'
         }), 400
     
-    # Normalize state name (convert code to full name if needed)
-    state = _normalize_state_name(state)
+    if coordinates is not None:
+        location = f"{coordinates[0]},{coordinates[1]}"
+        state = None
+    else:
+        # Normalize state name (convert code to full name if needed)
+        state = _normalize_state_name(state)
     
     # Set default dates if not provided
     if not date_from:
@@ -122,38 +156,49 @@ def get_weather_by_location():
     weather_service = get_weather_service()
     
     try:
-        weather_result = weather_service.get_weather_data(
-            location=location,
-            state=state,
-            date_from=date_from,
-            date_to=date_to
-        )
+        with timer.phase('service'):
+            if coordinates is not None:
+                weather_result = weather_service.get_weather_data_by_coordinates(
+                    latitude=coordinates[0],
+                    longitude=coordinates[1],
+                    date_from=date_from,
+                    date_to=date_to
+                )
+            else:
+                weather_result = weather_service.get_weather_data(
+                    location=location,
+                    state=state,
+                    date_from=date_from,
+                    date_to=date_to
+                )
         
         # Calculate response time
         response_time_ms = int((time.time() - start_time) * 1000)
         
         # Determine status code
-        status_code = 200 if weather_result['success'] else 400
+        status_code = 200 if weather_result['success'] else weather_result.get('status_code', 400)
         
         # Log the request
-        Usage.log_request(
-            user_id=user_id,
-            api_key_id=api_key_data['id'],
-            endpoint='/api/weather/location',
-            location=location,
-            state=state,
-            date_from=date_from,
-            date_to=date_to,
-            response_time_ms=response_time_ms,
-            status_code=status_code,
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
-        )
+        with timer.phase('usage_logging'):
+            log_result = Usage.log_request(
+                user_id=user_id,
+                api_key_id=api_key_data['id'],
+                endpoint='/api/weather/location',
+                location=location,
+                state=state,
+                date_from=date_from,
+                date_to=date_to,
+                response_time_ms=response_time_ms,
+                status_code=status_code,
+                ip_address=request.remote_addr,
+                user_agent=request.headers.get('User-Agent')
+            )
+        timings = _record_timings(timer, '/api/weather/location', log_result)
         
         current_app.logger.info(
             f'Weather request: location={location}, state={state}, '
             f'user_id={user_id}, success={weather_result["success"]}, '
-            f'time={response_time_ms}ms'
+            f'time={response_time_ms}ms timings_ms[{timer.summary()}]'
         )
         
         if weather_result['success']:
@@ -164,22 +209,27 @@ def get_weather_by_location():
                 'data': weather_result['data'],
                 'metadata': weather_result['metadata'],
                 'cached': weather_result.get('cached', False),
+                'stale': weather_result.get('stale', False),
+                **({'distance_km': weather_result['distance_km'],
+                    'nearest_stations': weather_result['nearest_stations']} if coordinates is not None else {}),
                 'meta': {
                     'response_time_ms': response_time_ms,
                     'quota_remaining': quota_status['requests_remaining'],
                     'quota_used': quota_status['requests_used'],
-                    'tier': user.tier
+                    'tier': user.tier,
+                    **({'timings_ms': timings} if include_timings else {})
                 }
             }), 200
         else:
             return jsonify({
                 'success': False,
                 'error': weather_result.get('error', 'Failed to fetch weather data'),
-                'location': f"{location}, {state}",
+                'location': location if coordinates is not None else f"{location}, {state}",
                 'meta': {
                     'response_time_ms': response_time_ms,
                     'quota_remaining': quota_status['requests_remaining'],
-                    'quota_used': quota_status['requests_used']
+                    'quota_used': quota_status['requests_used'],
+                    **({'timings_ms': timings} if include_timings else {})
                 }
             }), status_code
             
@@ -188,29 +238,48 @@ def get_weather_by_location():
         response_time_ms = int((time.time() - start_time) * 1000)
         
         # Still log failed request
-        Usage.log_request(
-            user_id=user_id,
-            api_key_id=api_key_data['id'],
-            endpoint='/api/weather/location',
-            location=location,
-            state=state,
-            date_from=date_from,
-            date_to=date_to,
-            response_time_ms=response_time_ms,
-            status_code=500,
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent')
-        )
+        with timer.phase('usage_logging'):
+            log_result = Usage.log_request(
+                user_id=user_id,
+                api_key_id=api_key_data['id'],
+                endpoint='/api/weather/location',
+                location=location,
+                state=state,
+                date_from=date_from,
+                date_to=date_to,
+                response_time_ms=response_time_ms,
+                status_code=500,
+                ip_address=request.remote_addr,
+                user_agent=request.headers.get('User-Agent')
+            )
+        timings = _record_timings(timer, '/api/weather/location', log_result)
         
         return jsonify({
             'success': False,
             'error': f'Internal server error: {str(e)}',
             'meta': {
-                'response_time_ms': response_time_ms
+                'response_time_ms': response_time_ms,
+                **({'timings_ms': timings} if include_timings else {})
             }
         }), 500
 
 
+@weather_bp.teardown_request
+def _stop_request_timer(exc):
+    """Detach the phase timer so the worker thread's next request starts clean"""
+    stop_request_timer()
+
+
+def _record_timings(timer, endpoint: str, log_result: dict) -> dict:
+    """Snapshot the request's phase timings and store them against its usage log row"""
+    timings = timer.as_dict()
+    if config.REQUEST_TIMINGS_ENABLED:
+        result = RequestTiming.record(endpoint, timings, usage_id=log_result.get('log_id'))
+        if not result['success']:
+            current_app.logger.warning(f"Could not store request timings: {result['error']}")
+    return timings
+
+
 @weather_bp.route('/states', methods=['GET'])
 def get_available_states():
     """
@@ -246,18 +315,56 @@ def get_cache_stats():
     }), 200
 
 
+@weather_bp.route('/timings', methods=['GET'])
+def get_timing_summary():
+    """
+    Aggregate per-phase request timings (admin/monitoring endpoint)
+    
+    Query Parameters:
+        days: Look-back window in days (default 7)
+    
+    Returns:
+        JSON response with per-phase count, average and maximum milliseconds
+    """
+    try:
+        days = int(request.args.get('days', 7))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'days must be an integer'}), 400
+    
+    result = RequestTiming.get_phase_summary(days=days, endpoint='/api/weather/location')
+    
+    return jsonify(result), 200 if result['success'] else 500
+
+
+@weather_bp.route('/cache/negative', methods=['GET'])
+def get_negative_cache():
+    """
+    List cached "not found" results - unknown locations and months with no CSV (admin/monitoring endpoint)
+    
+    Returns:
+        JSON response with negative cache statistics and live entries
+    """
+    weather_service = get_weather_service()
+    result = weather_service.get_negative_cache()
+    
+    return jsonify(result), 200
+
+
 @weather_bp.route('/cache/clear', methods=['POST'])
 def clear_cache():
     """
     Clear the weather data cache (admin endpoint)
     
+    Query Parameters:
+        scope: 'all' (default), 'responses' or 'negative'
+    
     Returns:
         JSON response confirming cache clear
     """
     weather_service = get_weather_service()
-    result = weather_service.clear_cache()
+    result = weather_service.clear_cache(request.args.get('scope', 'all'))
     
-    return jsonify(result), 200
+    return jsonify(result), 200 if result['success'] else 400
 
 
 def _normalize_state_name(state: str) -> str:
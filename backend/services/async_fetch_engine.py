@@ -0,0 +1,193 @@
+"""
+Async BOM Fetch Engine
+Version: v1.2 • Updated: 2026-10-16 22:20 AEST (Brisbane)
+Rate limit and spacing waits are recorded as the request's rate_limit_wait phase
+Jobs a local store can answer (lookup) skip the host budget and the token;
+retries inside a download take their own tokens from the client
+
+Concurrent downloader that runs alongside EnhancedBOMHTTPClient.
+
+- Issues downloads concurrently on an asyncio event loop
+- Per-host politeness budget: max concurrent requests + minimum spacing between request starts
+- Draws from the client's shared token bucket without blocking the event loop
+- Pipelines processing (e.g. CSV parsing) with downloads: each result is handed
+  to the handler as soon as it arrives while other downloads are still in flight
+
+Downloads reuse the enhanced client's session, headers and retry logic by
+running it in a worker thread pool, so no extra HTTP dependency is required.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from rate_limiter import RateLimitExceeded
+from phase_timer import record_phase
+
+logger = logging.getLogger(__name__)
+
+
+class _HostBudget:
+    """Concurrency and request spacing budget for one host"""
+
+    def __init__(self, max_concurrency: int, min_interval_seconds: float):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.min_interval_seconds = min_interval_seconds
+        self.spacing_lock = asyncio.Lock()
+        self.last_start = 0.0
+
+    async def wait_turn(self) -> float:
+        """Wait until this host may start another request (returns the spacing slept)"""
+        async with self.spacing_lock:
+            wait = self.last_start + self.min_interval_seconds - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.last_start = time.monotonic()
+        # Sleeps are serialised by the lock, so their sum is the wall time spent spacing
+        return max(wait, 0.0)
+
+
+class AsyncBOMFetchEngine:
+    """Concurrent month downloader with a per-host politeness budget"""
+
+    def __init__(self, http_client, max_concurrency: Optional[int] = None,
+                 min_interval_seconds: Optional[float] = None, max_retries: int = 2):
+        """
+        Initialize the fetch engine
+
+        Args:
+            http_client: EnhancedBOMHTTPClient used for the actual requests
+            max_concurrency: Maximum in-flight requests per host
+            min_interval_seconds: Minimum spacing between request starts to the same host
+            max_retries: Retries per download (passed to get_with_retry)
+        """
+        if max_concurrency is None:
+            max_concurrency = int(os.environ.get('BOM_FETCH_MAX_CONCURRENCY', '3'))
+        if min_interval_seconds is None:
+            min_interval_seconds = float(os.environ.get('BOM_FETCH_MIN_INTERVAL_SECONDS', '0.5'))
+
+        self.http_client = http_client
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_interval_seconds = max(0.0, min_interval_seconds)
+        self.max_retries = max_retries
+
+    def fetch_all(self, jobs: List[Tuple[Hashable, str]],
+                  handler: Callable[[Hashable, Any], Any],
+                  request_headers: Optional[Dict[Hashable, Dict[str, str]]] = None,
+                  fetcher: Optional[Callable[[Hashable, str, Optional[Dict[str, str]]], Any]] = None,
+                  lookup: Optional[Callable[[Hashable], Any]] = None) -> Dict[Hashable, Any]:
+        """
+        Download URLs concurrently and process each result as it arrives
+
+        Args:
+            jobs: List of (key, url) pairs
+            handler: Called in a worker thread as handler(key, response_or_None);
+                     its return value becomes the result for that key
+            request_headers: Optional extra headers per key (e.g. conditional GET headers)
+            fetcher: Optional blocking fetch(key, url, headers) used instead of a plain
+                     download (e.g. to coalesce or consult a local store first); it
+                     should not apply the client's own rate limit to its first attempt
+            lookup: Optional lookup(key) run before any budget is spent; a non-None
+                    result is handed to the handler instead of downloading
+
+        Returns:
+            Dictionary mapping each key to its handler result
+        """
+        if not jobs:
+            return {}
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.fetch_all_async(jobs, handler, request_headers, fetcher, lookup))
+
+        # Called from inside a running event loop - run on a private loop in a helper thread
+        result: Dict[Hashable, Any] = {}
+        error: List[BaseException] = []
+
+        def runner():
+            try:
+                result.update(asyncio.run(self.fetch_all_async(jobs, handler, request_headers, fetcher, lookup)))
+            except BaseException as e:
+                error.append(e)
+
+        thread = threading.Thread(target=runner, name="bom-fetch-engine")
+        thread.start()
+        thread.join()
+        if error:
+            raise error[0]
+        return result
+
+    async def fetch_all_async(self, jobs: List[Tuple[Hashable, str]],
+                              handler: Callable[[Hashable, Any], Any],
+                              request_headers: Optional[Dict[Hashable, Dict[str, str]]] = None,
+                              fetcher: Optional[Callable[[Hashable, str, Optional[Dict[str, str]]], Any]] = None,
+                              lookup: Optional[Callable[[Hashable], Any]] = None) -> Dict[Hashable, Any]:
+        """Async version of fetch_all"""
+        request_headers = request_headers or {}
+        fetcher = fetcher or (lambda key, url, headers: self._download(url, headers))
+        loop = asyncio.get_running_loop()
+        budgets: Dict[str, _HostBudget] = {}
+        # Downloads and handlers share one pool; size it so parsing never starves downloads
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency * 2,
+                                      thread_name_prefix="bom-fetch")
+
+        async def run_job(key: Hashable, url: str):
+            host = urlparse(url).netloc
+            budget = budgets.setdefault(host, _HostBudget(self.max_concurrency, self.min_interval_seconds))
+
+            # Answered locally - no spacing wait and no token spent
+            if lookup is not None:
+                response = await loop.run_in_executor(executor, lookup, key)
+                if response is not None:
+                    return key, await loop.run_in_executor(executor, handler, key, response)
+
+            async with budget.semaphore:
+                # The loop runs on the request thread, so the request's timer is current here
+                record_phase('rate_limit_wait', await budget.wait_turn())
+                if not await self._acquire_token(url):
+                    response = None
+                else:
+                    response = await loop.run_in_executor(executor, fetcher, key, url, request_headers.get(key))
+
+            # Handler runs outside the host budget so the next download can start immediately
+            return key, await loop.run_in_executor(executor, handler, key, response)
+
+        started = time.monotonic()
+        try:
+            results = {}
+            for finished in asyncio.as_completed([run_job(key, url) for key, url in jobs]):
+                key, value = await finished
+                results[key] = value
+        finally:
+            executor.shutdown(wait=False)
+
+        logger.info(f"Fetched {len(jobs)} URLs in {time.monotonic() - started:.2f}s "
+                    f"(concurrency={self.max_concurrency}, min_interval={self.min_interval_seconds}s)")
+        return results
+
+    async def _acquire_token(self, url: str) -> bool:
+        """Wait asynchronously for the shared rate limit budget"""
+        rate_limiter = getattr(self.http_client, 'rate_limiter', None)
+        if rate_limiter is None:
+            return True
+        try:
+            record_phase('rate_limit_wait', await rate_limiter.acquire_async())
+            return True
+        except RateLimitExceeded as e:
+            logger.warning(f"Skipping {url}: {str(e)}")
+            return False
+
+    def _download(self, url: str, headers: Optional[Dict[str, str]] = None):
+        """Blocking download using the enhanced client (the engine paid for the first attempt)"""
+        try:
+            return self.http_client.get_with_retry(url, max_retries=self.max_retries,
+                                                   rate_limited=False, headers=headers or None)
+        except Exception as e:
+            logger.warning(f"Async fetch failed for {url}: {str(e)}")
+            return None
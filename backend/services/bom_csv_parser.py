@@ -0,0 +1,155 @@
+"""
+BOM Daily Observations CSV Parser
+Version: v1.0 • Updated: 2026-10-16 12:45 AEST (Brisbane)
+
+Single-pass streaming parser for BOM monthly DWO CSV files
+(/climate/dwo/{YYYYMM}/text/{station}.{YYYYMM}.csv).
+
+- One csv.reader over the whole input (text or any iterable of lines,
+  e.g. response.iter_lines(decode_unicode=True)) - no per-line readers
+- Header names are normalised once per file (and memoised across files)
+- Records are yielded as rows are read, so callers can stream them
+- iter_observations() yields typed ObservationRecords directly
+"""
+
+import csv
+import io
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Union
+
+from observation_records import ObservationRecord, FIELD_INDEX, FIELD_CONVERTERS, FIELDS
+
+
+@lru_cache(maxsize=256)
+def normalise_header(header: str) -> str:
+    """
+    Convert a BOM column header into a record key
+
+    e.g. "Minimum temperature (°C)" → "minimum_temperature_c",
+         "9am relative humidity (%)" → "9am_relative_humidity_percent"
+    """
+    return (header
+            .replace('(', '').replace(')', '')
+            .replace('°C', 'c').replace('°', '_degrees')
+            .replace(' ', '_').replace('-', '_')
+            .replace('/', '_').replace('%', 'percent')
+            .lower())
+
+
+def iter_bom_csv(source: Union[str, Iterable[str]], month_key: str) -> Iterator[Dict]:
+    """
+    Stream records from a BOM monthly CSV
+
+    Preamble and footer lines (which start with a quoted note) are skipped;
+    data rows start with an empty first column followed by the date.
+
+    Args:
+        source: CSV text or an iterable of lines
+        month_key: Month in YYYYMM format (added to every record)
+
+    Yields:
+        One dict per day with normalised header keys
+    """
+    lines = io.StringIO(source) if isinstance(source, str) else source
+    reader = csv.reader(lines)
+
+    headers = None
+    for row in reader:
+        if headers is None:
+            # Header row: ,"Date","Minimum temperature (°C)",...
+            if len(row) > 1 and row[0] == '' and row[1] == 'Date':
+                headers = [normalise_header(header) for header in row[1:]]
+                header_count = len(headers)
+            continue
+
+        # Skip blank lines and notes (data rows always start with an empty column)
+        if len(row) < 2 or row[0] != '' or not row[1]:
+            continue
+
+        values = row[1:]
+        if len(values) < header_count:
+            continue
+
+        record = {'month_key': month_key}
+        record.update(zip(headers, values))
+
+        # Normalise non zero-padded dates (e.g. 2025-1-5)
+        date = record.get('date')
+        if date and len(date) != 10:
+            try:
+                record['date'] = datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d")
+            except ValueError:
+                pass
+
+        yield record
+
+
+def parse_bom_csv(source: Union[str, Iterable[str]], month_key: str) -> List[Dict]:
+    """Parse a BOM monthly CSV into a list of records (see iter_bom_csv)"""
+    return list(iter_bom_csv(source, month_key))
+
+
+def iter_observations(source: Union[str, Iterable[str]], month_key: str) -> Iterator[ObservationRecord]:
+    """
+    Stream typed records from a BOM monthly CSV
+
+    Column positions are mapped onto ObservationRecord fields once per file,
+    so each row is converted with a single pass over its values.
+
+    Args:
+        source: CSV text or an iterable of lines
+        month_key: Month in YYYYMM format
+
+    Yields:
+        ObservationRecord per day (missing values are None)
+    """
+    lines = io.StringIO(source) if isinstance(source, str) else source
+    reader = csv.reader(lines)
+
+    field_count = len(FIELDS)
+    month_index = FIELD_INDEX['month_key']
+    date_index = FIELD_INDEX['date']
+    columns = None
+
+    for row in reader:
+        if columns is None:
+            if len(row) > 1 and row[0] == '' and row[1] == 'Date':
+                headers = [normalise_header(header) for header in row[1:]]
+                # (value position, field index or None, header) for each column
+                columns = [(position, FIELD_INDEX.get(header), header)
+                           for position, header in enumerate(headers, start=1)]
+                header_count = len(headers)
+            continue
+
+        if len(row) < 2 or row[0] != '' or not row[1]:
+            continue
+        if len(row) - 1 < header_count:
+            continue
+
+        values = [None] * field_count
+        values[month_index] = month_key
+        extra = None
+
+        for position, field_index, header in columns:
+            raw = row[position]
+            if field_index is None:
+                if extra is None:
+                    extra = {}
+                extra[header] = raw
+            else:
+                values[field_index] = FIELD_CONVERTERS[field_index](raw)
+
+        date = values[date_index]
+        if date and len(date) != 10:
+            try:
+                values[date_index] = datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d")
+            except ValueError:
+                pass
+
+        yield ObservationRecord(values, extra)
+
+
+def parse_observations(source: Union[str, Iterable[str]], month_key: str) -> List[ObservationRecord]:
+    """Parse a BOM monthly CSV into typed records (see iter_observations)"""
+    return list(iter_observations(source, month_key))
@@ -0,0 +1,65 @@
+"""
+BOM Local Storage Helpers
+Version: v1.0 • Updated: 2026-10-16 09:10 AEST (Brisbane)
+
+Shared helpers for the on-disk state kept by the BOM scraping services
+(station directory, CSV store, rate limiter, etc.)
+
+All files live under BOM_DATA_DIR (defaults to services/bom_data) so a
+deployment can point every worker on a node at the same directory.
+"""
+
+import os
+import json
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+
+DEFAULT_DATA_DIR = Path(__file__).parent / "bom_data"
+
+
+def get_data_dir(subdir: Optional[str] = None) -> Path:
+    """
+    Get (and create) the BOM local data directory
+
+    Args:
+        subdir: Optional sub-directory inside the data directory
+
+    Returns:
+        Path to the directory
+    """
+    data_dir = Path(os.environ.get('BOM_DATA_DIR', str(DEFAULT_DATA_DIR)))
+    if subdir:
+        data_dir = data_dir / subdir
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return data_dir
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write a file atomically (temp file + rename) so readers never see partial writes"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def atomic_write_json(path: Path, data: Any) -> None:
+    """Serialise data to JSON and write it atomically"""
+    atomic_write_bytes(path, json.dumps(data, separators=(',', ':'), default=str).encode('utf-8'))
+
+
+def read_json(path: Path, default: Any = None) -> Any:
+    """Read a JSON file, returning default if it is missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
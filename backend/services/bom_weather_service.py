@@ -1,22 +1,53 @@
 """
 BOM Weather Service Wrapper for Fetcha Weather
-Version: v1.0 • Updated: 2025-10-28 19:23 AEST (Brisbane)
+Version: v2.3 • Updated: 2026-10-17 09:10 AEST (Brisbane)
 
 Wraps the SmartHTMLParsingBOMScraper for use with Flask backend
 Provides caching, error handling, and API-friendly response formatting
+Concurrent identical requests are coalesced into a single scrape (single-flight)
+Cached data is held as columnar ObservationBlocks and serialised on the way out
+Range queries are answered from the local observation warehouse (Observation
+table) before going upstream; every scraped month is written back in bulk
+Coordinates are resolved to the nearest stations via the station catalogue
+While BOM is failing (circuit breaker open) the last known data is served
+with a `stale: true` marker instead of waiting on upstream
+Unknown locations and months without a CSV are remembered briefly (negative cache)
+Cache, warehouse, scrape and serialise steps are timed into the request's PhaseTimer
+The cache holds station-month blocks (not whole responses keyed on the date
+list), so any range whose months are resident is assembled without scraping
+A partial hit downloads only the missing months and merges them with the cached ones
+The month cache is backed by a node-wide shared tier (SQLite or Redis), so
+every gunicorn worker reuses months fetched by the others
+Failures caused by BOM (not by the request) carry status_code 503 for the route
+Coordinate lookups report an unbuilt station catalogue (503), not "no station found"
+With the circuit open and no last known data, requests fail fast with 503 (no scrape)
 """
 
+import os
 import sys
+import calendar
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import logging
 
+from flask import has_app_context
+
 # Add current directory to path for local imports
 sys.path.insert(0, str(Path(__file__).parent))
 
 # Import the proven BOM scraper (now copied to services directory)
 from smart_html_parsing_scraper import SmartHTMLParsingBOMScraper
+from single_flight import SingleFlight
+from observation_records import ObservationBlock
+from observation_cache import ObservationCache, month_keys_for, required_month_keys
+from shared_block_store import create_shared_store
+from phase_timer import timed_phase
+
+try:
+    from models.observation import Observation
+except ImportError:  # Used outside the Flask app - no warehouse
+    Observation = None
 
 logger = logging.getLogger(__name__)
 
@@ -24,18 +55,38 @@ logger = logging.getLogger(__name__)
 class BOMWeatherService:
     """Service wrapper for BOM weather data extraction"""
     
-    def __init__(self, cache_enabled: bool = True, cache_ttl_hours: int = 24):
+    def __init__(self, cache_enabled: bool = True, cache_ttl_hours: int = 24,
+                 warehouse_enabled: Optional[bool] = None):
         """
         Initialize BOM Weather Service
         
         Args:
             cache_enabled: Enable response caching
             cache_ttl_hours: Cache time-to-live in hours
+            warehouse_enabled: Serve from / write to the Observation table
         """
-        self.scraper = SmartHTMLParsingBOMScraper()
+        # Shared with the scraper so location resolution and station-month
+        # downloads are coalesced across all concurrent requests
+        self.single_flight = SingleFlight()
+        self.scraper = SmartHTMLParsingBOMScraper(single_flight=self.single_flight)
         self.cache_enabled = cache_enabled
         self.cache_ttl = timedelta(hours=cache_ttl_hours)
-        self.cache = {}  # Simple in-memory cache
+        # Complete station-months; any requested range is assembled from them.
+        # Per-worker L1 in front of the shared L2 all workers on the node use
+        self.cache = ObservationCache(self.cache_ttl.total_seconds(),
+                                      current_month_ttl_seconds=self.scraper.csv_store.current_month_ttl_seconds,
+                                      shared=create_shared_store() if cache_enabled else None)
+        
+        if warehouse_enabled is None:
+            warehouse_enabled = os.environ.get('BOM_WAREHOUSE_ENABLED', 'true').lower() == 'true'
+        self.warehouse_enabled = warehouse_enabled and Observation is not None
+        self.warehouse_hits = 0
+        self.warehouse_misses = 0
+        
+        self.stale_served = 0
+        
+        # Set by prefetch_scheduler.start_prefetch_scheduler when enabled
+        self.prefetch_scheduler = None
         
         logger.info("BOM Weather Service initialized")
         logger.info(f"Cache: {'enabled' if cache_enabled else 'disabled'}")
@@ -68,51 +119,66 @@ class BOMWeatherService:
                     'error': 'No valid dates provided'
                 }
             
-            # Check cache
-            cache_key = f"{location}_{state}_{'_'.join(sorted(target_dates))}"
+            # Cached station-months (the station is known once the location has been resolved)
+            label = f"{location}, {state}"
+            known_station = self.scraper.station_directory.lookup(location, state)
+            known_station_id = known_station['station_id'] if known_station else None
+            if known_station:
+                cached = self._get_cached(known_station_id, label, target_dates)
+                if cached:
+                    return cached
+                
+                # Local observation warehouse (indexed range scan, no scraping)
+                response = self._get_from_warehouse(known_station_id, label, target_dates)
+                if response:
+                    logger.info(f"Warehouse hit: {known_station_id} ({len(target_dates)} dates)")
+                    return self._serialise(response)
+                
+                # Some months already cached - download only the missing ones
+                if not self._upstream_unavailable():
+                    partial = self._get_partial(known_station_id, location, state, label, target_dates)
+                    if partial:
+                        return partial
             
-            if self.cache_enabled and cache_key in self.cache:
-                cached_data, timestamp = self.cache[cache_key]
-                if datetime.now() - timestamp < self.cache_ttl:
-                    logger.info(f"Cache hit: {cache_key}")
-                    return {
-                        **cached_data,
-                        'cached': True,
-                        'cache_timestamp': timestamp.isoformat()
-                    }
+            # BOM is failing - answer from the last known data instead of waiting on it
+            if self._upstream_unavailable():
+                stale = self._get_stale(known_station_id, label, target_dates)
+                if stale:
+                    return stale
+                # Nothing to fall back on, and the circuit would reject every download anyway
+                return self._upstream_unavailable_error(f"{location}, {state}")
             
             # Extract weather data
             logger.info(f"Fetching weather data: {location}, {state} ({len(target_dates)} dates)")
-            result = self.scraper.extract_weather_smart_parsing(location, state, target_dates)
+            # Identical concurrent requests wait for one in-flight extraction
+            # (in-process only - the scraper's leaf flights coordinate across workers)
+            flight_key = ('weather', location.lower().strip(), state.lower().strip(), tuple(target_dates))
+            with timed_phase('scrape'):
+                result = self.single_flight.do(flight_key, self.scraper.extract_weather_smart_parsing,
+                                               location, state, target_dates, worker_lock=False)
+            
+            if result.get('month_records'):
+                self._store_in_warehouse(result['station_id'], result['month_records'])
+                self._cache_months(result['station_id'], result['month_records'], result.get('stale_months'))
             
             if result['success']:
-                # Format response
-                response = {
-                    'success': True,
-                    'location': f"{location}, {state}",
-                    'station_id': result['station_id'],
-                    'data': result['target_records'],
-                    'metadata': {
-                        'requested_dates': len(target_dates),
-                        'records_returned': len(result['target_records']),
-                        'coverage': f"{len(result['target_records'])}/{len(target_dates)}",
-                        'extraction_timestamp': datetime.now().isoformat(),
-                        'data_source': 'Bureau of Meteorology (BOM) Australia',
-                        'method': 'Smart HTML Parsing + Plain Text CSV'
-                    }
-                }
-                
-                # Cache successful response
-                if self.cache_enabled:
-                    self.cache[cache_key] = (response, datetime.now())
-                    logger.info(f"Cached response: {cache_key}")
-                
-                return response
+                # Format response (data kept columnar until serialised)
+                response = self._build_response(label, result['station_id'],
+                                                result['target_records'], target_dates,
+                                                'Smart HTML Parsing + Plain Text CSV')
+                if result.get('stale'):
+                    return self._serialise(self._mark_stale(response, result.get('stale_months')))
+                return self._serialise(response)
             else:
+                stale = self._get_stale(result.get('station_id') or known_station_id, label, target_dates)
+                if stale:
+                    return stale
                 return {
                     'success': False,
                     'error': result.get('error', 'Unknown error'),
-                    'location': f"{location}, {state}"
+                    'location': f"{location}, {state}",
+                    # Upstream trouble is retryable - not the caller's fault
+                    **({'status_code': 503} if result.get('upstream_error') else {})
                 }
                 
         except Exception as e:
@@ -122,6 +188,367 @@ class BOMWeatherService:
                 'error': f"Internal error: {str(e)}"
             }
     
+    def get_weather_data_by_coordinates(self, latitude: float, longitude: float,
+                                        date_from: Optional[str] = None,
+                                        date_to: Optional[str] = None,
+                                        dates: Optional[List[str]] = None,
+                                        max_stations: int = 3,
+                                        max_distance_km: Optional[float] = None) -> Dict:
+        """
+        Get weather data from the nearest BOM station to a point
+        
+        Resolves the nearest stations from the station catalogue's spatial
+        index (no HTTP) and extracts from the closest one that has data,
+        falling back to the next nearest (e.g. for closed stations).
+        
+        Args:
+            latitude: Latitude in decimal degrees (negative south)
+            longitude: Longitude in decimal degrees
+            date_from: Start date (YYYY-MM-DD)
+            date_to: End date (YYYY-MM-DD)
+            dates: Specific dates list (alternative to date_from/date_to)
+            max_stations: Nearest stations to try
+            max_distance_km: Ignore stations further away than this
+            
+        Returns:
+            Dictionary with weather data, metadata and the stations considered
+        """
+        try:
+            target_dates = self._parse_dates(date_from, date_to, dates)
+            
+            if not target_dates:
+                return {
+                    'success': False,
+                    'error': 'No valid dates provided'
+                }
+            
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                return {
+                    'success': False,
+                    'error': 'Invalid coordinates'
+                }
+            
+            if len(self.scraper.station_catalogue) == 0:
+                # A fresh deployment - the request is fine, the service isn't ready for it
+                return {
+                    'success': False,
+                    'error': ('Station catalogue not built - coordinate lookups are unavailable until '
+                              'refresh_station_catalogue.py has been run'),
+                    'status_code': 503
+                }
+            
+            with timed_phase('station_match'):
+                candidates = self.scraper.resolve_nearest_stations(latitude, longitude, k=max_stations,
+                                                                   max_distance_km=max_distance_km)
+            if not candidates:
+                return {
+                    'success': False,
+                    'error': 'No BOM station found near these coordinates'
+                }
+            
+            nearest_stations = [
+                {'station_id': station['station_id'], 'name': station['name'], 'distance_km': station['distance_km']}
+                for station in candidates
+            ]
+            
+            errors = []
+            upstream_failures = 0
+            for station in candidates:
+                station_id = station['station_id']
+                label = f"{station['name']}, {station['state'].title()}"
+                
+                response = self._get_cached(station_id, label, target_dates)
+                if not response:
+                    response = self._get_from_warehouse(station_id, label, target_dates)
+                    if response:
+                        response = self._serialise(response)
+                
+                if not response and not self._upstream_unavailable():
+                    response = self._get_partial(station_id, station['name'], station['state'].title(),
+                                                 label, target_dates)
+                
+                if not response and self._upstream_unavailable():
+                    response = self._get_stale(station_id, label, target_dates)
+                    if not response:
+                        errors.append(f"{station_id}: BOM unavailable")
+                        upstream_failures += 1
+                        continue
+                
+                if not response:
+                    logger.info(f"Fetching weather data: {station_id} ({station['distance_km']} km away)")
+                    with timed_phase('scrape'):
+                        result = self.single_flight.do(('weather', station_id, tuple(target_dates)),
+                                                       self.scraper.extract_weather_for_station,
+                                                       station_id, target_dates, station['name'],
+                                                       station['state'].title(), worker_lock=False)
+                    
+                    if result.get('month_records'):
+                        self._store_in_warehouse(station_id, result['month_records'])
+                        self._cache_months(station_id, result['month_records'], result.get('stale_months'))
+                    
+                    if not result['success']:
+                        errors.append(f"{station_id}: {result.get('error', 'Unknown error')}")
+                        if result.get('upstream_error'):
+                            upstream_failures += 1
+                        response = self._get_stale(station_id, label, target_dates)
+                        if not response:
+                            continue
+                    else:
+                        response = self._build_response(label, station_id, result['target_records'], target_dates,
+                                                        'Smart HTML Parsing + Plain Text CSV')
+                        if result.get('stale'):
+                            response = self._mark_stale(response, result.get('stale_months'))
+                        response = self._serialise(response)
+                
+                return {
+                    **response,
+                    'distance_km': station['distance_km'],
+                    'nearest_stations': nearest_stations
+                }
+            
+            return {
+                'success': False,
+                'error': f"No data from the {len(candidates)} nearest stations ({'; '.join(errors)})",
+                'nearest_stations': nearest_stations,
+                # Every station failed because of BOM - retryable, not the caller's fault
+                **({'status_code': 503} if upstream_failures == len(candidates) else {})
+            }
+                
+        except Exception as e:
+            logger.error(f"Weather data extraction by coordinates failed: {str(e)}")
+            return {
+                'success': False,
+                'error': f"Internal error: {str(e)}"
+            }
+    
+    def _get_cached(self, station_id: str, label: str, target_dates: List[str]) -> Optional[Dict]:
+        """Get a serialised response assembled from cached station-months (None unless all are resident)"""
+        if not self.cache_enabled:
+            return None
+        with timed_phase('response_cache'):
+            cached = self.cache.get_range(station_id, target_dates)
+            if not cached:
+                return None
+            logger.info(f"Cache hit: {station_id} ({len(target_dates)} dates)")
+            response = self._build_response(label, station_id, cached['data'], target_dates, cached['source'])
+            return {
+                **self._serialise(response),
+                'cached': True,
+                'cache_timestamp': cached['cached_at'].isoformat()
+            }
+    
+    def _upstream_unavailable_error(self, label: str) -> Dict:
+        """Failure for a request that can't be answered while BOM is down"""
+        circuit_breaker = getattr(self.scraper.http_client, 'circuit_breaker', None)
+        retry_after = round(circuit_breaker.retry_after()) if circuit_breaker else 0
+        error = "BOM is temporarily unavailable and no stored data covers this request"
+        if retry_after:
+            error += f" - retry in about {retry_after}s"
+        return {
+            'success': False,
+            'error': error,
+            'location': label,
+            'status_code': 503
+        }
+    
+    def _upstream_unavailable(self) -> bool:
+        """True while the HTTP client's circuit breaker is refusing BOM requests"""
+        circuit_breaker = getattr(self.scraper.http_client, 'circuit_breaker', None)
+        return circuit_breaker is not None and circuit_breaker.is_open()
+    
+    def _get_stale(self, station_id: Optional[str], label: str,
+                   target_dates: List[str]) -> Optional[Dict]:
+        """
+        Last known data for a request, marked stale: true (None if there is none)
+        
+        Tries cached station-months regardless of expiry, then whatever the
+        warehouse holds for the station regardless of age or coverage.
+        """
+        cached = self.cache.get_range(station_id, target_dates, allow_expired=True) \
+            if station_id and self.cache_enabled else None
+        if cached:
+            logger.info(f"Serving stale cached months: {station_id}")
+            self.stale_served += 1
+            response = self._build_response(label, station_id, cached['data'], target_dates, cached['source'])
+            return {
+                **self._serialise(self._mark_stale(response)),
+                'cached': True,
+                'cache_timestamp': cached['cached_at'].isoformat()
+            }
+        
+        if station_id and self.warehouse_enabled and has_app_context():
+            records_by_date = Observation.get_records(station_id, target_dates)['records']
+            if records_by_date:
+                logger.info(f"Serving stale warehouse data: {station_id} ({len(records_by_date)} dates)")
+                self.stale_served += 1
+                records = [records_by_date[date] for date in sorted(records_by_date)]
+                response = self._build_response(label, station_id, records, target_dates, 'Local observation warehouse')
+                return self._serialise(self._mark_stale(response))
+        
+        return None
+    
+    @staticmethod
+    def _mark_stale(response: Dict, stale_months: Optional[List[str]] = None) -> Dict:
+        """Copy of a response flagged as last known data (BOM could not be reached)"""
+        metadata = {**response['metadata'], 'stale_reason': 'BOM unavailable - serving last known data'}
+        if stale_months:
+            metadata['stale_months'] = stale_months
+        return {**response, 'stale': True, 'metadata': metadata}
+    
+    def _get_partial(self, station_id: str, location: str, state: str, label: str,
+                     target_dates: List[str]) -> Optional[Dict]:
+        """
+        Assemble a range from cached months, downloading only the months that are missing
+        
+        A rolling window (e.g. the last 30 days, requested daily) sends at most
+        one month upstream. Returns None when no month is cached or the
+        merged range has no records.
+        """
+        if not self.cache_enabled:
+            return None
+        
+        required = required_month_keys(target_dates)
+        with timed_phase('response_cache'):
+            resident = self.cache.get_months(station_id, required)
+        if not resident:
+            return None
+        
+        missing_months = [month_key for month_key in required if month_key not in resident]
+        missing = set(missing_months)
+        missing_dates = [date for date in target_dates if date[:7].replace('-', '') in missing]
+        self.cache.record_partial_hit()
+        logger.info(f"Partial cache hit: {station_id} ({len(resident)} months cached, "
+                    f"fetching {', '.join(missing_months)})")
+        
+        with timed_phase('scrape'):
+            result = self.single_flight.do(('weather', station_id, tuple(missing_dates)),
+                                           self.scraper.extract_weather_for_station,
+                                           station_id, missing_dates, location, state, worker_lock=False)
+        
+        month_records = result.get('month_records') or {}
+        fetched = {month_key: ObservationBlock.from_records(records, station_id, month_key)
+                   for month_key, records in month_records.items()}
+        if month_records:
+            self._store_in_warehouse(station_id, month_records)
+            self._cache_months(station_id, fetched, result.get('stale_months'))
+        
+        # Merge in date order - every block is one month
+        blocks = {month_key: entry['block'] for month_key, entry in resident.items()}
+        blocks.update(fetched)
+        data = ObservationBlock.concat([blocks[month_key] for month_key in sorted(blocks)],
+                                       dates=target_dates, station_id=station_id)
+        if not len(data):
+            return None
+        
+        response = self._build_response(label, station_id, data, target_dates,
+                                        'Cached months + Smart HTML Parsing + Plain Text CSV')
+        response['metadata'].update(months_cached=sorted(resident), months_fetched=sorted(fetched))
+        if result.get('stale'):
+            response = self._mark_stale(response, result.get('stale_months'))
+        return self._serialise(response)
+    
+    def _cache_months(self, station_id: str, month_records: Dict, skip_months: Optional[List[str]] = None,
+                      source: str = 'Smart HTML Parsing + Plain Text CSV') -> None:
+        """Cache complete parsed months - record lists or blocks (stale copies served during an outage are not cached)"""
+        if not self.cache_enabled:
+            return
+        for month_key, records in month_records.items():
+            if skip_months and month_key in skip_months:
+                continue
+            self.cache.put(station_id, month_key, records,
+                           closed=self.scraper.csv_store.is_closed_month(month_key), source=source)
+        logger.info(f"Cached {len(month_records)} months: {station_id}")
+    
+    @staticmethod
+    def _build_response(label: str, station_id: str, records, target_dates: List[str], method: str) -> Dict:
+        """Format a successful response from records or a block (data kept columnar until serialised)"""
+        return {
+            'success': True,
+            'location': label,
+            'station_id': station_id,
+            'data': records if isinstance(records, ObservationBlock) else ObservationBlock.from_records(records, station_id),
+            'metadata': {
+                'requested_dates': len(target_dates),
+                'records_returned': len(records),
+                'coverage': f"{len(records)}/{len(target_dates)}",
+                'extraction_timestamp': datetime.now().isoformat(),
+                'data_source': 'Bureau of Meteorology (BOM) Australia',
+                'method': method
+            }
+        }
+    
+    def _get_from_warehouse(self, station_id: str, label: str, target_dates: List[str]) -> Optional[Dict]:
+        """
+        Build a response from the Observation table if it covers every requested date
+        
+        Future dates, and dates missing from a month stored complete, cannot
+        be found upstream either, so they are not required for coverage.
+        """
+        if not self.warehouse_enabled or not has_app_context():
+            return None
+        
+        today = datetime.now().strftime("%Y-%m-%d")
+        required_dates = [date for date in target_dates if date <= today]
+        if not required_dates:
+            return None
+        
+        # Rows from a still-changing month are only trusted for the CSV store's TTL.
+        # Whole months are read (same range scan, a few more rows) so final ones can be cached.
+        fresh_after = datetime.utcnow() - timedelta(seconds=self.scraper.csv_store.current_month_ttl_seconds)
+        with timed_phase('warehouse_read'):
+            stored = Observation.get_records(station_id, self._month_dates(target_dates), fresh_after=fresh_after)
+        records_by_date = stored['records']
+        final_months = stored['final_months']
+        
+        if any(date not in records_by_date and date[:7].replace('-', '') not in final_months
+               for date in required_dates):
+            self.warehouse_misses += 1
+            return None
+        
+        records = [records_by_date[date] for date in sorted(target_dates) if date in records_by_date]
+        if not records:
+            return None
+        
+        self.warehouse_hits += 1
+        
+        # Closed months are stored complete - cache them for later sub-range and overlapping queries
+        cached_months = {month_key: [] for month_key in month_keys_for(target_dates) if month_key in final_months}
+        for date in sorted(records_by_date):
+            month_records = cached_months.get(date[:7].replace('-', ''))
+            if month_records is not None:
+                month_records.append(records_by_date[date])
+        self._cache_months(station_id, cached_months, source='Local observation warehouse')
+        
+        return self._build_response(label, station_id, records, target_dates, 'Local observation warehouse')
+    
+    @staticmethod
+    def _month_dates(target_dates: List[str]) -> List[str]:
+        """Every date of every month the target dates fall in"""
+        month_dates = []
+        for month_key in month_keys_for(target_dates):
+            year, month = int(month_key[:4]), int(month_key[4:])
+            days = calendar.monthrange(year, month)[1]
+            month_dates.extend(f"{year:04d}-{month:02d}-{day:02d}" for day in range(1, days + 1))
+        return month_dates
+    
+    def _store_in_warehouse(self, station_id: str, month_records: Dict) -> None:
+        """Bulk write every parsed month to the Observation table"""
+        if not self.warehouse_enabled or not has_app_context():
+            return
+        
+        with timed_phase('warehouse_write'):
+            for month_key, records in month_records.items():
+                is_final = self.scraper.csv_store.is_closed_month(month_key)
+                result = Observation.upsert_records(station_id, records, is_final=is_final)
+                if not result['success']:
+                    logger.warning(f"Warehouse write failed for {station_id} {month_key}: {result['error']}")
+    
+    @staticmethod
+    def _serialise(response: Dict) -> Dict:
+        """Convert a cached response's columnar data block into JSON-ready rows"""
+        with timed_phase('serialise'):
+            return {**response, 'data': response['data'].to_dicts()}
+    
     def get_available_states(self) -> List[Dict]:
         """Get list of available states"""
         states = [
@@ -136,26 +563,60 @@ class BOMWeatherService:
         ]
         return states
     
-    def clear_cache(self):
-        """Clear the response cache"""
-        cache_size = len(self.cache)
-        self.cache.clear()
-        logger.info(f"Cache cleared ({cache_size} entries)")
-        return {'success': True, 'entries_cleared': cache_size}
+    def clear_cache(self, scope: str = 'all'):
+        """
+        Clear cached results
+        
+        Args:
+            scope: 'responses' (month cache, shared tier included - every worker
+                drops its copy), 'negative' (not-found results) or 'all'
+        """
+        if scope not in ('all', 'responses', 'negative'):
+            return {'success': False, 'error': f"Unknown cache scope: {scope}"}
+        
+        cache_size = 0
+        if scope in ('all', 'responses'):
+            cache_size = self.cache.clear()
+        negative_cleared = self.scraper.negative_cache.clear() if scope in ('all', 'negative') else 0
+        
+        logger.info(f"Cache cleared ({cache_size} entries, {negative_cleared} negative entries)")
+        return {'success': True, 'entries_cleared': cache_size, 'negative_entries_cleared': negative_cleared}
+    
+    def get_negative_cache(self) -> Dict:
+        """List live negative cache entries"""
+        return {
+            'success': True,
+            'stats': self.scraper.negative_cache.get_stats(),
+            'entries': self.scraper.negative_cache.list_entries()
+        }
     
     def get_cache_stats(self) -> Dict:
         """Get cache statistics"""
-        now = datetime.now()
-        valid_entries = sum(1 for _, (_, timestamp) in self.cache.items() 
-                           if now - timestamp < self.cache_ttl)
-        
-        return {
+        stats = {
             'enabled': self.cache_enabled,
             'ttl_hours': self.cache_ttl.total_seconds() / 3600,
-            'total_entries': len(self.cache),
-            'valid_entries': valid_entries,
-            'expired_entries': len(self.cache) - valid_entries
+            'current_month_ttl_minutes': self.cache.current_month_ttl_seconds / 60,
+            **self.cache.get_stats(),
+            'warehouse': {
+                'enabled': self.warehouse_enabled,
+                'hits': self.warehouse_hits,
+                'misses': self.warehouse_misses
+            },
+            'archive': self.scraper.archive.get_stats(),
+            'station_catalogue': self.scraper.station_catalogue.get_stats(),
+            'negative': self.scraper.negative_cache.get_stats(),
+            'prefetch': self.prefetch_scheduler.get_stats() if self.prefetch_scheduler else {'enabled': False},
+            'upstream': {
+                'circuit_breaker': (self.scraper.http_client.circuit_breaker.get_stats()
+                                    if getattr(self.scraper.http_client, 'circuit_breaker', None) else None),
+                'stale_served': self.stale_served
+            }
         }
+        
+        if self.warehouse_enabled and has_app_context():
+            stats['warehouse'].update(Observation.get_stats())
+        
+        return stats
     
     def _parse_dates(self, date_from: Optional[str], date_to: Optional[str],
                     dates: Optional[List[str]]) -> List[str]:
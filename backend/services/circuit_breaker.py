@@ -0,0 +1,145 @@
+"""
+Upstream Circuit Breaker
+Version: v1.0 • Updated: 2026-10-16 18:10 AEST (Brisbane)
+
+Stops sending requests to BOM while it is failing, so requests fail fast
+(and are answered from stale local data) instead of each one walking the
+full retry ladder during an outage.
+
+- closed:    requests flow; consecutive upstream failures are counted
+- open:      after `failure_threshold` consecutive failures, requests are
+             refused for `reset_timeout_seconds`
+- half_open: one probe request is let through; success closes the
+             circuit, failure opens it again for another timeout
+
+Failures are 403/429/5xx responses, timeouts and connection errors. Other
+responses (including 404) show BOM is up and count as successes.
+State is per process; each gunicorn worker trips its own breaker.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Thread-safe consecutive-failure circuit breaker"""
+
+    def __init__(self, name: str = 'bom', failure_threshold: Optional[int] = None,
+                 reset_timeout_seconds: Optional[float] = None):
+        """
+        Initialize the circuit breaker
+
+        Args:
+            name: Name used in logs and stats
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout_seconds: How long the circuit stays open before a probe
+        """
+        if failure_threshold is None:
+            failure_threshold = int(os.environ.get('BOM_CIRCUIT_FAILURE_THRESHOLD', '5'))
+        if reset_timeout_seconds is None:
+            reset_timeout_seconds = float(os.environ.get('BOM_CIRCUIT_RESET_SECONDS', '60'))
+
+        self.name = name
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout_seconds = reset_timeout_seconds
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._advance()
+            return self._state
+
+    def is_open(self) -> bool:
+        """True while every request is refused (False once a half-open probe may go ahead)"""
+        return self.state == OPEN
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe is allowed (0 when closed)"""
+        with self._lock:
+            if self._state == CLOSED:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout_seconds - time.monotonic())
+
+    def allow_request(self) -> bool:
+        """
+        Ask to send a request upstream
+
+        Returns:
+            True if the request may go ahead (the caller must then call
+            record_success, record_failure or release), False if refused
+        """
+        with self._lock:
+            self._advance()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                logger.info(f"Circuit '{self.name}' half-open: probing upstream")
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """Upstream answered - close the circuit"""
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed: upstream recovered")
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Upstream failed - open the circuit once the threshold is reached"""
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state == CLOSED:
+                    self.times_opened += 1
+                    logger.warning(f"Circuit '{self.name}' opened after {self._failures} consecutive failures")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release(self) -> None:
+        """An allowed request was not sent after all (e.g. no rate limit token)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def get_stats(self) -> Dict:
+        """Get breaker state and counters"""
+        with self._lock:
+            self._advance()
+            return {
+                'name': self.name,
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout_seconds': self.reset_timeout_seconds,
+                'retry_after_seconds': round(max(0.0, self._opened_at + self.reset_timeout_seconds
+                                                 - time.monotonic()), 1) if self._state != CLOSED else 0.0,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected
+            }
+
+    def _advance(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
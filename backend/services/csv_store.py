@@ -0,0 +1,231 @@
+"""
+BOM Monthly CSV Store
+Version: v1.0 • Updated: 2026-10-16 10:05 AEST (Brisbane)
+
+Disk-backed, content-addressed store for BOM monthly DWO CSV files.
+
+Layout under BOM_DATA_DIR/csv_store:
+- objects/ab/<sha256>.csv      CSV bodies, named by their SHA-256 hash
+- entries/<station>/<YYYYMM>.json   Metadata pointing at an object
+
+Closed months never change on BOM, so once a month has been fetched after
+it closed it is treated as immutable and never refetched. Only the current
+(or just-closed) month is revalidated after a short TTL, using the recorded
+ETag / Last-Modified headers so an unchanged month costs a 304 response only.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from bom_storage import get_data_dir, atomic_write_bytes, atomic_write_json, read_json
+
+logger = logging.getLogger(__name__)
+
+
+class MonthlyCSVStore:
+    """Content-addressed on-disk cache of monthly BOM CSV files keyed by (station_id, YYYYMM)"""
+
+    def __init__(self, root: Optional[Path] = None,
+                 current_month_ttl_minutes: Optional[float] = None,
+                 closed_month_grace_days: Optional[int] = None):
+        """
+        Initialize the CSV store
+
+        Args:
+            root: Store directory (defaults to BOM_DATA_DIR/csv_store)
+            current_month_ttl_minutes: How long a still-changing month is served before revalidation
+            closed_month_grace_days: Days after month end before the month is treated as final
+                                     (BOM publishes the last day's observations the next day)
+        """
+        self.root = Path(root) if root else get_data_dir("csv_store")
+        if current_month_ttl_minutes is None:
+            current_month_ttl_minutes = float(os.environ.get('BOM_CSV_CURRENT_MONTH_TTL_MINUTES', '60'))
+        if closed_month_grace_days is None:
+            closed_month_grace_days = int(os.environ.get('BOM_CSV_CLOSED_MONTH_GRACE_DAYS', '2'))
+        self.current_month_ttl_seconds = current_month_ttl_minutes * 60
+        self.closed_month_grace = timedelta(days=closed_month_grace_days)
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.integrity_failures = 0
+        self.revalidations = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, station_id: str, month_key: str) -> Optional[Dict]:
+        """
+        Get a stored month
+
+        Args:
+            station_id: BOM station ID (e.g., "IDCJDW3050")
+            month_key: Month in YYYYMM format
+
+        Returns:
+            Entry dict with 'content', 'sha256', 'fetched_at', 'validated_at',
+            'immutable' and 'fresh' keys, or None if not stored / corrupt
+        """
+        entry = read_json(self._entry_path(station_id, month_key))
+        if not entry or 'sha256' not in entry:
+            self._count('misses')
+            return None
+
+        content = self._read_object(entry['sha256'])
+        if content is None:
+            logger.warning(f"CSV store integrity check failed for {station_id} {month_key}; discarding entry")
+            self._count('integrity_failures')
+            self.delete(station_id, month_key)
+            self._count('misses')
+            return None
+
+        entry['content'] = content
+        entry['immutable'] = self.is_final(month_key, entry.get('fetched_at', 0))
+        entry['fresh'] = entry['immutable'] or (
+            time.time() - entry.get('validated_at', 0) < self.current_month_ttl_seconds
+        )
+        self._count('hits')
+        return entry
+
+    def put(self, station_id: str, month_key: str, content: str, **metadata) -> Dict:
+        """
+        Store a downloaded month
+
+        Args:
+            station_id: BOM station ID
+            month_key: Month in YYYYMM format
+            content: CSV body as text
+            **metadata: Extra fields to keep on the entry
+
+        Returns:
+            Stored entry metadata (without content)
+        """
+        data = content.encode('utf-8')
+        sha256 = hashlib.sha256(data).hexdigest()
+
+        object_path = self._object_path(sha256)
+        if not object_path.exists():
+            atomic_write_bytes(object_path, data)
+
+        now = time.time()
+        entry = {
+            'station_id': station_id,
+            'month_key': month_key,
+            'sha256': sha256,
+            'size': len(data),
+            'fetched_at': now,
+            'validated_at': now,
+            **metadata
+        }
+        atomic_write_json(self._entry_path(station_id, month_key), entry)
+        return entry
+
+    def mark_validated(self, station_id: str, month_key: str,
+                       etag: Optional[str] = None, last_modified: Optional[str] = None) -> bool:
+        """
+        Extend an entry's freshness after BOM confirmed it is unchanged (HTTP 304)
+
+        Returns:
+            True if the entry existed and was updated
+        """
+        entry_path = self._entry_path(station_id, month_key)
+        entry = read_json(entry_path)
+        if not entry:
+            return False
+
+        now = time.time()
+        entry['validated_at'] = now
+        if self._month_final_time(month_key) <= datetime.fromtimestamp(now):
+            # Content confirmed unchanged after the month closed - it is now final
+            entry['fetched_at'] = now
+        if etag:
+            entry['etag'] = etag
+        if last_modified:
+            entry['last_modified'] = last_modified
+        atomic_write_json(entry_path, entry)
+        self._count('revalidations')
+        return True
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for revalidating an entry"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def delete(self, station_id: str, month_key: str) -> bool:
+        """Remove an entry (objects are left for other entries sharing the same content)"""
+        try:
+            self._entry_path(station_id, month_key).unlink()
+            return True
+        except OSError:
+            return False
+
+    def is_closed_month(self, month_key: str, now: Optional[datetime] = None) -> bool:
+        """Check whether a month (YYYYMM) is past its end plus the grace period"""
+        now = now or datetime.now()
+        return now >= self._month_final_time(month_key)
+
+    def is_final(self, month_key: str, fetched_at: float) -> bool:
+        """Check whether content fetched at fetched_at covers the whole, closed month"""
+        return datetime.fromtimestamp(fetched_at) >= self._month_final_time(month_key)
+
+    def get_stats(self) -> Dict:
+        """Get store statistics"""
+        entries_dir = self.root / "entries"
+        objects_dir = self.root / "objects"
+        entry_count = sum(1 for _ in entries_dir.glob("*/*.json")) if entries_dir.exists() else 0
+        object_sizes = [p.stat().st_size for p in objects_dir.glob("*/*.csv")] if objects_dir.exists() else []
+        lookups = self.hits + self.misses
+        return {
+            'path': str(self.root),
+            'entries': entry_count,
+            'objects': len(object_sizes),
+            'bytes': sum(object_sizes),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': (self.hits / lookups) if lookups else 0,
+            'integrity_failures': self.integrity_failures,
+            'revalidations': self.revalidations,
+            'current_month_ttl_minutes': self.current_month_ttl_seconds / 60
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _month_final_time(self, month_key: str) -> datetime:
+        year, month = int(month_key[:4]), int(month_key[4:6])
+        next_month = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+        return next_month + self.closed_month_grace
+
+    def _entry_path(self, station_id: str, month_key: str) -> Path:
+        return self.root / "entries" / station_id / f"{month_key}.json"
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[:2] / f"{sha256}.csv"
+
+    def _read_object(self, sha256: str) -> Optional[str]:
+        """Read an object and verify its content hash"""
+        try:
+            data = self._object_path(sha256).read_bytes()
+        except OSError:
+            return None
+        if hashlib.sha256(data).hexdigest() != sha256:
+            return None
+        return data.decode('utf-8')
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
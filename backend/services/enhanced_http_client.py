@@ -1,46 +1,95 @@
 #!/usr/bin/env python3
 """
 Enhanced HTTP Client for BOM Scraping
-Version: v1.0 • Updated: 2025-09-16 10:30 AEST (Brisbane)
+Version: v1.6 • Updated: 2026-10-16 22:20 AEST (Brisbane)
+Added rate_limited flag so the async fetch engine can apply its own budget
+Replaced per-instance jitter sleep with a shared SQLite token bucket
+Added per-request headers for conditional GET revalidation
+Thread-safe for threaded workers: sized keep-alive pool, locked counters,
+User-Agent sent per request instead of mutating the shared session
+Added circuit breaker - requests fail fast while BOM is down; urllib3 no
+longer retries statuses underneath get_with_retry's own retry ladder
+Callers can ask for 404 responses back (not_found_ok) to cache the miss
+Retries always draw from the rate limit, even when the caller paid for the first attempt
+Rate limit waits are recorded as the request's rate_limit_wait phase
 
 🔧 ENHANCED HTTP CLIENT 🔧
 Provides robust HTTP requests with:
 - Comprehensive browser headers
-- Session management
+- Session management (one keep-alive connection pool shared by all threads)
 - Retry logic with exponential backoff
 - Error handling for 403 Forbidden responses
-- Rate limiting compliance
+- Rate limiting compliance (shared token bucket across threads and workers)
 """
 
+import os
 import requests
 import time
 import random
 import logging
+import threading
 from typing import Optional, Dict, Any
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from rate_limiter import TokenBucketRateLimiter, RateLimitExceeded
+from circuit_breaker import CircuitBreaker
+from phase_timer import record_phase
+
 logger = logging.getLogger(__name__)
 
+USER_AGENTS = [
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/119.0',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36'
+]
+
 class EnhancedBOMHTTPClient:
     """Enhanced HTTP client specifically designed for BOM website scraping"""
     
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[TokenBucketRateLimiter] = None, rate_limit_blocking: bool = True,
+                 pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
+        """
+        Initialize the HTTP client
+        
+        Safe to share between threads: the session is never mutated after
+        setup, per-request state (User-Agent, conditional headers) is passed
+        with each request and counters are updated under a lock.
+        
+        Args:
+            rate_limiter: Shared token bucket (defaults to the node-wide BOM bucket)
+            rate_limit_blocking: Wait for a token (True) or fail fast with RateLimitExceeded (False)
+            pool_connections: Number of hosts to keep connection pools for
+            pool_maxsize: Keep-alive connections kept per host (concurrent requests beyond
+                          this still run, but their connections are not reused)
+            circuit_breaker: Breaker guarding upstream calls (defaults to a new BOM breaker)
+        """
+        self.pool_connections = pool_connections or int(os.environ.get('BOM_HTTP_POOL_CONNECTIONS', '4'))
+        self.pool_maxsize = pool_maxsize or int(os.environ.get('BOM_HTTP_POOL_MAXSIZE', '16'))
+        
+        self._lock = threading.Lock()
+        self.user_agent = USER_AGENTS[0]
         self.session = requests.Session()
         self.setup_session()
         self.request_count = 0
         self.last_request_time = 0
         
-        # Rate limiting: minimum delay between requests
-        self.min_delay_seconds = 2.0
-        self.max_delay_seconds = 5.0
+        # Rate limiting: token bucket shared by every thread and worker on this node
+        self.rate_limiter = rate_limiter or TokenBucketRateLimiter()
+        self.rate_limit_blocking = rate_limit_blocking
+        
+        # Fail fast while BOM is down instead of walking the retry ladder for every request
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
         
     def setup_session(self):
         """Configure session with comprehensive headers and retry strategy"""
         
         # Comprehensive browser headers to avoid detection
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
+            'User-Agent': self.user_agent,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
             'Accept-Language': 'en-AU,en-GB;q=0.9,en-US;q=0.8,en;q=0.7',
             'Accept-Encoding': 'gzip, deflate, br',
@@ -56,27 +105,35 @@ class EnhancedBOMHTTPClient:
             'sec-ch-ua-platform': '"macOS"'
         })
         
-        # Configure retry strategy
+        # Transport-level retry for connection setup only - status codes and read
+        # timeouts are handled once, by get_with_retry and the circuit breaker
         retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
+            total=1,
+            connect=1,
+            read=0,
+            status=0,
+            backoff_factor=0.5,
             allowed_methods=["HEAD", "GET", "OPTIONS"]
         )
         
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # Keep-alive pool shared by every thread using this client
+        adapter = HTTPAdapter(max_retries=retry_strategy,
+                              pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize)
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
         
-        print("🔧 Enhanced HTTP client configured with comprehensive headers")
+        print(f"🔧 Enhanced HTTP client configured with comprehensive headers "
+              f"(pool: {self.pool_maxsize} connections per host)")
         
-    def get(self, url: str, timeout: int = 30, **kwargs) -> requests.Response:
+    def get(self, url: str, timeout: int = 30, rate_limited: bool = True, **kwargs) -> requests.Response:
         """
         Make GET request with rate limiting and enhanced error handling
         
         Args:
             url: URL to request
             timeout: Request timeout in seconds
+            rate_limited: Apply the client's rate limit (callers with their own budget pass False)
             **kwargs: Additional arguments for requests.get
             
         Returns:
@@ -85,22 +142,25 @@ class EnhancedBOMHTTPClient:
         Raises:
             requests.exceptions.HTTPError: For HTTP errors (including 403)
             requests.exceptions.RequestException: For other request errors
+            RateLimitExceeded: If the rate limit budget is exhausted and the client fails fast
         """
         
         # Rate limiting
-        self._enforce_rate_limit()
+        if rate_limited:
+            self._enforce_rate_limit()
         
         try:
             print(f"🌐 Making HTTP request to: {url}")
             
-            # Make the request
-            response = self.session.get(url, timeout=timeout, **kwargs)
+            # Make the request (User-Agent per request - the shared session is never mutated)
+            headers = {'User-Agent': self.user_agent, **(kwargs.pop('headers', None) or {})}
+            response = self.session.get(url, timeout=timeout, headers=headers, **kwargs)
             
             # Handle different status codes explicitly
             if response.status_code == 403:
                 print(f"🚫 HTTP 403 Forbidden - BOM is blocking this request")
                 print(f"   URL: {url}")
-                print(f"   Headers sent: {dict(self.session.headers)}")
+                print(f"   Headers sent: {dict(response.request.headers)}")
                 raise requests.exceptions.HTTPError(
                     f"403 Forbidden: BOM server is blocking requests to {url}. "
                     f"This may indicate bot detection or rate limiting."
@@ -116,9 +176,13 @@ class EnhancedBOMHTTPClient:
                 print(f"❌ HTTP {response.status_code} error for {url}")
                 response.raise_for_status()
             
-            print(f"✅ HTTP {response.status_code} - Downloaded {len(response.text)} characters")
+            if response.status_code == 304:
+                print(f"✅ HTTP 304 - Not modified since last download")
+            else:
+                print(f"✅ HTTP {response.status_code} - Downloaded {len(response.text)} characters")
             
-            self.request_count += 1
+            with self._lock:
+                self.request_count += 1
             return response
             
         except requests.exceptions.ConnectTimeout:
@@ -147,7 +211,9 @@ class EnhancedBOMHTTPClient:
             print(f"💥 Unexpected error: {str(e)}")
             raise requests.exceptions.RequestException(f"Unexpected error: {str(e)}")
     
-    def get_with_retry(self, url: str, max_retries: int = 3, base_delay: float = 1.0) -> Optional[requests.Response]:
+    def get_with_retry(self, url: str, max_retries: int = 3, base_delay: float = 1.0,
+                       rate_limited: bool = True, headers: Optional[Dict[str, str]] = None,
+                       not_found_ok: bool = False) -> Optional[requests.Response]:
         """
         Make GET request with custom retry logic for 403 errors
         
@@ -155,17 +221,42 @@ class EnhancedBOMHTTPClient:
             url: URL to request
             max_retries: Maximum number of retry attempts
             base_delay: Base delay between retries (will be increased exponentially)
+            rate_limited: Apply the client's rate limit to the first attempt (callers that
+                          already took a token pass False); retries are always rate limited
+            headers: Extra request headers (e.g. If-None-Match for revalidation)
+            not_found_ok: Return a 404 response instead of None (so callers can tell "not there" from "failed")
             
         Returns:
-            Response object if successful, None if all retries failed
+            Response object if successful (including 304 Not Modified), None if all
+            retries failed or the circuit breaker is open
+            
+        Raises:
+            RateLimitExceeded: If the rate limit budget is exhausted and the client fails fast
         """
         
         for attempt in range(max_retries + 1):
+            # Checked before every attempt so a ladder stops as soon as the circuit opens
+            if not self.circuit_breaker.allow_request():
+                print(f"🔌 Circuit open - not requesting {url} "
+                      f"(next probe in {self.circuit_breaker.retry_after():.0f}s)")
+                return None
+            
             try:
-                response = self.get(url)
+                response = self.get(url, rate_limited=rate_limited or attempt > 0, headers=headers)
+                self.circuit_breaker.record_success()
                 return response
                 
+            except RateLimitExceeded:
+                self.circuit_breaker.release()
+                raise
+                
             except requests.exceptions.HTTPError as e:
+                if self._is_upstream_failure(e):
+                    self.circuit_breaker.record_failure()
+                else:
+                    # BOM answered (e.g. 404 for a month it doesn't publish) - it is up
+                    self.circuit_breaker.record_success()
+                
                 if "403 Forbidden" in str(e):
                     if attempt < max_retries:
                         delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
@@ -179,11 +270,15 @@ class EnhancedBOMHTTPClient:
                         print(f"❌ All {max_retries} retries failed for 403 Forbidden")
                         return None
                 else:
+                    if not_found_ok and getattr(e.response, 'status_code', None) == 404:
+                        return e.response
+                    
                     # Non-403 HTTP errors - don't retry
                     print(f"❌ HTTP error (non-403): {str(e)}")
                     return None
                     
             except requests.exceptions.RequestException as e:
+                self.circuit_breaker.record_failure()
                 if attempt < max_retries:
                     delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
                     print(f"🔄 Retry {attempt + 1}/{max_retries} after {delay:.1f}s delay for: {str(e)}")
@@ -195,51 +290,51 @@ class EnhancedBOMHTTPClient:
         
         return None
     
+    @staticmethod
+    def _is_upstream_failure(error: requests.exceptions.HTTPError) -> bool:
+        """403/429/5xx mean BOM is blocking or failing (other 4xx are normal answers)"""
+        
+        status_code = getattr(error.response, 'status_code', None)
+        if status_code is not None:
+            return status_code in (403, 429) or status_code >= 500
+        return str(error).startswith(('403', '429'))
+    
     def _enforce_rate_limit(self):
-        """Enforce rate limiting between requests"""
+        """Take a token from the shared rate limit bucket (waits only when the bucket is empty)"""
         
-        current_time = time.time()
+        waited = self.rate_limiter.acquire(blocking=self.rate_limit_blocking)
+        record_phase('rate_limit_wait', waited)
         
-        if self.last_request_time > 0:
-            time_since_last = current_time - self.last_request_time
-            min_delay = self.min_delay_seconds
-            
-            # Add random jitter to avoid predictable patterns
-            actual_delay = min_delay + random.uniform(0, self.max_delay_seconds - min_delay)
-            
-            if time_since_last < actual_delay:
-                sleep_time = actual_delay - time_since_last
-                print(f"⏱️ Rate limiting: waiting {sleep_time:.1f}s...")
-                time.sleep(sleep_time)
+        if waited > 0.05:
+            print(f"⏱️ Rate limiting: waited {waited:.1f}s for shared budget")
         
-        self.last_request_time = time.time()
+        with self._lock:
+            self.last_request_time = time.time()
     
     def _rotate_user_agent(self):
         """Rotate User-Agent header to avoid detection"""
         
-        user_agents = [
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/119.0',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36'
-        ]
-        
-        new_user_agent = random.choice(user_agents)
-        self.session.headers['User-Agent'] = new_user_agent
+        # A single attribute swap - requests already in flight keep the header they were built with
+        new_user_agent = random.choice(USER_AGENTS)
+        self.user_agent = new_user_agent
         print(f"🔄 Rotated User-Agent: {new_user_agent[:50]}...")
     
     def get_session_info(self) -> Dict[str, Any]:
         """Get information about the current session"""
         
+        with self._lock:
+            request_count, last_request_time = self.request_count, self.last_request_time
+        
         return {
-            'request_count': self.request_count,
-            'headers': dict(self.session.headers),
-            'last_request_time': self.last_request_time,
-            'rate_limiting': {
-                'min_delay_seconds': self.min_delay_seconds,
-                'max_delay_seconds': self.max_delay_seconds
-            }
+            'request_count': request_count,
+            'headers': {**self.session.headers, 'User-Agent': self.user_agent},
+            'last_request_time': last_request_time,
+            'pool': {
+                'pool_connections': self.pool_connections,
+                'pool_maxsize': self.pool_maxsize
+            },
+            'rate_limiting': self.rate_limiter.get_stats(),
+            'circuit_breaker': self.circuit_breaker.get_stats()
         }
 
 def test_enhanced_http_client():
@@ -0,0 +1,88 @@
+"""
+BOM HTML Link Extraction
+Version: v1.0 • Updated: 2026-10-16 17:10 AEST (Brisbane)
+
+Fast anchor-only extraction for the DWO state and letter group pages.
+
+Those pages are only ever read for their <a href> elements, so building a
+full BeautifulSoup tree (every tag, attribute and text node) is wasted work.
+
+- With lxml installed, anchors are pulled from libxml2's C parser
+- Otherwise a streaming html.parser.HTMLParser subclass keeps just the
+  href and text of each anchor - no tree is built and nothing else is kept
+"""
+
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+try:
+    import lxml.html as lxml_html
+except ImportError:  # lxml is optional
+    lxml_html = None
+
+
+class AnchorExtractor(HTMLParser):
+    """Streaming parser that collects (href, text) for every <a href> element"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: List[Tuple[str, str]] = []
+        self._href: Optional[str] = None
+        self._text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a':
+            return
+        # An unclosed anchor ends where the next one starts (as browsers do)
+        self._close_anchor()
+        for name, value in attrs:
+            if name == 'href' and value is not None:
+                self._href = value
+                break
+
+    def handle_endtag(self, tag):
+        if tag == 'a':
+            self._close_anchor()
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def close(self):
+        super().close()
+        self._close_anchor()
+
+    def _close_anchor(self):
+        if self._href is not None:
+            self.links.append((self._href, ''.join(self._text).strip()))
+        self._href = None
+        self._text = []
+
+
+def extract_links_htmlparser(html: str) -> List[Tuple[str, str]]:
+    """(href, text) for every anchor, using the standard library parser"""
+    extractor = AnchorExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.links
+
+
+def extract_links_lxml(html: str) -> List[Tuple[str, str]]:
+    """(href, text) for every anchor, using lxml (raises ImportError without it)"""
+    if lxml_html is None:
+        raise ImportError("lxml is not installed")
+    if not html.strip():
+        return []
+    root = lxml_html.document_fromstring(html)
+    return [
+        (anchor.get('href'), anchor.text_content().strip())
+        for anchor in root.iter('a')
+        if anchor.get('href') is not None
+    ]
+
+
+def extract_links(html: str) -> List[Tuple[str, str]]:
+    """(href, text) for every <a href> in the page, in document order"""
+    if lxml_html is not None:
+        return extract_links_lxml(html)
+    return extract_links_htmlparser(html)
@@ -0,0 +1,169 @@
+"""
+BOM Station Location Index
+Version: v1.0 • Updated: 2026-10-16 15:05 AEST (Brisbane)
+
+In-memory inverted index over the full BOM DWO station catalogue, used to
+resolve a free-text location to ranked station candidates.
+
+- Names are normalised (case, punctuation, common abbreviations such as
+  "Mt" → "mount") so "Mt Gambier" matches "Mount Gambier Aero"
+- Postings for whole tokens and padded character trigrams; only stations
+  sharing at least one trigram with the query are scored
+- Trigram overlap tolerates typos anywhere in the name, including the
+  first letter (no letter-group guess is needed)
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+# Abbreviations BOM and users write both ways, mapped to one canonical token
+ABBREVIATIONS = {
+    'mt': 'mount',
+    'mtn': 'mountain',
+    'saint': 'st',
+    'ck': 'creek',
+    'cr': 'creek',
+    'is': 'island',
+    'isl': 'island',
+    'nth': 'north',
+    'sth': 'south',
+    'apt': 'airport',
+    'aero': 'airport',
+    'aerodrome': 'airport',
+    'hbr': 'harbour',
+    'harbor': 'harbour',
+}
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_PARENTHESISED = re.compile(r'\(.*?\)')
+
+
+def normalise_tokens(text: str) -> List[str]:
+    """Lowercase, strip punctuation and expand abbreviations into tokens"""
+    tokens = _NON_ALNUM.sub(' ', text.lower()).split()
+    return [ABBREVIATIONS.get(token, token) for token in tokens]
+
+
+def trigrams(tokens: Iterable[str]) -> Set[str]:
+    """Character trigrams of each token, padded so word starts and ends count"""
+    grams = set()
+    for token in tokens:
+        padded = f"${token}$"
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class LocationIndex:
+    """Token + trigram inverted index over station names"""
+
+    def __init__(self, stations: Iterable[Dict] = (), min_score: float = 0.45):
+        """
+        Build the index
+
+        Args:
+            stations: Station dicts with 'text' (name), 'station_id' and
+                      optionally 'state' and 'letter_group'
+            min_score: Candidates scoring below this are not returned
+        """
+        self.min_score = min_score
+        self.stations: List[Dict] = []
+        self._names: List[str] = []
+        self._base_names: List[str] = []
+        self._trigram_counts: List[int] = []
+        self._base_trigram_counts: List[int] = []
+        self._token_postings: Dict[str, List[int]] = defaultdict(list)
+        self._trigram_postings: Dict[str, List[int]] = defaultdict(list)
+
+        for station in stations:
+            self.add(station)
+
+    def add(self, station: Dict) -> None:
+        """Add one station to the index"""
+        name = station.get('text') or ''
+        tokens = normalise_tokens(name)
+        if not tokens or not station.get('station_id'):
+            return
+
+        doc = len(self.stations)
+        self.stations.append(station)
+        self._names.append(' '.join(tokens))
+        # "Launceston (Ti Tree Bend)" is also an exact match for "Launceston"
+        base_tokens = normalise_tokens(_PARENTHESISED.sub(' ', name)) or tokens
+        self._base_names.append(' '.join(base_tokens))
+        self._base_trigram_counts.append(len(trigrams(base_tokens)))
+
+        for token in set(tokens):
+            self._token_postings[token].append(doc)
+        grams = trigrams(tokens)
+        self._trigram_counts.append(len(grams))
+        for gram in grams:
+            self._trigram_postings[gram].append(doc)
+
+    def __len__(self) -> int:
+        return len(self.stations)
+
+    def search(self, query: str, state: Optional[str] = None, limit: int = 5) -> List[Dict]:
+        """
+        Rank stations for a free-text location
+
+        Args:
+            query: Location as typed by the user (e.g. "Mt Gambier")
+            state: Only return stations in this state (as stored on the station)
+            limit: Maximum number of candidates
+
+        Returns:
+            Candidates, best first: {'station': <station dict>, 'score': float}
+        """
+        tokens = normalise_tokens(query)
+        if not tokens:
+            return []
+
+        query_name = ' '.join(tokens)
+        query_grams = trigrams(tokens)
+        state_key = state.lower().strip() if state else None
+
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for doc in self._trigram_postings.get(gram, ()):
+                shared[doc] += 1
+
+        token_hits = defaultdict(int)
+        for token in set(tokens):
+            for doc in self._token_postings.get(token, ()):
+                token_hits[doc] += 1
+
+        query_gram_count = len(query_grams)
+        query_token_count = len(set(tokens))
+        candidates = []
+
+        for doc, overlap in shared.items():
+            station = self.stations[doc]
+            if state_key and (station.get('state') or '').lower().strip() != state_key:
+                continue
+
+            containment = overlap / query_gram_count
+            jaccard = overlap / (query_gram_count + self._trigram_counts[doc] - overlap)
+            # Don't let a parenthesised site qualifier dilute a close match on the place name
+            base_count = self._base_trigram_counts[doc]
+            base_overlap = min(overlap, base_count)
+            jaccard = max(jaccard, base_overlap / (query_gram_count + base_count - base_overlap))
+            coverage = token_hits.get(doc, 0) / query_token_count
+            score = 0.5 * containment + 0.3 * jaccard + 0.2 * coverage
+
+            name = self._names[doc]
+            if query_name == name or query_name == self._base_names[doc]:
+                score += 1.0
+            elif name.startswith(query_name):
+                score += 0.1
+
+            if score >= self.min_score:
+                candidates.append((score, len(name), doc))
+
+        # Highest score first; shorter names win ties (the less specific station)
+        candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+        return [
+            {'station': self.stations[doc], 'score': round(score, 3)}
+            for score, _, doc in candidates[:limit]
+        ]
@@ -0,0 +1,120 @@
+"""
+BOM Negative Cache
+Version: v1.0 • Updated: 2026-10-16 18:40 AEST (Brisbane)
+
+Short-lived memory of lookups that found nothing upstream, so a client
+retrying a misspelled location or a month BOM does not publish is answered
+immediately instead of re-triggering the scrape every time.
+
+Kinds of entry:
+- 'location': (state, location) not found in the state's station catalogue
+- 'month':    (station_id, YYYYMM) for which BOM returned 404 (no CSV)
+
+Entries expire after BOM_NEGATIVE_CACHE_TTL_SECONDS (default 10 minutes).
+Like the response cache, entries are held per process.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class NegativeCache:
+    """Thread-safe TTL cache of 'not found' results"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: int = 10000):
+        """
+        Initialize the negative cache
+
+        Args:
+            ttl_seconds: How long a miss is remembered
+            max_entries: Oldest entries are dropped beyond this
+        """
+        if ttl_seconds is None:
+            ttl_seconds = float(os.environ.get('BOM_NEGATIVE_CACHE_TTL_SECONDS', '600'))
+
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, Hashable], Dict] = {}
+
+        self.hits = 0
+        self.stores = 0
+
+    def get(self, kind: str, key: Hashable) -> Optional[Dict]:
+        """Get a live entry ({'reason', 'created', 'expires'}) or None"""
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None:
+                return None
+            if entry['expires'] <= time.time():
+                del self._entries[(kind, key)]
+                return None
+            self.hits += 1
+            return entry
+
+    def put(self, kind: str, key: Hashable, reason: str) -> None:
+        """Remember that a lookup found nothing"""
+        if self.ttl_seconds <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict(now)
+            self._entries[(kind, key)] = {'reason': reason, 'created': now, 'expires': now + self.ttl_seconds}
+            self.stores += 1
+        logger.info(f"Negative cache: {kind} {key} ({reason})")
+
+    def clear(self, kind: Optional[str] = None) -> int:
+        """Drop every entry (or every entry of one kind); returns the number removed"""
+        with self._lock:
+            keys = [entry_key for entry_key in self._entries if kind is None or entry_key[0] == kind]
+            for entry_key in keys:
+                del self._entries[entry_key]
+        return len(keys)
+
+    def list_entries(self) -> List[Dict]:
+        """Live entries, newest first (for the cache inspection endpoint)"""
+        now = time.time()
+        with self._lock:
+            items = [(entry_key, entry) for entry_key, entry in self._entries.items() if entry['expires'] > now]
+        items.sort(key=lambda item: -item[1]['created'])
+        return [
+            {
+                'kind': kind,
+                'key': list(key) if isinstance(key, tuple) else key,
+                'reason': entry['reason'],
+                'expires_in_seconds': round(entry['expires'] - now, 1)
+            }
+            for (kind, key), entry in items
+        ]
+
+    def get_stats(self) -> Dict:
+        """Get negative cache statistics"""
+        now = time.time()
+        with self._lock:
+            live = [entry_key for entry_key, entry in self._entries.items() if entry['expires'] > now]
+            return {
+                'ttl_seconds': self.ttl_seconds,
+                'entries': len(live),
+                'locations': sum(1 for kind, _ in live if kind == 'location'),
+                'months': sum(1 for kind, _ in live if kind == 'month'),
+                'hits': self.hits,
+                'stores': self.stores
+            }
+
+    def _evict(self, now: float) -> None:
+        expired = [entry_key for entry_key, entry in self._entries.items() if entry['expires'] <= now]
+        for entry_key in expired:
+            del self._entries[entry_key]
+        if len(self._entries) >= self.max_entries:
+            oldest = sorted(self._entries, key=lambda entry_key: self._entries[entry_key]['created'])
+            for entry_key in oldest[:len(self._entries) - self.max_entries + 1]:
+                del self._entries[entry_key]
@@ -0,0 +1,245 @@
+"""
+BOM Observation Archive (Write-Behind)
+Version: v1.1 • Updated: 2026-10-16 22:45 AEST (Brisbane)
+A failed append releases its content-hash claim so the month is archived on a later fetch
+
+Durable archive of every station-month the scraper parses, written off the
+request path.
+
+- submit() only enqueues - a background thread does hashing, compression and I/O
+- Each station-month is archived once per distinct content (SHA-256 of its
+  records); duplicates are dropped using marker files shared by all workers
+- Entries are appended as gzip members to per-process segment files under
+  BOM_DATA_DIR/archive/segments, rotated at BOM_ARCHIVE_SEGMENT_MAX_MB
+- BOM_ARCHIVE_ENABLED=false turns archiving off entirely
+"""
+
+import os
+import gzip
+import json
+import queue
+import atexit
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from bom_storage import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+
+class ObservationArchive:
+    """Background, deduplicating, compressed archive of parsed station-months"""
+
+    def __init__(self, root: Optional[Path] = None, enabled: Optional[bool] = None,
+                 segment_max_mb: Optional[float] = None, queue_size: int = 1000):
+        """
+        Initialize the archive
+
+        Args:
+            root: Archive directory (defaults to BOM_DATA_DIR/archive)
+            enabled: Archive at all (defaults to BOM_ARCHIVE_ENABLED, true)
+            segment_max_mb: Start a new segment once the current one reaches this size
+            queue_size: Pending entries held before new ones are dropped
+        """
+        if enabled is None:
+            enabled = os.environ.get('BOM_ARCHIVE_ENABLED', 'true').lower() == 'true'
+        if segment_max_mb is None:
+            segment_max_mb = float(os.environ.get('BOM_ARCHIVE_SEGMENT_MAX_MB', '16'))
+
+        self.enabled = enabled
+        self.root = Path(root) if root else None
+        self.segment_max_bytes = int(segment_max_mb * 1024 * 1024)
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._segment_fd: Optional[int] = None
+        self._segment_path: Optional[Path] = None
+        self._segment_seq = 0
+
+        self.submitted = 0
+        self.archived = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.errors = 0
+        self.bytes_written = 0
+
+    def submit(self, station_id: str, month_key: str, records: List, **metadata) -> bool:
+        """
+        Queue a parsed station-month for archiving (never blocks)
+
+        Args:
+            station_id: BOM station ID
+            month_key: Month in YYYYMM format
+            records: ObservationRecords for the month
+            **metadata: Extra context stored with the entry (e.g. location)
+
+        Returns:
+            True if queued, False if archiving is off or the queue is full
+        """
+        if not self.enabled or not records:
+            return False
+
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((station_id, month_key, records, metadata))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued entry has been written (True if drained)"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+
+        def wait():
+            self._queue.join()
+            done.set()
+
+        threading.Thread(target=wait, daemon=True).start()
+        return done.wait(timeout)
+
+    def iter_entries(self) -> Iterator[Dict]:
+        """Read every archived entry back, oldest segment first"""
+        segments_dir = self._root() / "segments"
+        if not segments_dir.exists():
+            return
+        for segment in sorted(segments_dir.glob("*.jsonl.gz")):
+            with gzip.open(segment, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def get_stats(self) -> Dict:
+        """Get archive statistics"""
+        segments_dir = self._root() / "segments" if self.enabled else None
+        segments = list(segments_dir.glob("*.jsonl.gz")) if segments_dir and segments_dir.exists() else []
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'queued': self._queue.qsize(),
+                'submitted': self.submitted,
+                'archived': self.archived,
+                'duplicates': self.duplicates,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'bytes_written': self.bytes_written,
+                'segments': len(segments),
+                'segment_bytes': sum(p.stat().st_size for p in segments)
+            }
+
+    # ------------------------------------------------------------------
+    # Background writer
+    # ------------------------------------------------------------------
+
+    def _root(self) -> Path:
+        if self.root is None:
+            self.root = get_data_dir("archive")
+        return self.root
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="bom-archive", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush, 5.0)
+
+    def _run(self) -> None:
+        while True:
+            station_id, month_key, records, metadata = self._queue.get()
+            try:
+                self._archive(station_id, month_key, records, metadata)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                logger.warning(f"Archiving {station_id} {month_key} failed: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _archive(self, station_id: str, month_key: str, records: List, metadata: Dict) -> None:
+        rows = [record.to_dict() for record in records]
+        body = json.dumps(rows, separators=(',', ':'), sort_keys=True)
+        sha256 = hashlib.sha256(f"{station_id}|{month_key}|{body}".encode('utf-8')).hexdigest()
+
+        if not self._claim(sha256):
+            with self._lock:
+                self.duplicates += 1
+            return
+
+        entry = {
+            'station_id': station_id,
+            'month_key': month_key,
+            'sha256': sha256,
+            'archived_at': datetime.now().isoformat(),
+            'metadata': metadata,
+            'records': rows
+        }
+        line = json.dumps(entry, separators=(',', ':'), default=str) + '\n'
+        try:
+            self._append(gzip.compress(line.encode('utf-8')))
+        except Exception:
+            # Not archived after all - let a later fetch of the same content try again
+            self._release(sha256)
+            raise
+
+        with self._lock:
+            self.archived += 1
+
+    def _claim(self, sha256: str) -> bool:
+        """Atomically mark a content hash as archived (False if any worker already did)"""
+        marker = self._root() / "hashes" / sha256[:2] / sha256
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            return False
+
+    def _release(self, sha256: str) -> None:
+        """Undo a claim whose entry was never written"""
+        try:
+            (self._root() / "hashes" / sha256[:2] / sha256).unlink()
+        except OSError:
+            pass
+
+    def _append(self, member: bytes) -> None:
+        """Append one gzip member to this process's current segment (a concatenation of members is valid gzip)"""
+        if self._segment_fd is None or self._segment_size() + len(member) > self.segment_max_bytes:
+            self._open_segment()
+        try:
+            written = os.write(self._segment_fd, member)
+            if written != len(member):
+                raise OSError(f"short write to {self._segment_path.name} ({written} of {len(member)} bytes)")
+        except OSError:
+            # The segment may end in a partial member - continue in a fresh one
+            os.close(self._segment_fd)
+            self._segment_fd = None
+            raise
+        with self._lock:
+            self.bytes_written += len(member)
+
+    def _segment_size(self) -> int:
+        return os.fstat(self._segment_fd).st_size
+
+    def _open_segment(self) -> None:
+        if self._segment_fd is not None:
+            os.close(self._segment_fd)
+        segments_dir = self._root() / "segments"
+        segments_dir.mkdir(parents=True, exist_ok=True)
+        self._segment_seq += 1
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._segment_path = segments_dir / f"{stamp}-{os.getpid()}-{self._segment_seq:04d}.jsonl.gz"
+        self._segment_fd = os.open(self._segment_path, os.O_CREAT | os.O_WRONLY | os.O_APPEND, 0o644)
@@ -0,0 +1,355 @@
+"""
+Station-Month Observation Cache
+Version: v1.4 • Updated: 2026-10-16 23:20 AEST (Brisbane)
+Added get_months - the resident subset of a range, for partial-hit assembly
+Bounded: entry count and byte budget with LRU eviction, lazy and periodic expiry sweeps
+Optional shared L2 tier (shared_block_store) behind this in-process L1
+Partial hits are counted through record_partial_hit (under the cache lock)
+
+In-memory cache of parsed observations keyed by (station_id, month_key),
+replacing the response cache keyed on the full sorted date list. Any
+requested range is assembled from the resident month blocks, so a
+sub-range or overlapping query hits as long as its months are cached.
+
+- Each entry is one complete station-month as an ObservationBlock (the
+  whole month BOM published when it was fetched), so a date missing from a
+  cached month is known not to exist - it is not a cache miss
+- Closed months live for the service cache TTL; the current month is
+  additionally capped at the CSV store's current-month TTL, because BOM
+  still adds days to it
+- Months entirely in the future are not required for a hit
+- Expired entries are kept for a stale window (BOM_CACHE_STALE_HOURS) so
+  they can be served as stale data while BOM is unavailable, then dropped
+
+Memory is bounded by BOM_CACHE_MAX_ENTRIES and BOM_CACHE_MAX_MB (approximate,
+from ObservationBlock.nbytes). Over budget, expired months go first, then
+the least recently used. Entries past the stale window are dropped lazily
+when touched and by a sweep run at most every BOM_CACHE_SWEEP_SECONDS from
+put (no background thread).
+
+With a shared store (L2, see shared_block_store) this cache is the
+worker's L1: puts are written through to L2, L1 misses are looked up in
+L2 and promoted with their original expiry, and clear() clears L2 for
+every worker. Each worker polls the L2 generation at most every
+BOM_CACHE_L2_SYNC_SECONDS and drops its L1 when another worker cleared.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from observation_records import ObservationBlock, ObservationRecord
+
+logger = logging.getLogger(__name__)
+
+
+def month_keys_for(target_dates: Iterable[str]) -> List[str]:
+    """Sorted YYYYMM keys covering a list of YYYY-MM-DD dates"""
+    return sorted({target_date[:7].replace('-', '') for target_date in target_dates})
+
+
+def required_month_keys(target_dates: Iterable[str]) -> List[str]:
+    """Month keys of a range that can have data (months wholly in the future cannot)"""
+    current_month = datetime.now().strftime("%Y%m")
+    return [month_key for month_key in month_keys_for(target_dates) if month_key <= current_month]
+
+
+class ObservationCache:
+    """Thread-safe, bounded LRU cache of complete station-months"""
+
+    def __init__(self, ttl_seconds: float, current_month_ttl_seconds: Optional[float] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 stale_seconds: Optional[float] = None, sweep_interval_seconds: Optional[float] = None,
+                 shared=None, sync_interval_seconds: Optional[float] = None):
+        """
+        Initialize the cache
+
+        Args:
+            ttl_seconds: Lifetime of a closed month
+            current_month_ttl_seconds: Lifetime of a month BOM is still adding days to
+            max_entries: Most station-months held
+            max_bytes: Approximate memory budget for the held blocks
+            stale_seconds: How long past expiry a month is kept for stale serving
+            sweep_interval_seconds: Minimum time between full expiry sweeps
+            shared: Shared L2 block store (from create_shared_store), or None
+            sync_interval_seconds: Minimum time between L2 generation checks
+        """
+        if max_entries is None:
+            max_entries = int(os.environ.get('BOM_CACHE_MAX_ENTRIES', '5000'))
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('BOM_CACHE_MAX_MB', '64')) * 1024 * 1024)
+        if stale_seconds is None:
+            stale_seconds = float(os.environ.get('BOM_CACHE_STALE_HOURS', '168')) * 3600
+        if sweep_interval_seconds is None:
+            sweep_interval_seconds = float(os.environ.get('BOM_CACHE_SWEEP_SECONDS', '300'))
+        if sync_interval_seconds is None:
+            sync_interval_seconds = float(os.environ.get('BOM_CACHE_L2_SYNC_SECONDS', '5'))
+
+        self.ttl_seconds = ttl_seconds
+        self.current_month_ttl_seconds = (ttl_seconds if current_month_ttl_seconds is None
+                                          else min(ttl_seconds, current_month_ttl_seconds))
+        self.max_entries = max(max_entries, 1)
+        self.max_bytes = max_bytes
+        self.stale_seconds = stale_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+
+        self._lock = threading.Lock()
+        # Least recently used first
+        self._entries: 'OrderedDict[Tuple[str, str], Dict]' = OrderedDict()
+        self._bytes = 0
+        self._last_sweep = time.time()
+
+        self.shared = shared
+        self.sync_interval_seconds = sync_interval_seconds
+        self._generation = shared.generation() if shared else None
+        self._last_sync = time.time()
+        self._last_shared_sweep = 0.0
+
+        self.hits = 0
+        self.partial_hits = 0  # Misses the service assembled around missing months (record_partial_hit)
+        self.misses = 0
+        self.evictions = {'capacity': 0, 'expired': 0}
+        self.l2_hits = 0
+        self.l2_misses = 0
+
+    def put(self, station_id: str, month_key: str, records: Iterable[ObservationRecord],
+            closed: bool, source: str) -> None:
+        """
+        Cache one complete station-month
+
+        Args:
+            station_id: BOM station ID
+            month_key: Month in YYYYMM format
+            records: Every record BOM published for the month
+            closed: The month is over (cached for the full TTL)
+            source: Where the month came from (reported as the response method)
+        """
+        block = records if isinstance(records, ObservationBlock) else \
+            ObservationBlock.from_records(records, station_id, month_key)
+        now = time.time()
+        entry = {
+            'block': block,
+            'source': source,
+            'cached_at': datetime.fromtimestamp(now),
+            'expires': now + (self.ttl_seconds if closed else self.current_month_ttl_seconds),
+            'bytes': block.nbytes()
+        }
+        self._store((station_id, month_key), entry)
+
+        if self.shared:
+            self.shared.put(station_id, month_key, block.to_bytes(), source, now,
+                            entry['expires'], entry['expires'] + self.stale_seconds)
+            if now - self._last_shared_sweep >= self.sweep_interval_seconds:
+                self._last_shared_sweep = now
+                self.shared.sweep()
+
+    def get_range(self, station_id: str, target_dates: List[str],
+                  allow_expired: bool = False) -> Optional[Dict]:
+        """
+        Assemble a date range from resident months
+
+        Args:
+            station_id: BOM station ID
+            target_dates: Dates in YYYY-MM-DD format
+            allow_expired: Also use expired months (stale data while BOM is down)
+
+        Returns:
+            Dict with 'data' (ObservationBlock of the target dates), 'source'
+            and 'cached_at' (oldest month used), or None unless every
+            required month is resident
+        """
+        required = required_month_keys(target_dates)
+        if not required:
+            return None
+
+        entries = self.get_months(station_id, required, allow_expired=allow_expired)
+        complete = len(entries) == len(required)
+        if not allow_expired:
+            with self._lock:
+                if complete:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        if not complete:
+            return None
+
+        return {
+            'data': ObservationBlock.concat([entries[month_key]['block'] for month_key in required],
+                                            dates=target_dates, station_id=station_id),
+            'source': entries[required[0]]['source'],
+            'cached_at': min(entry['cached_at'] for entry in entries.values())
+        }
+
+    def get_months(self, station_id: str, month_keys: Iterable[str],
+                   allow_expired: bool = False) -> Dict[str, Dict]:
+        """
+        Resident months of a station (for assembling a range around missing months)
+
+        Months missing from L1 are looked up in the shared store and promoted.
+
+        Returns:
+            month_key → {'block', 'source', 'cached_at'} for the months present
+        """
+        now = time.time()
+        month_keys = list(month_keys)
+        if self.shared:
+            self._sync(now)
+
+        with self._lock:
+            resident = {}
+            for month_key in month_keys:
+                key = (station_id, month_key)
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry['expires'] + self.stale_seconds <= now:
+                    # Lazy expiry - past the stale window, nothing will use it again
+                    self._remove(key)
+                    self.evictions['expired'] += 1
+                    continue
+                if allow_expired or entry['expires'] > now:
+                    self._entries.move_to_end(key)
+                    resident[month_key] = entry
+
+        missing = [month_key for month_key in month_keys if month_key not in resident]
+        if self.shared and missing:
+            resident.update(self._get_shared(station_id, missing, allow_expired, now))
+        return resident
+
+    def record_partial_hit(self) -> None:
+        """Count a miss the caller answered by fetching only the missing months"""
+        with self._lock:
+            self.partial_hits += 1
+
+    def clear(self) -> int:
+        """Drop every entry (in L2 too, so every worker drops its copy); returns the number removed"""
+        count = self._clear_local()
+        if self.shared:
+            count = max(count, self.shared.clear())
+            self._generation = self.shared.generation()
+        return count
+
+    def sweep(self) -> int:
+        """Drop every entry past its stale window; returns the number removed"""
+        now = time.time()
+        with self._lock:
+            return self._sweep(now)
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        now = time.time()
+        with self._lock:
+            entries = list(self._entries.items())
+            total_bytes = self._bytes
+        valid = sum(1 for _, entry in entries if entry['expires'] > now)
+        lookups = self.hits + self.misses
+        return {
+            'granularity': 'station_month',
+            'total_entries': len(entries),
+            'valid_entries': valid,
+            'expired_entries': len(entries) - valid,
+            'stations': len({station_id for (station_id, _), _ in entries}),
+            'max_entries': self.max_entries,
+            'bytes': total_bytes,
+            'max_bytes': self.max_bytes,
+            'stale_hours': self.stale_seconds / 3600,
+            'hits': self.hits,
+            'partial_hits': self.partial_hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else None,
+            'miss_ratio': round(self.misses / lookups, 3) if lookups else None,
+            'partial_hit_ratio': round(self.partial_hits / lookups, 3) if lookups else None,
+            'evictions': dict(self.evictions, total=sum(self.evictions.values())),
+            'l2': dict(self.shared.get_stats(), hits=self.l2_hits, misses=self.l2_misses)
+            if self.shared else {'backend': None}
+        }
+
+    def _store(self, key: Tuple[str, str], entry: Dict) -> None:
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry['bytes']
+            self._enforce_limits()
+
+    def _clear_local(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+        return count
+
+    def _sync(self, now: float) -> None:
+        """Drop L1 if another worker cleared the shared store since we last looked"""
+        if now - self._last_sync < self.sync_interval_seconds:
+            return
+        self._last_sync = now
+        generation = self.shared.generation()
+        if generation is not None and generation != self._generation:
+            if self._generation is not None:
+                logger.info(f"Shared cache cleared by another worker - dropped {self._clear_local()} L1 entries")
+            self._generation = generation
+
+    def _get_shared(self, station_id: str, month_keys: List[str], allow_expired: bool,
+                    now: float) -> Dict[str, Dict]:
+        """L2 lookup for months L1 lacks; usable ones are promoted into L1"""
+        found = {}
+        for month_key, row in self.shared.get_many(station_id, month_keys).items():
+            if row['purge_at'] <= now or not (allow_expired or row['expires'] > now):
+                continue
+            try:
+                block = ObservationBlock.from_bytes(row['data'])
+            except Exception as e:
+                logger.warning(f"Unreadable shared cache entry {station_id}/{month_key}: {str(e)}")
+                continue
+            entry = {
+                'block': block,
+                'source': row['source'],
+                'cached_at': datetime.fromtimestamp(row['cached_at']),
+                'expires': row['expires'],
+                'bytes': block.nbytes()
+            }
+            self._store((station_id, month_key), entry)
+            found[month_key] = entry
+
+        if not allow_expired:
+            with self._lock:
+                self.l2_hits += len(found)
+                self.l2_misses += len(month_keys) - len(found)
+        return found
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry['bytes']
+
+    def _sweep(self, now: float) -> int:
+        self._last_sweep = now
+        dead = [key for key, entry in self._entries.items() if entry['expires'] + self.stale_seconds <= now]
+        for key in dead:
+            self._remove(key)
+        self.evictions['expired'] += len(dead)
+        return len(dead)
+
+    def _enforce_limits(self) -> None:
+        now = time.time()
+        if now - self._last_sweep >= self.sweep_interval_seconds:
+            self._sweep(now)
+
+        if len(self._entries) <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+
+        # Expired months (only useful while BOM is down) go before live ones, oldest use first
+        for key in [key for key, entry in self._entries.items() if entry['expires'] <= now]:
+            if len(self._entries) <= self.max_entries and self._bytes <= self.max_bytes:
+                return
+            self._remove(key)
+            self.evictions['capacity'] += 1
+
+        # Keep the newest entry even if it alone exceeds the byte budget
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.evictions['capacity'] += 1
@@ -0,0 +1,289 @@
+"""
+Typed BOM Observation Records
+Version: v1.1 • Updated: 2026-10-16 20:20 AEST (Brisbane)
+Added ObservationBlock.concat - assemble a date range from station-month blocks
+
+Compact, typed representations of BOM daily weather observations.
+
+- ObservationRecord: one day, tuple-backed with __slots__. Numbers are float/int,
+  missing values are None. Supports the dict-style access the rest of the
+  codebase already uses (record['date'], record.get(...)) and to_dict() for JSON.
+- ObservationBlock: columnar, array-backed block of days (typically one
+  station-month) - numeric columns are array('d') with NaN for missing values.
+  It is much smaller than a list of dicts and serialises directly to JSON rows
+  or compact bytes.
+"""
+
+import json
+import math
+import zlib
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Field name → type, in BOM CSV column order (month_key first)
+FIELD_TYPES: Tuple[Tuple[str, str], ...] = (
+    ('month_key', 'str'),
+    ('date', 'str'),
+    ('minimum_temperature_c', 'float'),
+    ('maximum_temperature_c', 'float'),
+    ('rainfall_mm', 'float'),
+    ('evaporation_mm', 'float'),
+    ('sunshine_hours', 'float'),
+    ('direction_of_maximum_wind_gust_', 'str'),
+    ('speed_of_maximum_wind_gust_km_h', 'int'),
+    ('time_of_maximum_wind_gust', 'str'),
+    ('9am_temperature_c', 'float'),
+    ('9am_relative_humidity_percent', 'int'),
+    ('9am_cloud_amount_oktas', 'int'),
+    ('9am_wind_direction', 'str'),
+    ('9am_wind_speed_km_h', 'int'),
+    ('9am_msl_pressure_hpa', 'float'),
+    ('3pm_temperature_c', 'float'),
+    ('3pm_relative_humidity_percent', 'int'),
+    ('3pm_cloud_amount_oktas', 'int'),
+    ('3pm_wind_direction', 'str'),
+    ('3pm_wind_speed_km_h', 'int'),
+    ('3pm_msl_pressure_hpa', 'float'),
+)
+
+FIELDS: Tuple[str, ...] = tuple(name for name, _ in FIELD_TYPES)
+FIELD_INDEX: Dict[str, int] = {name: i for i, name in enumerate(FIELDS)}
+NUMERIC_FIELDS = frozenset(name for name, kind in FIELD_TYPES if kind in ('float', 'int'))
+INT_FIELDS = frozenset(name for name, kind in FIELD_TYPES if kind == 'int')
+
+
+def _to_float(value: str) -> Optional[float]:
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _to_int(value: str) -> Optional[int]:
+    value = value.strip()
+    if not value:
+        return None
+    if value.lower() == 'calm':  # BOM reports still air as "Calm" in wind speed columns
+        return 0
+    try:
+        return int(value)
+    except ValueError:
+        number = _to_float(value)
+        return int(number) if number is not None else None
+
+
+def _to_str(value: str) -> Optional[str]:
+    value = value.strip()
+    return value or None
+
+
+CONVERTERS = {'float': _to_float, 'int': _to_int, 'str': _to_str}
+FIELD_CONVERTERS = tuple(CONVERTERS[kind] for _, kind in FIELD_TYPES)
+
+
+class ObservationRecord:
+    """One day of BOM observations with typed values (None = missing)"""
+
+    __slots__ = ('values', 'extra')
+
+    def __init__(self, values: Sequence[Any], extra: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            values: Typed values in FIELDS order
+            extra: Columns not in FIELDS (kept as strings, if BOM adds new columns)
+        """
+        self.values = tuple(values)
+        self.extra = extra or None
+
+    @classmethod
+    def from_strings(cls, fields: Dict[str, str]) -> 'ObservationRecord':
+        """Build a record from raw string values keyed by normalised header"""
+        values = [None] * len(FIELDS)
+        extra = {}
+        for key, raw in fields.items():
+            index = FIELD_INDEX.get(key)
+            if index is None:
+                extra[key] = raw
+            elif raw is not None:
+                values[index] = FIELD_CONVERTERS[index](raw)
+        return cls(values, extra)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ObservationRecord':
+        """Build a record from a dict of already-typed values (e.g. to_dict() output)"""
+        values = [data.get(name) for name in FIELDS]
+        extra = {key: value for key, value in data.items() if key not in FIELD_INDEX}
+        return cls(values, extra)
+
+    def __getitem__(self, key: str) -> Any:
+        index = FIELD_INDEX.get(key)
+        if index is not None:
+            return self.values[index]
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        index = FIELD_INDEX.get(key)
+        if index is not None:
+            value = self.values[index]
+            return default if value is None else value
+        if self.extra:
+            return self.extra.get(key, default)
+        return default
+
+    def __contains__(self, key: str) -> bool:
+        return key in FIELD_INDEX or bool(self.extra and key in self.extra)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, ObservationRecord):
+            return NotImplemented
+        return self.values == other.values and (self.extra or None) == (other.extra or None)
+
+    def __repr__(self) -> str:
+        return f"ObservationRecord(date={self.get('date')!r}, month_key={self.get('month_key')!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-ready dict (numbers as numbers, missing as null)"""
+        record = dict(zip(FIELDS, self.values))
+        if self.extra:
+            record.update(self.extra)
+        return record
+
+
+class ObservationBlock:
+    """Columnar, array-backed block of observations (typically one station-month)"""
+
+    __slots__ = ('station_id', 'month_key', 'columns', 'extras', 'length')
+
+    def __init__(self, station_id: Optional[str], month_key: Optional[str],
+                 columns: Dict[str, Any], extras: Optional[List[Optional[Dict]]] = None):
+        self.station_id = station_id
+        self.month_key = month_key
+        self.columns = columns
+        self.length = len(columns['date'])
+        self.extras = extras if extras and any(extras) else None
+
+    @classmethod
+    def from_records(cls, records: Iterable[ObservationRecord], station_id: Optional[str] = None,
+                     month_key: Optional[str] = None) -> 'ObservationBlock':
+        """Build a block from typed records"""
+        columns = {
+            name: array('d') if name in NUMERIC_FIELDS else []
+            for name in FIELDS
+        }
+        extras = []
+        nan = math.nan
+        for record in records:
+            for name, value in zip(FIELDS, record.values):
+                if name in NUMERIC_FIELDS:
+                    columns[name].append(nan if value is None else value)
+                else:
+                    columns[name].append(value)
+            extras.append(record.extra)
+        return cls(station_id, month_key, columns, extras)
+
+    @classmethod
+    def concat(cls, blocks: Iterable['ObservationBlock'], dates: Optional[Iterable[str]] = None,
+               station_id: Optional[str] = None) -> 'ObservationBlock':
+        """Join blocks (optionally only the given dates) into one block, column by column"""
+        wanted = set(dates) if dates is not None else None
+        columns = {
+            name: array('d') if name in NUMERIC_FIELDS else []
+            for name in FIELDS
+        }
+        extras = []
+        for block in blocks:
+            rows = block._rows(wanted)
+            if isinstance(rows, range):
+                for name in FIELDS:
+                    columns[name].extend(block.columns[name])
+            else:
+                for name in FIELDS:
+                    column = block.columns[name]
+                    columns[name].extend([column[row] for row in rows])
+            extras.extend([block.extras[row] for row in rows] if block.extras else [None] * len(rows))
+        return cls(station_id, None, columns, extras)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[ObservationRecord]:
+        return iter(self.records())
+
+    @property
+    def dates(self) -> List[str]:
+        return self.columns['date']
+
+    def _value(self, name: str, row: int) -> Any:
+        value = self.columns[name][row]
+        if name in NUMERIC_FIELDS:
+            if value != value:  # NaN = missing
+                return None
+            return int(value) if name in INT_FIELDS else value
+        return value
+
+    def record(self, row: int) -> ObservationRecord:
+        """Materialise one row as a typed record"""
+        values = [self._value(name, row) for name in FIELDS]
+        return ObservationRecord(values, self.extras[row] if self.extras else None)
+
+    def records(self, dates: Optional[Iterable[str]] = None) -> List[ObservationRecord]:
+        """Materialise rows (optionally only the given dates) as typed records"""
+        return [self.record(row) for row in self._rows(dates)]
+
+    def to_dicts(self, dates: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Serialise rows (optionally only the given dates) straight to JSON-ready dicts"""
+        rows = []
+        for row in self._rows(dates):
+            record = {name: self._value(name, row) for name in FIELDS}
+            if self.extras and self.extras[row]:
+                record.update(self.extras[row])
+            rows.append(record)
+        return rows
+
+    def nbytes(self) -> int:
+        """Approximate memory footprint in bytes"""
+        size = 0
+        for name, column in self.columns.items():
+            if isinstance(column, array):
+                size += column.itemsize * len(column)
+            else:
+                size += sum(len(value) + 49 for value in column if value is not None) + 8 * len(column)
+        return size + 64
+
+    def to_bytes(self) -> bytes:
+        """Serialise to compact bytes (zlib-compressed JSON columns, NaN → null)"""
+        payload = {
+            'station_id': self.station_id,
+            'month_key': self.month_key,
+            'columns': {
+                name: [None if value != value else value for value in column]
+                if isinstance(column, array) else list(column)
+                for name, column in self.columns.items()
+            },
+            'extras': self.extras
+        }
+        return zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ObservationBlock':
+        """Inverse of to_bytes()"""
+        payload = json.loads(zlib.decompress(data).decode('utf-8'))
+        columns = {}
+        for name in FIELDS:
+            values = payload['columns'].get(name, [])
+            if name in NUMERIC_FIELDS:
+                columns[name] = array('d', (math.nan if value is None else value for value in values))
+            else:
+                columns[name] = list(values)
+        return cls(payload.get('station_id'), payload.get('month_key'), columns, payload.get('extras'))
+
+    def _rows(self, dates: Optional[Iterable[str]]) -> Iterable[int]:
+        if dates is None:
+            return range(self.length)
+        wanted = set(dates)
+        return [row for row, date in enumerate(self.columns['date']) if date in wanted]
@@ -0,0 +1,118 @@
+"""
+Request Phase Timer
+Version: v1.0 • Updated: 2026-10-16 19:55 AEST (Brisbane)
+
+Low-overhead per-request timing breakdown (auth, quota, rate limit waits,
+HTML parsing, station matching, CSV download, usage logging ...).
+
+The route starts a PhaseTimer for the request thread; code further down
+(service, scraper, HTTP client) times its work with timed_phase(name)
+without the timer being passed through every call. When no timer is
+active timed_phase is a shared no-op, so background jobs (prefetch,
+backfill) pay nothing.
+
+- Phases are flat: a phase timed inside another (e.g. rate_limit_wait
+  inside csv_download) is reported on its own and also counted in its parent
+- Repeated phases accumulate (three letter group fetches → one total)
+- Work done on worker threads (concurrent downloads) is summed, so a
+  phase can exceed the request's wall time
+"""
+
+import time
+import threading
+from typing import Dict, Optional
+
+_local = threading.local()
+
+
+class PhaseTimer:
+    """Accumulates wall time per named phase for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._phases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def phase(self, name: str) -> '_Phase':
+        """Context manager timing one phase"""
+        return _Phase(self, name)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add time to a phase (safe from worker threads)"""
+        with self._lock:
+            self._phases[name] = self._phases.get(name, 0.0) + seconds
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        """Phase durations in milliseconds, in first-seen order, plus the total so far"""
+        with self._lock:
+            timings = {name: round(seconds * 1000, 2) for name, seconds in self._phases.items()}
+        timings['total'] = round(self.elapsed_ms(), 2)
+        return timings
+
+    def summary(self) -> str:
+        """Compact one-line form for logs (e.g. 'auth=1.2 quota=0.8 total=40.1')"""
+        return ' '.join(f"{name}={ms}" for name, ms in self.as_dict().items())
+
+
+class _Phase:
+    __slots__ = ('timer', 'name', 'started')
+
+    def __init__(self, timer: PhaseTimer, name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+def start_request_timer() -> PhaseTimer:
+    """Start timing the current thread's request (replaces any previous timer)"""
+    timer = PhaseTimer()
+    _local.timer = timer
+    return timer
+
+
+def stop_request_timer() -> None:
+    """Detach the current thread's timer (the thread is reused for other requests)"""
+    _local.timer = None
+
+
+def current_timer() -> Optional[PhaseTimer]:
+    """The current thread's request timer, if one is running"""
+    return getattr(_local, 'timer', None)
+
+
+def timed_phase(name: str):
+    """Time a block against the current request timer (no-op without one)"""
+    timer = getattr(_local, 'timer', None)
+    if timer is None:
+        return _NO_PHASE
+    return _Phase(timer, name)
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Add an already measured duration (e.g. a rate limit wait) to the current timer"""
+    timer = getattr(_local, 'timer', None)
+    if timer is not None and seconds > 0:
+        timer.add(name, seconds)
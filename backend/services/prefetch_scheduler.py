@@ -0,0 +1,366 @@
+"""
+BOM Prefetch Scheduler
+Version: v1.1 • Updated: 2026-10-17 09:30 AEST (Brisbane)
+Prefetch tokens leave a reserve in the shared bucket for user requests
+
+Background warm-up of popular station-months so that the most requested data
+is already in the CSV store and the observation warehouse when users ask.
+
+- Popularity comes from the Usage table: recent successful requests are
+  expanded into (station, month) pairs and the top N are kept
+- Prefetching runs in an off-peak window (Brisbane time by default) and only
+  takes a token from the shared BOM rate limiter while the bucket would still
+  hold BOM_PREFETCH_RESERVE_FRACTION of its burst afterwards, so user requests
+  (which wait only on an empty bucket) always have headroom
+- Once a day, shortly after BOM publishes the previous day's observations,
+  the current month of the top stations is revalidated (conditional GET)
+- Only one gunicorn worker runs the scheduler: the others fail to take the
+  BOM_DATA_DIR/locks/prefetch.lock file lock and just keep retrying it
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows - no cross-worker leader election
+    fcntl = None
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+from bom_storage import get_data_dir, atomic_write_json, read_json
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_hours(value: str) -> Tuple[int, int]:
+    """Parse an "start-end" hour window such as "1-5" (end exclusive)"""
+    start, _, end = value.partition('-')
+    return int(start), int(end or int(start) + 1)
+
+
+class PrefetchScheduler:
+    """Warms the CSV store and warehouse with the most requested station-months"""
+
+    def __init__(self, weather_service, app=None, top_n: Optional[int] = None,
+                 lookback_days: Optional[int] = None, off_peak_hours: Optional[str] = None,
+                 daily_refresh_hour: Optional[int] = None, max_fetches_per_run: Optional[int] = None,
+                 check_interval_minutes: Optional[float] = None, timezone_name: Optional[str] = None,
+                 reserve_fraction: Optional[float] = None):
+        """
+        Initialize the scheduler
+
+        Args:
+            weather_service: BOMWeatherService whose scraper and warehouse are warmed
+            app: Flask app (needed to read Usage and write the warehouse)
+            top_n: Number of (station, month) pairs to keep warm
+            lookback_days: Usage window used to rank popularity
+            off_peak_hours: Local hour window for prefetching, e.g. "1-5"
+            daily_refresh_hour: Local hour after which the current month is revalidated
+            max_fetches_per_run: Upper bound on BOM requests per run
+            check_interval_minutes: How often the background thread wakes up
+            timezone_name: Time zone for the hour settings
+            reserve_fraction: Share of the rate limiter's burst prefetching never uses
+        """
+        self.service = weather_service
+        self.scraper = weather_service.scraper
+        self.app = app
+
+        self.top_n = top_n or int(os.environ.get('BOM_PREFETCH_TOP_N', '50'))
+        self.lookback_days = lookback_days or int(os.environ.get('BOM_PREFETCH_LOOKBACK_DAYS', '30'))
+        self.off_peak_hours = _parse_hours(off_peak_hours or os.environ.get('BOM_PREFETCH_OFF_PEAK_HOURS', '1-5'))
+        self.daily_refresh_hour = daily_refresh_hour if daily_refresh_hour is not None else int(
+            os.environ.get('BOM_PREFETCH_DAILY_REFRESH_HOUR', '10'))
+        self.max_fetches_per_run = max_fetches_per_run or int(os.environ.get('BOM_PREFETCH_MAX_FETCHES_PER_RUN', '100'))
+        self.check_interval_seconds = (check_interval_minutes or float(
+            os.environ.get('BOM_PREFETCH_CHECK_INTERVAL_MINUTES', '15'))) * 60
+        if reserve_fraction is None:
+            reserve_fraction = float(os.environ.get('BOM_PREFETCH_RESERVE_FRACTION', '0.5'))
+        self.reserve_fraction = min(max(reserve_fraction, 0.0), 1.0)
+        self.timezone = self._get_timezone(timezone_name or os.environ.get('BOM_PREFETCH_TIMEZONE', 'Australia/Brisbane'))
+
+        self.state_path = get_data_dir() / "prefetch_state.json"
+        self._lock_file = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_result: Optional[Dict] = None
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the background thread (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="bom-prefetch", daemon=True)
+        self._thread.start()
+        logger.info(f"Prefetch scheduler started (top {self.top_n}, off-peak {self.off_peak_hours}, "
+                    f"daily refresh after {self.daily_refresh_hour}:00)")
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self._acquire_leadership():
+                    self.last_result = self.run_once()
+            except Exception as e:
+                logger.error(f"Prefetch run failed: {str(e)}")
+            self._stop.wait(self.check_interval_seconds)
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict:
+        """
+        Run whatever is due: the daily current-month refresh and/or the off-peak prefetch
+
+        Args:
+            now: Current time (defaults to now in the scheduler's time zone)
+
+        Returns:
+            Dict describing what ran
+        """
+        now = now or datetime.now(self.timezone)
+        today = now.strftime("%Y-%m-%d")
+        state = read_json(self.state_path, {}) or {}
+        result = {'success': True, 'timestamp': now.isoformat()}
+
+        if now.hour >= self.daily_refresh_hour and state.get('daily_refresh') != today:
+            result['daily_refresh'] = self.refresh_current_month(now)
+            state['daily_refresh'] = today
+            atomic_write_json(self.state_path, state)
+
+        start_hour, end_hour = self.off_peak_hours
+        if start_hour <= now.hour < end_hour and state.get('prefetch') != today:
+            result['prefetch'] = self.prefetch_popular()
+            state['prefetch'] = today
+            atomic_write_json(self.state_path, state)
+
+        return result
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def prefetch_popular(self) -> Dict:
+        """Make sure the top-N station-months are in the CSV store and warehouse"""
+        pairs = self.get_popular_station_months()
+        return self._fetch_pairs(pairs, revalidate=False)
+
+    def refresh_current_month(self, now: Optional[datetime] = None) -> Dict:
+        """Revalidate the current month for the most popular stations"""
+        now = now or datetime.now(self.timezone)
+        current_month = now.strftime("%Y%m")
+        stations = []
+        for station_id, _ in self.get_popular_station_months():
+            if station_id not in stations:
+                stations.append(station_id)
+        return self._fetch_pairs([(station_id, current_month) for station_id in stations], revalidate=True)
+
+    def get_popular_station_months(self) -> List[Tuple[str, str]]:
+        """
+        Rank (station_id, YYYYMM) pairs by recent successful requests
+
+        Requests are resolved to stations without HTTP (station directory for
+        location queries, station catalogue for "lat,lon" queries); requests
+        that cannot be resolved that way are skipped.
+        """
+        rows = self._recent_usage()
+        counts = Counter()
+
+        for location, state, date_from, date_to, requests in rows:
+            station_id = self._resolve_station(location, state)
+            if not station_id:
+                continue
+            for month_key in self._months_between(date_from, date_to):
+                counts[(station_id, month_key)] += requests
+
+        return [pair for pair, _ in counts.most_common(self.top_n)]
+
+    def _fetch_pairs(self, pairs: List[Tuple[str, str]], revalidate: bool) -> Dict:
+        fetched = skipped = failed = 0
+        month_records = {}
+
+        for station_id, month_key in pairs:
+            if fetched >= self.max_fetches_per_run:
+                break
+
+            stored = self.scraper.csv_store.get(station_id, month_key)
+            if stored and (stored['immutable'] or (stored['fresh'] and not revalidate)):
+                skipped += 1
+                continue
+
+            if not self._take_spare_token():
+                logger.info("Prefetch stopped: no spare BOM rate limit budget")
+                break
+
+            # The token was taken above, so the download itself is not rate limited again
+            csv_content = self.scraper._download_month_csv(station_id, month_key, rate_limited=False,
+                                                           revalidate=revalidate)
+            fetched += 1
+            if csv_content is None:
+                failed += 1
+                continue
+            month_records.setdefault(station_id, {})[month_key] = self.scraper._parse_bom_csv(csv_content, month_key)
+
+        if month_records:
+            self._with_app_context(self._store_in_warehouse, month_records)
+
+        logger.info(f"Prefetch {'refresh' if revalidate else 'warm-up'}: {len(pairs)} station-months, "
+                    f"{fetched} fetched, {skipped} already warm, {failed} failed")
+        return {
+            'station_months': len(pairs),
+            'fetched': fetched,
+            'skipped': skipped,
+            'failed': failed
+        }
+
+    def _store_in_warehouse(self, month_records: Dict) -> None:
+        for station_id, months in month_records.items():
+            self.service._store_in_warehouse(station_id, months)
+
+    def _take_spare_token(self, max_wait_seconds: float = 60.0) -> bool:
+        """
+        Take a rate limiter token only while the bucket keeps a reserve for user requests
+
+        Polling try_acquire alone would race user requests sleeping in acquire()
+        for each refilled token; with the reserve, prefetch never takes the
+        bucket below reserve_fraction of its burst, so it only uses budget
+        users are not waiting for.
+        """
+        rate_limiter = self.scraper.http_client.rate_limiter
+        reserve = rate_limiter.burst * self.reserve_fraction
+        deadline = time.monotonic() + max_wait_seconds
+        while not self._stop.is_set():
+            if rate_limiter.try_acquire(reserve=reserve):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            self._stop.wait(1.0 / max(rate_limiter.rate_per_second, 0.01))
+        return False
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _recent_usage(self) -> List[Tuple]:
+        def query():
+            from sqlalchemy import func
+            from models import db
+            from models.usage import Usage
+
+            since = datetime.utcnow() - timedelta(days=self.lookback_days)
+            return db.session.query(
+                Usage.location, Usage.state, Usage.date_from, Usage.date_to, func.count(Usage.id)
+            ).filter(
+                Usage.timestamp >= since,
+                Usage.status_code == 200,
+                Usage.location.isnot(None)
+            ).group_by(
+                Usage.location, Usage.state, Usage.date_from, Usage.date_to
+            ).all()
+
+        return self._with_app_context(query) or []
+
+    def _resolve_station(self, location: str, state: Optional[str]) -> Optional[str]:
+        if state:
+            known_station = self.scraper.station_directory.lookup(location, state)
+            return known_station['station_id'] if known_station else None
+        try:
+            latitude, longitude = (float(part) for part in location.split(','))
+        except ValueError:
+            return None
+        nearest = self.scraper.resolve_nearest_stations(latitude, longitude, k=1)
+        return nearest[0]['station_id'] if nearest else None
+
+    @staticmethod
+    def _months_between(date_from: Optional[str], date_to: Optional[str]) -> List[str]:
+        try:
+            start = datetime.strptime(date_from, "%Y-%m-%d")
+            end = datetime.strptime(date_to or date_from, "%Y-%m-%d")
+        except (TypeError, ValueError):
+            return []
+        months = []
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month) and len(months) < 24:
+            months.append(f"{year}{month:02d}")
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return months
+
+    def _with_app_context(self, fn, *args):
+        if self.app is None:
+            return None
+        with self.app.app_context():
+            return fn(*args)
+
+    def _acquire_leadership(self) -> bool:
+        """Hold the prefetch lock file for the life of this worker (True if we are the leader)"""
+        if self._lock_file is not None or fcntl is None:
+            return True
+        lock_file = open(get_data_dir("locks") / "prefetch.lock", 'a+')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info(f"Prefetch scheduler leadership acquired (pid {os.getpid()})")
+        return True
+
+    @staticmethod
+    def _get_timezone(name: str):
+        if ZoneInfo is not None:
+            try:
+                return ZoneInfo(name)
+            except Exception:
+                pass
+        return timezone(timedelta(hours=10), 'AEST')
+
+    def get_stats(self) -> Dict:
+        """Get scheduler status"""
+        return {
+            'enabled': True,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'leader': self._lock_file is not None,
+            'top_n': self.top_n,
+            'off_peak_hours': f"{self.off_peak_hours[0]}-{self.off_peak_hours[1]}",
+            'daily_refresh_hour': self.daily_refresh_hour,
+            'reserve_fraction': self.reserve_fraction,
+            'state': read_json(self.state_path, {}),
+            'last_result': self.last_result
+        }
+
+
+_scheduler = None
+
+
+def start_prefetch_scheduler(app, get_service) -> Optional[PrefetchScheduler]:
+    """
+    Start the prefetch scheduler for this worker if BOM_PREFETCH_ENABLED=true
+
+    Args:
+        app: Flask application
+        get_service: Returns the service to warm (the singleton the routes use)
+
+    Returns:
+        The scheduler, or None if disabled
+    """
+    global _scheduler
+    if os.environ.get('BOM_PREFETCH_ENABLED', 'false').lower() != 'true':
+        return None
+    if _scheduler is None:
+        weather_service = get_service()
+        _scheduler = PrefetchScheduler(weather_service, app)
+        weather_service.prefetch_scheduler = _scheduler
+        _scheduler.start()
+    return _scheduler
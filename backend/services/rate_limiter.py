@@ -0,0 +1,288 @@
+"""
+Shared Token Bucket Rate Limiter
+Version: v1.2 • Updated: 2026-10-17 09:30 AEST (Brisbane)
+A failed SQLite call falls back to the in-process bucket for that call only
+try_acquire can leave a reserve in the bucket (background work yields to requests)
+
+Global politeness limit for upstream BOM requests.
+
+The bucket state lives in a small SQLite database (WAL mode), so every
+thread and every gunicorn worker on a node draws from the same budget.
+Tokens refill continuously at `rate_per_second` up to `burst`; a request
+only waits when the bucket is empty.
+
+If the database errors (e.g. "database is locked" past the busy timeout)
+that one call is served from an in-process bucket and the next call goes
+back to SQLite, so a worker never leaves the node-wide budget for good.
+If the database cannot be opened at all, it is retried every
+DB_RETRY_SECONDS.
+
+Callers can:
+- acquire()              block until a token is available (optionally with a timeout)
+- acquire(blocking=False) fail fast with RateLimitExceeded
+- try_acquire(reserve=n)  take a token only if n more would still be left
+                         (lets background jobs use spare budget only)
+- await acquire_async()  wait without blocking the event loop
+"""
+
+import os
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from bom_storage import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+DB_RETRY_SECONDS = 30.0
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a token is not available and the caller chose not to wait (or waited too long)"""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucketRateLimiter:
+    """Token bucket shared across threads and processes via SQLite"""
+
+    def __init__(self, name: str = 'bom', rate_per_second: Optional[float] = None,
+                 burst: Optional[float] = None, db_path: Optional[Path] = None,
+                 max_wait_seconds: Optional[float] = None):
+        """
+        Initialize the rate limiter
+
+        Args:
+            name: Bucket name (limiters with the same name and db share one budget)
+            rate_per_second: Token refill rate
+            burst: Bucket capacity (requests allowed back-to-back after idle time)
+            db_path: SQLite file (defaults to BOM_DATA_DIR/rate_limiter.sqlite3)
+            max_wait_seconds: Default timeout for blocking acquires (None = wait forever)
+        """
+        if rate_per_second is None:
+            rate_per_second = float(os.environ.get('BOM_RATE_LIMIT_PER_SECOND', '0.5'))
+        if burst is None:
+            burst = float(os.environ.get('BOM_RATE_LIMIT_BURST', '4'))
+        if max_wait_seconds is None:
+            max_wait_env = os.environ.get('BOM_RATE_LIMIT_MAX_WAIT_SECONDS', '60')
+            max_wait_seconds = float(max_wait_env) if max_wait_env else None
+
+        self.name = name
+        self.rate_per_second = max(rate_per_second, 1e-6)
+        self.burst = max(burst, 1.0)
+        self.max_wait_seconds = max_wait_seconds
+        self.db_path = Path(db_path) if db_path else Path(
+            os.environ.get('BOM_RATE_LIMIT_DB', str(get_data_dir() / "rate_limiter.sqlite3"))
+        )
+
+        self._local = threading.local()
+        self._fallback_lock = threading.Lock()
+        self._fallback_state = None  # In-process bucket used while SQLite is unavailable
+        self._db_ready = False
+        self._db_retry_at = 0.0
+        self._stats_lock = threading.Lock()
+        self.acquired = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.fallbacks = 0
+
+        self._init_db()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def try_acquire(self, tokens: float = 1.0, reserve: float = 0.0) -> bool:
+        """
+        Take tokens if available right now; never waits
+
+        Args:
+            tokens: Tokens to take
+            reserve: Only take them if at least this many would remain afterwards
+        """
+        acquired = self._take(tokens, reserve) == 0.0
+        self._record(acquired, 0.0)
+        return acquired
+
+    def acquire(self, tokens: float = 1.0, blocking: bool = True, timeout: Optional[float] = None) -> float:
+        """
+        Take tokens, waiting for the bucket to refill if needed
+
+        Args:
+            tokens: Tokens to take
+            blocking: Wait for tokens (False = fail fast)
+            timeout: Maximum seconds to wait (defaults to max_wait_seconds)
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            RateLimitExceeded: If tokens are unavailable and blocking is False,
+                               or if they would not be available within the timeout
+        """
+        timeout = self.max_wait_seconds if timeout is None else timeout
+        started = time.monotonic()
+
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                waited = time.monotonic() - started
+                self._record(True, waited)
+                return waited
+
+            waited = time.monotonic() - started
+            if not blocking or (timeout is not None and waited + wait > timeout):
+                self._record(False, waited)
+                raise RateLimitExceeded(
+                    f"BOM rate limit budget exhausted (retry after {wait:.1f}s)", retry_after=wait
+                )
+
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1.0, timeout: Optional[float] = None) -> float:
+        """Async version of acquire() - waits with asyncio.sleep instead of blocking the thread"""
+        timeout = self.max_wait_seconds if timeout is None else timeout
+        started = time.monotonic()
+
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                waited = time.monotonic() - started
+                self._record(True, waited)
+                return waited
+
+            waited = time.monotonic() - started
+            if timeout is not None and waited + wait > timeout:
+                self._record(False, waited)
+                raise RateLimitExceeded(
+                    f"BOM rate limit budget exhausted (retry after {wait:.1f}s)", retry_after=wait
+                )
+
+            await asyncio.sleep(wait)
+
+    def get_stats(self) -> Dict:
+        """Get limiter configuration and counters"""
+        return {
+            'name': self.name,
+            'backend': 'sqlite' if self._db_ready else 'memory',
+            'db_path': str(self.db_path),
+            'rate_per_second': self.rate_per_second,
+            'burst': self.burst,
+            'max_wait_seconds': self.max_wait_seconds,
+            'acquired': self.acquired,
+            'rejected': self.rejected,
+            'fallbacks': self.fallbacks,
+            'total_wait_seconds': round(self.total_wait_seconds, 3)
+        }
+
+    # ------------------------------------------------------------------
+    # Bucket state
+    # ------------------------------------------------------------------
+
+    def _take(self, tokens: float, reserve: float = 0.0) -> float:
+        """Refill and take tokens atomically (leaving reserve); returns 0.0 on success or seconds until enough"""
+        if not self._db_ready and time.time() >= self._db_retry_at:
+            self._init_db()
+        if self._db_ready:
+            try:
+                return self._take_sqlite(tokens, reserve)
+            except sqlite3.Error as e:
+                # This call only - the next one tries the shared bucket again
+                logger.warning(f"Rate limiter database error, using in-process bucket for this request: {str(e)}")
+                self._close_connection()
+        with self._stats_lock:
+            self.fallbacks += 1
+        return self._take_memory(tokens, reserve)
+
+    def _take_sqlite(self, tokens: float, reserve: float = 0.0) -> float:
+        conn = self._connection()
+        # If BEGIN itself fails there is no transaction to roll back - let its error through
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            available, updated = row if row else (self.burst, now)
+            available = self._refill(available, updated, now)
+
+            if available >= tokens + reserve:
+                available -= tokens
+                wait = 0.0
+            else:
+                wait = (tokens + reserve - available) / self.rate_per_second
+
+            conn.execute(
+                "INSERT INTO buckets (name, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (self.name, available, now)
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            if conn.in_transaction:
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass  # Keep the original error
+            raise
+
+    def _take_memory(self, tokens: float, reserve: float = 0.0) -> float:
+        with self._fallback_lock:
+            now = time.time()
+            if self._fallback_state is None:
+                self._fallback_state = [self.burst, now]
+            available = self._refill(self._fallback_state[0], self._fallback_state[1], now)
+            if available >= tokens + reserve:
+                self._fallback_state = [available - tokens, now]
+                return 0.0
+            self._fallback_state = [available, now]
+            return (tokens + reserve - available) / self.rate_per_second
+
+    def _refill(self, available: float, updated: float, now: float) -> float:
+        return min(self.burst, available + max(0.0, now - updated) * self.rate_per_second)
+
+    def _record(self, acquired: bool, waited: float) -> None:
+        with self._stats_lock:
+            if acquired:
+                self.acquired += 1
+            else:
+                self.rejected += 1
+            self.total_wait_seconds += waited
+
+    def _connection(self) -> sqlite3.Connection:
+        """One SQLite connection per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _close_connection(self) -> None:
+        """Drop this thread's connection so the next call reconnects"""
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _init_db(self) -> None:
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._db_ready = True
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Rate limiter database unavailable, using in-process bucket: {str(e)}")
+            self._close_connection()
+            self._db_retry_at = time.time() + DB_RETRY_SECONDS
@@ -0,0 +1,327 @@
+"""
+Shared Station-Month Block Store (L2 cache)
+Version: v1.0 • Updated: 2026-10-16 21:30 AEST (Brisbane)
+
+Node-wide second tier behind each worker's in-process ObservationCache.
+Every gunicorn worker reads and writes the same store, so a month scraped
+(or prefetched) by one worker is a cache hit in all of them, and hit rates
+no longer fall as workers are added.
+
+Backends (BOM_CACHE_L2):
+- sqlite (default): one SQLite file in WAL mode (BOM_CACHE_L2_DB, defaults
+  to BOM_DATA_DIR/observation_cache.sqlite3) shared by all workers on the node
+- redis: a Redis-compatible server (BOM_CACHE_REDIS_URL, else REDIS_URL);
+  needs the optional `redis` package, falls back to sqlite without it
+- none: no shared tier (each worker caches on its own, as before)
+
+Values are ObservationBlock.to_bytes() plus source, cached_at and expires
+(epoch seconds). A generation counter is bumped by clear(); workers poll it
+to drop their L1 copies, so an admin cache clear reaches every worker.
+
+A store that fails is logged and treated as empty - the L1 cache and the
+scrape path carry on without it.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from bom_storage import get_data_dir
+
+try:
+    import redis
+except ImportError:  # redis is optional - only needed for BOM_CACHE_L2=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteBlockStore:
+    """Station-month blocks in a SQLite file shared by every worker on the node"""
+
+    backend = 'sqlite'
+
+    def __init__(self, db_path: Optional[Path] = None, max_entries: Optional[int] = None):
+        """
+        Initialize the store
+
+        Args:
+            db_path: SQLite file (defaults to BOM_DATA_DIR/observation_cache.sqlite3)
+            max_entries: Most station-months kept (earliest expiring dropped first by sweep)
+        """
+        if max_entries is None:
+            max_entries = int(os.environ.get('BOM_CACHE_L2_MAX_ENTRIES', '50000'))
+
+        self.db_path = Path(db_path) if db_path else Path(
+            os.environ.get('BOM_CACHE_L2_DB', str(get_data_dir() / "observation_cache.sqlite3"))
+        )
+        self.max_entries = max(max_entries, 1)
+        self.available = True
+
+        self._local = threading.local()
+        self._init_db()
+
+    def get_many(self, station_id: str, month_keys: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Stored months of a station
+
+        Returns:
+            month_key → {'data', 'source', 'cached_at', 'expires', 'purge_at'} for the months present
+        """
+        month_keys = list(month_keys)
+        if not self.available or not month_keys:
+            return {}
+        try:
+            rows = self._connection().execute(
+                f"SELECT month_key, data, source, cached_at, expires, purge_at FROM months "
+                f"WHERE station_id = ? AND month_key IN ({','.join('?' * len(month_keys))})",
+                [station_id, *month_keys]
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache read failed: {str(e)}")
+            return {}
+        return {
+            month_key: {'data': data, 'source': source, 'cached_at': cached_at,
+                        'expires': expires, 'purge_at': purge_at}
+            for month_key, data, source, cached_at, expires, purge_at in rows
+        }
+
+    def put(self, station_id: str, month_key: str, data: bytes, source: str,
+            cached_at: float, expires: float, purge_at: float) -> None:
+        """Store one station-month (an older copy never replaces a newer one)"""
+        if not self.available:
+            return
+        try:
+            self._connection().execute(
+                "INSERT INTO months (station_id, month_key, data, source, cached_at, expires, purge_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(station_id, month_key) DO UPDATE SET data = excluded.data, "
+                "source = excluded.source, cached_at = excluded.cached_at, "
+                "expires = excluded.expires, purge_at = excluded.purge_at "
+                "WHERE excluded.cached_at >= months.cached_at",
+                (station_id, month_key, sqlite3.Binary(data), source, cached_at, expires, purge_at)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache write failed: {str(e)}")
+
+    def generation(self) -> Optional[int]:
+        """Clear counter (changes whenever any worker clears the store); None if unavailable"""
+        if not self.available:
+            return None
+        try:
+            row = self._connection().execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache read failed: {str(e)}")
+            return None
+        return row[0] if row else 0
+
+    def clear(self) -> int:
+        """Drop every month and bump the generation; returns the number removed"""
+        if not self.available:
+            return 0
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                removed = conn.execute("DELETE FROM months").rowcount
+                conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'generation'")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache clear failed: {str(e)}")
+            return 0
+        return removed
+
+    def sweep(self) -> int:
+        """Drop months past their stale window, then the earliest expiring over max_entries"""
+        if not self.available:
+            return 0
+        try:
+            conn = self._connection()
+            removed = conn.execute("DELETE FROM months WHERE purge_at <= ?", (time.time(),)).rowcount
+            removed += conn.execute(
+                "DELETE FROM months WHERE rowid IN (SELECT rowid FROM months ORDER BY expires "
+                "LIMIT MAX((SELECT COUNT(*) FROM months) - ?, 0))",
+                (self.max_entries,)
+            ).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache sweep failed: {str(e)}")
+            return 0
+        return removed
+
+    def get_stats(self) -> Dict:
+        """Get store statistics"""
+        stats = {'backend': self.backend, 'available': self.available, 'path': str(self.db_path),
+                 'max_entries': self.max_entries}
+        if self.available:
+            try:
+                entries, total_bytes = self._connection().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM months"
+                ).fetchone()
+                stats.update({'entries': entries, 'bytes': total_bytes})
+            except sqlite3.Error as e:
+                stats['error'] = str(e)
+        return stats
+
+    def _connection(self) -> sqlite3.Connection:
+        """One SQLite connection per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS months ("
+                "station_id TEXT NOT NULL, month_key TEXT NOT NULL, data BLOB NOT NULL, "
+                "source TEXT, cached_at REAL NOT NULL, expires REAL NOT NULL, purge_at REAL NOT NULL, "
+                "PRIMARY KEY (station_id, month_key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_months_purge_at ON months (purge_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('generation', 0)")
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Shared cache database unavailable, caching per worker only: {str(e)}")
+            self.available = False
+
+
+class RedisBlockStore:
+    """Station-month blocks in a Redis-compatible server (expiry handled by Redis)"""
+
+    backend = 'redis'
+
+    def __init__(self, url: Optional[str] = None, prefix: Optional[str] = None):
+        """
+        Initialize the store
+
+        Args:
+            url: Server URL (defaults to BOM_CACHE_REDIS_URL, then REDIS_URL)
+            prefix: Key prefix, so several deployments can share a server
+        """
+        if redis is None:
+            raise RuntimeError("redis package is not installed")
+        if url is None:
+            url = os.environ.get('BOM_CACHE_REDIS_URL') or os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+        if prefix is None:
+            prefix = os.environ.get('BOM_CACHE_REDIS_PREFIX', 'fetcha:bom:')
+
+        self.prefix = prefix
+        self.available = True
+        self._client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        self._client.ping()
+
+    def get_many(self, station_id: str, month_keys: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Stored months of a station
+
+        Returns:
+            month_key → {'data', 'source', 'cached_at', 'expires', 'purge_at'} for the months present
+        """
+        month_keys = list(month_keys)
+        if not month_keys:
+            return {}
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for month_key in month_keys:
+                pipe.hgetall(self._key(station_id, month_key))
+            rows = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Shared cache read failed: {str(e)}")
+            return {}
+        return {
+            month_key: {
+                'data': row[b'data'],
+                'source': row[b'source'].decode('utf-8'),
+                'cached_at': float(row[b'cached_at']),
+                'expires': float(row[b'expires']),
+                'purge_at': float(row[b'purge_at'])
+            }
+            for month_key, row in zip(month_keys, rows) if row
+        }
+
+    def put(self, station_id: str, month_key: str, data: bytes, source: str,
+            cached_at: float, expires: float, purge_at: float) -> None:
+        """Store one station-month; Redis drops it at the end of its stale window"""
+        key = self._key(station_id, month_key)
+        try:
+            pipe = self._client.pipeline()
+            pipe.hset(key, mapping={'data': data, 'source': source, 'cached_at': cached_at,
+                                    'expires': expires, 'purge_at': purge_at})
+            pipe.expireat(key, int(purge_at) + 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Shared cache write failed: {str(e)}")
+
+    def generation(self) -> Optional[int]:
+        """Clear counter (changes whenever any worker clears the store); None if unavailable"""
+        try:
+            value = self._client.get(self.prefix + 'generation')
+        except redis.RedisError as e:
+            logger.warning(f"Shared cache read failed: {str(e)}")
+            return None
+        return int(value) if value else 0
+
+    def clear(self) -> int:
+        """Drop every month and bump the generation; returns the number removed"""
+        removed = 0
+        try:
+            batch = []
+            for key in self._client.scan_iter(match=self.prefix + 'month:*', count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    removed += self._client.delete(*batch)
+                    batch = []
+            if batch:
+                removed += self._client.delete(*batch)
+            self._client.incr(self.prefix + 'generation')
+        except redis.RedisError as e:
+            logger.warning(f"Shared cache clear failed: {str(e)}")
+        return removed
+
+    def sweep(self) -> int:
+        """Nothing to do - keys expire in Redis at the end of their stale window"""
+        return 0
+
+    def get_stats(self) -> Dict:
+        """Get store statistics"""
+        return {'backend': self.backend, 'available': self.available, 'prefix': self.prefix}
+
+    def _key(self, station_id: str, month_key: str) -> str:
+        return f"{self.prefix}month:{station_id}:{month_key}"
+
+
+def create_shared_store(backend: Optional[str] = None):
+    """
+    Build the configured shared store
+
+    Args:
+        backend: 'sqlite', 'redis' or 'none' (defaults to BOM_CACHE_L2)
+
+    Returns:
+        A block store, or None when the shared tier is disabled
+    """
+    if backend is None:
+        backend = os.environ.get('BOM_CACHE_L2', 'sqlite')
+    backend = backend.lower()
+
+    if backend in ('none', 'off', 'false', ''):
+        return None
+    if backend == 'redis':
+        try:
+            return RedisBlockStore()
+        except Exception as e:
+            logger.warning(f"Redis shared cache unavailable, using SQLite: {str(e)}")
+    elif backend != 'sqlite':
+        logger.warning(f"Unknown BOM_CACHE_L2 backend '{backend}', using SQLite")
+    return SQLiteBlockStore()
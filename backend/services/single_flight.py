@@ -0,0 +1,186 @@
+"""
+Single-Flight Request Coalescing
+Version: v1.0 • Updated: 2026-10-16 11:55 AEST (Brisbane)
+
+Ensures only one fetch per key is in flight at a time.
+
+- Within a worker: concurrent callers for the same key wait for the leader's
+  call and share its result (or its exception).
+- Across workers (optional): the leader also holds a striped lock file under
+  BOM_DATA_DIR/locks, so a second worker waits for the first to finish and then
+  finds the result in the shared on-disk stores instead of scraping again.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows - cross-worker coalescing is unavailable
+    fcntl = None
+
+from bom_storage import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """An in-flight call that followers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution"""
+
+    def __init__(self, cross_worker: Optional[bool] = None, lock_dir: Optional[Path] = None,
+                 lock_stripes: int = 64, lock_timeout_seconds: float = 120.0):
+        """
+        Initialize the single-flight group
+
+        Args:
+            cross_worker: Also coalesce across processes using lock files
+            lock_dir: Directory for lock files (defaults to BOM_DATA_DIR/locks)
+            lock_stripes: Number of lock files keys are hashed onto
+            lock_timeout_seconds: Give up waiting for another worker after this long and run anyway
+        """
+        if cross_worker is None:
+            cross_worker = os.environ.get('BOM_SINGLE_FLIGHT_CROSS_WORKER', 'false').lower() == 'true'
+
+        self.cross_worker = cross_worker and fcntl is not None
+        self.lock_dir = Path(lock_dir) if lock_dir else None
+        self.lock_stripes = max(1, lock_stripes)
+        self.lock_timeout_seconds = lock_timeout_seconds
+
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._file_locks: Dict[int, '_FileLock'] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, worker_lock: bool = True, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) unless a call with the same key is already in flight
+
+        Args:
+            key: Coalescing key (e.g. ('csv', station_id, month_key))
+            fn: Function to run
+            worker_lock: Take the cross-worker lock (when enabled). Only leaf calls
+                         should take it - nesting striped file locks can deadlock.
+
+        Returns:
+            The leader's result (followers receive the same object)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if self.cross_worker and worker_lock:
+                with self._worker_lock(key):
+                    call.result = fn(*args, **kwargs)
+            else:
+                call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def get_stats(self) -> Dict:
+        """Get coalescing statistics"""
+        with self._lock:
+            in_flight = len(self._calls)
+        return {
+            'cross_worker': self.cross_worker,
+            'in_flight': in_flight,
+            'executions': self.executions,
+            'coalesced': self.coalesced
+        }
+
+    def _worker_lock(self, key: Hashable) -> '_FileLock':
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        stripe = int(digest[:8], 16) % self.lock_stripes
+        lock_dir = self.lock_dir or get_data_dir("locks")
+        with self._lock:
+            lock = self._file_locks.get(stripe)
+            if lock is None:
+                lock = _FileLock(lock_dir / f"flight-{stripe:03d}.lock", self.lock_timeout_seconds)
+                self._file_locks[stripe] = lock
+        return lock
+
+
+class _FileLock:
+    """
+    Exclusive advisory lock on a file (fcntl.flock) with a polling timeout
+
+    Re-entrant for the owning thread, so nested flights whose keys hash to the
+    same stripe cannot deadlock; other threads in this process wait on a
+    thread lock before contending for the file lock.
+    """
+
+    def __init__(self, path: Path, timeout_seconds: float):
+        self.path = path
+        self.timeout_seconds = timeout_seconds
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        self._depth += 1
+        if self._depth > 1:
+            return self
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a+')
+        deadline = time.monotonic() + self.timeout_seconds
+
+        while True:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return self
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    logger.warning(f"Timed out waiting for {self.path.name}; running without cross-worker lock")
+                    self._file.close()
+                    self._file = None
+                    return self
+                time.sleep(0.05)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._depth -= 1
+            if self._depth == 0 and self._file is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                self._file.close()
+                self._file = None
+        finally:
+            self._thread_lock.release()
+        return False
@@ -1,7 +1,28 @@
 #!/usr/bin/env python3
 """
 Smart HTML Parsing BOM Scraper (Efficient Workflow)
-Version: v1.0 • Updated: 2025-09-15 20:46 AEST (Brisbane)
+Version: v2.1 • Updated: 2026-10-17 09:10 AEST (Brisbane)
+Added persistent station directory - warm lookups skip phases 2-4
+Added on-disk monthly CSV store - closed months are never refetched
+Added async fetch engine - multi-month requests download concurrently
+Added conditional GET revalidation for the current month CSV
+Added single-flight coalescing of location resolution and month downloads
+Switched to the single-pass streaming CSV parser (bom_csv_parser)
+Records are typed ObservationRecords (numbers, None for missing values)
+Replaced per-request JSON dumps with the write-behind observation archive
+Location matching uses a token/trigram index over the full station catalogue
+Added station coordinates catalogue - nearest-station lookup by latitude/longitude
+Month downloads can force revalidation (used by the prefetch scheduler)
+DWO pages are read with anchor-only link extraction instead of a full BeautifulSoup tree
+Results report months served from a stale stored copy (BOM down / circuit open)
+Added short-TTL negative cache for unknown locations and months BOM has no CSV for
+BOM_BASE_URL points the scraper at another host (e.g. benchmarks/fake_bom_server.py)
+Phases are timed into the request's PhaseTimer (state page, letter groups, match, CSVs)
+Concurrent month downloads check the CSV store before taking a rate limit token
+A state whose letter group pages did not all load is an upstream error, not "not found"
+"Not found" (and its negative cache entry) needs a complete catalogue and a closed circuit
+Months that failed upstream are told apart from unpublished (404) ones - an
+extraction with no data and upstream failures is an upstream_error
 
 🧠 SMART HTML PARSING SCRAPER 🧠
 Implements your brilliant idea:
@@ -19,18 +40,27 @@ import sys
 import os
 import time
 import logging
-import json
-import csv
+import threading
 import re
-import requests
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
-import io
-from bs4 import BeautifulSoup
 
 # Import our enhanced HTTP client
 from enhanced_http_client import EnhancedBOMHTTPClient
+from station_directory import StationDirectory
+from csv_store import MonthlyCSVStore
+from async_fetch_engine import AsyncBOMFetchEngine
+from single_flight import SingleFlight
+from bom_csv_parser import parse_observations
+from observation_records import ObservationRecord
+from observation_archive import ObservationArchive
+from location_index import LocationIndex
+from station_catalogue import StationCatalogue, parse_station_list
+from html_links import extract_links
+from negative_cache import NegativeCache
+from phase_timer import current_timer, timed_phase
 
 # Add the camoufox API path for browser automation
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "Fields" / "Property Scraping_V3" / "00_camoufox" / "Camoufox_API"))
@@ -42,14 +72,46 @@ logger = logging.getLogger(__name__)
 class SmartHTMLParsingBOMScraper:
     """Smart BOM scraper using HTML parsing to bypass navigation issues"""
     
-    def __init__(self):
-        self.base_url = "https://www.bom.gov.au"
-        self.download_dir = Path(__file__).parent / "daily_observations_data"
-        self.download_dir.mkdir(exist_ok=True)
+    def __init__(self, single_flight: Optional[SingleFlight] = None):
+        # Overridable for offline runs against benchmarks/fake_bom_server.py
+        self.base_url = os.environ.get('BOM_BASE_URL', "https://www.bom.gov.au").rstrip('/')
         
         # Initialize enhanced HTTP client
         self.http_client = EnhancedBOMHTTPClient()
         
+        # Persistent station directory (skips phases 2-4 on warm lookups)
+        self.station_directory = StationDirectory()
+        
+        # Content-addressed store of monthly CSVs (closed months are never refetched)
+        self.csv_store = MonthlyCSVStore()
+        
+        # Concurrent downloader for multi-month requests
+        self.fetch_engine = AsyncBOMFetchEngine(self.http_client)
+        
+        # Coalesces concurrent location resolutions and station-month downloads
+        self.single_flight = single_flight or SingleFlight()
+        
+        # Write-behind archive of parsed station-months (off the request path)
+        self.archive = ObservationArchive()
+        
+        # Recent "not found" results (unknown locations, 404 months) so retries don't re-scrape
+        self.negative_cache = NegativeCache()
+        
+        # Station-months whose last download failed because of BOM (error, block,
+        # open circuit) rather than a 404 - shared so single-flight followers see it
+        self._upstream_failures: 'OrderedDict[Tuple[str, str], float]' = OrderedDict()
+        self._upstream_failures_lock = threading.Lock()
+        
+        # Token/trigram index over every known station (rebuilt when the directory changes)
+        self._location_index = None
+        self._location_index_signature = None
+        self._location_index_lock = threading.Lock()
+        
+        # Station coordinates with a spatial index (nearest station by lat/lon)
+        self.station_catalogue = StationCatalogue()
+        self.station_list_url = os.environ.get('BOM_STATION_LIST_URL',
+                                               f"{self.base_url}/climate/data/lists_by_element/stations.txt")
+        
         # State to daily weather observation codes (corrected mappings)
         self.state_daily_codes = {
             'queensland': 'IDCJDW0400',
@@ -96,71 +158,342 @@ class SmartHTMLParsingBOMScraper:
         print(f"🎯 Method: HTML parsing → Direct letter group access")
         
         try:
-            # Phase 1: Get daily weather observations page URL
-            print(f"\n📌 PHASE 1: Get daily weather observations page...")
-            daily_obs_code = self._get_daily_obs_code(state)
-            if not daily_obs_code:
-                return {
-                    'success': False,
-                    'error': f"Unknown state: {state}"
-                }
+            # Phases 1-4: Resolve location to a station (station directory first)
+            station = self.resolve_station(location, state)
             
-            daily_obs_url = f"{self.base_url}/climate/dwo/{daily_obs_code}.shtml"
-            print(f"🔗 Daily obs URL: {daily_obs_url}")
+            if not station['success']:
+                return station
             
-            # Phase 2: Pull HTML and parse letter group links
-            print(f"\n📌 PHASE 2: Parse HTML to find letter group links...")
-            letter_group_links = self._parse_letter_group_links(daily_obs_url)
+            station_id = station['station_id']
+            print(f"🏢 Discovered Station ID: {station_id}")
             
-            if not letter_group_links:
-                return {
-                    'success': False,
-                    'error': "Could not find letter group links"
-                }
+            # Phase 5: Extract weather data using plain text CSV
+            print(f"\n📌 PHASE 5: Extract weather data using plain text CSV...")
+            result = self._extract_csv_data(station_id, target_dates, location, state)
             
-            print(f"✅ Found {len(letter_group_links)} letter group links")
-            for group, url in letter_group_links.items():
-                print(f"   📝 {group}: {url}")
+            return result
             
-            # Phase 3: Determine which letter group contains our location (adaptive)
-            print(f"\n📌 PHASE 3: Determine letter group for location...")
-            target_letter_group, target_url = self._find_adaptive_letter_group(location, letter_group_links)
+        except Exception as e:
+            logger.error(f"Smart parsing extraction failed: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'location': location,
+                'state': state
+            }
+
+    def extract_weather_for_station(self, station_id: str, target_dates: List[str],
+                                    location: str, state: str) -> Dict:
+        """
+        Extract weather data for an already resolved station (skips phases 1-4)
+        
+        Args:
+            station_id: DWO station ID (e.g. IDCJDW7025)
+            target_dates: List of dates in YYYY-MM-DD format
+            location: Station or location name (for logging and archive metadata)
+            state: State name
             
-            if not target_url:
-                return {
-                    'success': False,
-                    'error': f"No letter group found for location '{location}'. Available groups: {list(letter_group_links.keys())}"
-                }
+        Returns:
+            Dictionary with extraction results
+        """
+        
+        print(f"\n🧠 STATION EXTRACTION: {station_id} ({location}, {state})")
+        print(f"📅 Target Dates: {len(target_dates)} dates")
+        
+        try:
+            print(f"\n📌 PHASE 5: Extract weather data using plain text CSV...")
+            return self._extract_csv_data(station_id, target_dates, location, state)
+        except Exception as e:
+            logger.error(f"Station extraction failed: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'station_id': station_id
+            }
+
+    def resolve_nearest_stations(self, latitude: float, longitude: float, k: int = 3,
+                                 max_distance_km: Optional[float] = None) -> List[Dict]:
+        """
+        Find the k nearest DWO stations to a point (no HTTP)
+        
+        Args:
+            latitude: Latitude in decimal degrees (negative south)
+            longitude: Longitude in decimal degrees
+            k: Number of stations to return
+            max_distance_km: Ignore stations further away than this
             
-            print(f"🎯 Target letter group: {target_letter_group}")
-            print(f"🔗 Direct URL: {target_url}")
+        Returns:
+            Station dicts with distance_km, nearest first (empty until the
+            station catalogue has been built - see refresh_station_catalogue)
+        """
+        return self.station_catalogue.nearest(latitude, longitude, k=k, max_distance_km=max_distance_km)
+
+    def resolve_station(self, location: str, state: str) -> Dict:
+        """
+        Resolve a location to a BOM station ID (phases 1-4)
+        
+        Consults the persistent station directory first so a warm lookup
+        needs no HTTP requests at all.
+        
+        Args:
+            location: Location name (e.g., "Melbourne", "Cairns")
+            state: State name (e.g., "Victoria", "Queensland")
             
-            # Phase 4: Open letter group page directly and find location
-            print(f"\n📌 PHASE 4: Open letter group page directly...")
-            station_id = self._find_location_in_letter_group(target_url, location)
+        Returns:
+            Dictionary with success flag and station_id or error
+        """
+        
+        # Phase 1: Get daily weather observations page URL
+        print(f"\n📌 PHASE 1: Get daily weather observations page...")
+        daily_obs_code = self._get_daily_obs_code(state)
+        if not daily_obs_code:
+            return {
+                'success': False,
+                'error': f"Unknown state: {state}"
+            }
+        
+        with timed_phase('station_match'):
+            known_station = self._lookup_station_directory(location, state)
+        if known_station:
+            return known_station
+        
+        negative_key = (state.lower().strip(), ' '.join(location.lower().split()))
+        not_found = self.negative_cache.get('location', negative_key)
+        if not_found:
+            print(f"⚡ Negative cache hit: {location}, {state}")
+            return {
+                'success': False,
+                'error': not_found['reason'],
+                'not_found': True
+            }
+        
+        # Concurrent requests for the same location share one scrape
+        location_key = ('resolve',) + negative_key
+        result = self.single_flight.do(location_key, self._resolve_station_from_bom,
+                                       location, state, daily_obs_code)
+        # Only a definite miss is remembered - upstream trouble must be retried
+        if result.get('not_found') and not result.get('upstream_error'):
+            self.negative_cache.put('location', negative_key, result['error'])
+        return result
+
+    def _lookup_station_directory(self, location: str, state: str) -> Optional[Dict]:
+        """Resolve a location from the persistent station directory (no HTTP)"""
+        
+        known_station = self.station_directory.lookup(location, state)
+        if not known_station:
+            return None
+        
+        print(f"⚡ Station directory hit: {location} → {known_station['station_id']}")
+        return {
+            'success': True,
+            'station_id': known_station['station_id'],
+            'letter_group': known_station.get('letter_group'),
+            'station_name': known_station.get('station_name'),
+            'source': 'station_directory'
+        }
+
+    def _resolve_station_from_bom(self, location: str, state: str, daily_obs_code: str) -> Dict:
+        """Resolve a location by parsing the DWO state and letter group pages (phases 2-4)"""
+        
+        # Another request (or worker) may have resolved it while we waited our turn
+        known_station = self._lookup_station_directory(location, state)
+        if known_station:
+            return known_station
+        
+        daily_obs_url = f"{self.base_url}/climate/dwo/{daily_obs_code}.shtml"
+        print(f"🔗 Daily obs URL: {daily_obs_url}")
+        
+        # Phase 2: Pull HTML and parse letter group links
+        print(f"\n📌 PHASE 2: Parse HTML to find letter group links...")
+        letter_group_links = self.station_directory.get_letter_groups(state)
+        
+        if letter_group_links:
+            print(f"⚡ Using {len(letter_group_links)} letter group links from station directory")
+        else:
+            with timed_phase('state_page'):
+                letter_group_links = self._parse_letter_group_links(daily_obs_url)
+            if letter_group_links:
+                self.station_directory.set_letter_groups(state, letter_group_links)
+        
+        if not letter_group_links:
+            return {
+                'success': False,
+                'error': "Could not find letter group links",
+                'upstream_error': True
+            }
+        
+        print(f"✅ Found {len(letter_group_links)} letter group links")
+        for group, url in letter_group_links.items():
+            print(f"   📝 {group}: {url}")
+        
+        # Phase 3: Make sure every letter group's station list is known (no letter guessing)
+        print(f"\n📌 PHASE 3: Load the state's full station catalogue...")
+        missing_groups = self.station_directory.get_missing_groups(state) or {}
+        if missing_groups:
+            with timed_phase('letter_groups'):
+                self._fetch_group_stations(state, missing_groups)
             
-            if not station_id:
+            # Searching a partial catalogue could miss the station (or pick the wrong one)
+            missing_groups = self.station_directory.get_missing_groups(state) or {}
+            if missing_groups:
+                return {
+                    'success': False,
+                    'error': (f"Station list incomplete for {state}: letter group page(s) "
+                              f"{', '.join(sorted(missing_groups))} could not be loaded from BOM - try again shortly"),
+                    'upstream_error': True
+                }
+        
+        # Phase 4: Rank every station in the catalogue against the location
+        print(f"\n📌 PHASE 4: Search station index for location...")
+        with timed_phase('station_match'):
+            candidates = self._get_location_index().search(location, state=state)
+        
+        if not candidates:
+            if self._circuit_open():
+                # The catalogue may predate stations BOM added - don't claim "not found" while it is down
                 return {
                     'success': False,
-                    'error': f"Location '{location}' not found in letter group {target_letter_group}"
+                    'error': f"Location '{location}' not in the cached {state} station list and BOM is unavailable - try again shortly",
+                    'upstream_error': True
                 }
+            return {
+                'success': False,
+                'error': f"Location '{location}' not found in {state} station catalogue",
+                'not_found': True
+            }
+        
+        best_match = candidates[0]['station']
+        print(f"✅ Found matching location: '{best_match['text']}' (score: {candidates[0]['score']})")
+        for candidate in candidates[1:4]:
+            print(f"      - '{candidate['station']['text']}' (score: {candidate['score']})")
+        
+        station_id = best_match['station_id']
+        self.station_directory.remember(location, state, station_id,
+                                        letter_group=best_match.get('letter_group'),
+                                        station_name=best_match['text'])
+        
+        return {
+            'success': True,
+            'station_id': station_id,
+            'letter_group': best_match.get('letter_group'),
+            'station_name': best_match['text'],
+            'source': 'bom_html'
+        }
+
+    def _circuit_open(self) -> bool:
+        circuit_breaker = getattr(self.http_client, 'circuit_breaker', None)
+        return circuit_breaker is not None and circuit_breaker.is_open()
+
+    def _fetch_group_stations(self, state: str, letter_groups: Dict[str, str]) -> None:
+        """Download letter group pages (concurrently when several) into the station directory"""
+        
+        if len(letter_groups) == 1:
+            group_name, group_url = next(iter(letter_groups.items()))
+            location_links = self._fetch_location_links(group_url)
+            if location_links is not None:
+                self.station_directory.set_group_stations(state, group_name, location_links)
+            return
+        
+        print(f"🚀 Downloading {len(letter_groups)} letter group pages concurrently")
+        
+        def fetch(group_name, url, headers):
+            # The engine has already taken a token from the shared rate limiter
+            return self._fetch_location_links(url, rate_limited=False)
+        
+        def handle(group_name, location_links):
+            if location_links is not None:
+                self.station_directory.set_group_stations(state, group_name, location_links)
+            return location_links
+        
+        self.fetch_engine.fetch_all(list(letter_groups.items()), handle, fetcher=fetch)
+
+    def _get_location_index(self) -> LocationIndex:
+        """Get the station name index, rebuilding it when the station directory changes"""
+        
+        signature = self.station_directory.get_catalogue_signature()
+        with self._location_index_lock:
+            if self._location_index is None or signature != self._location_index_signature:
+                self._location_index = LocationIndex(self.station_directory.get_catalogue())
+                self._location_index_signature = signature
+            return self._location_index
+
+    def refresh_station_directory(self, states: Optional[List[str]] = None) -> Dict:
+        """
+        Rebuild the station directory from BOM (for scheduled refreshes)
+        
+        Fetches every state DWO page and every letter group page, so later
+        lookups for any station in those states need no HTTP requests.
+        
+        Args:
+            states: State names to refresh (defaults to all states)
             
-            print(f"🏢 Discovered Station ID: {station_id}")
+        Returns:
+            Dictionary with per-state station counts
+        """
+        refreshed = {}
+        
+        for state in (states or list(self.state_daily_codes.keys())):
+            daily_obs_code = self._get_daily_obs_code(state)
+            if not daily_obs_code:
+                continue
             
-            # Phase 5: Extract weather data using plain text CSV
-            print(f"\n📌 PHASE 5: Extract weather data using plain text CSV...")
-            result = self._extract_csv_data(station_id, target_dates, location, state)
+            letter_group_links = self._parse_letter_group_links(f"{self.base_url}/climate/dwo/{daily_obs_code}.shtml")
+            if not letter_group_links:
+                print(f"❌ Could not refresh letter groups for {state}")
+                continue
             
-            return result
+            self.station_directory.set_letter_groups(state, letter_group_links)
             
-        except Exception as e:
-            logger.error(f"Smart parsing extraction failed: {str(e)}")
+            station_count = 0
+            for group_name, group_url in letter_group_links.items():
+                location_links = self._fetch_location_links(group_url)
+                if location_links is not None:
+                    self.station_directory.set_group_stations(state, group_name, location_links)
+                    station_count += len(location_links)
+            
+            refreshed[state] = station_count
+            print(f"✅ Refreshed station directory for {state}: {station_count} stations")
+        
+        return {
+            'success': bool(refreshed),
+            'states': refreshed
+        }
+
+    def refresh_station_catalogue(self, states: Optional[List[str]] = None) -> Dict:
+        """
+        Rebuild the station coordinates catalogue (for scheduled refreshes)
+        
+        Crawls any state whose letter group pages are not all in the station
+        directory, downloads BOM's station site list and joins the two.
+        
+        Args:
+            states: State names to include (defaults to all states)
+            
+        Returns:
+            Dictionary with catalogue build counts
+        """
+        states = states or list(self.state_daily_codes.keys())
+        incomplete = [state for state in states if self.station_directory.get_missing_groups(state) != {}]
+        if incomplete:
+            self.refresh_station_directory(incomplete)
+        
+        print(f"📥 Fetching station site list: {self.station_list_url}")
+        response = self.http_client.get_with_retry(self.station_list_url, max_retries=3)
+        if not response or response.status_code != 200:
             return {
                 'success': False,
-                'error': str(e),
-                'location': location,
-                'state': state
+                'error': "Could not download BOM station site list"
             }
+        
+        sites = parse_station_list(response.text)
+        wanted_states = {state.lower().strip() for state in states}
+        dwo_stations = [station for station in self.station_directory.get_catalogue()
+                        if station['state'] in wanted_states]
+        
+        result = self.station_catalogue.build(dwo_stations, sites)
+        print(f"✅ Station catalogue: {result['stations']} stations with coordinates, "
+              f"{result['unmatched']} unmatched")
+        return result
 
     def _get_daily_obs_code(self, state: str) -> Optional[str]:
         """Get daily observation code for state"""
@@ -189,18 +522,10 @@ class SmartHTMLParsingBOMScraper:
             
             print(f"✅ Downloaded {len(response.text)} characters of HTML")
             
-            # Parse HTML to find letter group links
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
+            # Only anchors are needed - no document tree is built
             letter_group_links = {}
             
-            # Look for links that match letter group patterns
-            all_links = soup.find_all('a', href=True)
-            
-            for link in all_links:
-                href = link['href']
-                text = link.get_text().strip()
-                
+            for href, text in extract_links(response.text):
                 # Look for patterns like "A - E", "F - K", "L", "M - R", "S - Z"
                 if re.match(r'^[A-Z](\s*-\s*[A-Z])?$', text):
                     # Construct full URL if relative
@@ -218,82 +543,14 @@ class SmartHTMLParsingBOMScraper:
             print(f"❌ HTML parsing failed: {str(e)}")
             return {}
 
-    def _get_letter_group_for_location(self, location: str) -> str:
-        """Get letter group for location (static method - for reference only)"""
-        if not location:
-            return 'A - E'
-        
-        first_letter = location[0].upper()
-        
-        if first_letter in ['A', 'B', 'C', 'D', 'E']:
-            return 'A - E'
-        elif first_letter in ['F', 'G', 'H', 'I', 'J', 'K']:
-            return 'F - K'
-        elif first_letter == 'L':
-            return 'L'
-        elif first_letter in ['M', 'N', 'O', 'P', 'Q', 'R']:
-            return 'M - R'
-        else:
-            return 'S - Z'
-
-    def _find_adaptive_letter_group(self, location: str, letter_group_links: Dict[str, str]) -> Tuple[str, str]:
-        """Adaptively find the correct letter group based on available groups"""
-        
-        if not location:
-            # Return first available group
-            first_group = next(iter(letter_group_links.keys()))
-            return first_group, letter_group_links[first_group]
-        
-        target_letter = location[0].upper()
-        print(f"🔍 Target letter: {target_letter}")
-        
-        # Check each available letter group to see if it contains our target letter
-        for group_name, group_url in letter_group_links.items():
-            
-            # Parse the group name to determine letter range
-            if self._letter_in_group(target_letter, group_name):
-                print(f"✅ Letter '{target_letter}' matches group: {group_name}")
-                return group_name, group_url
-        
-        # Fallback: return first available group
-        print(f"⚠️ No exact match found, using first available group")
-        first_group = next(iter(letter_group_links.keys()))
-        return first_group, letter_group_links[first_group]
-
-    def _letter_in_group(self, letter: str, group_name: str) -> bool:
-        """Check if a letter belongs to a letter group"""
-        
-        # Handle single letter groups (like "L", "M", "A", etc.)
-        if len(group_name) == 1:
-            return letter == group_name
-        
-        # Handle range groups (like "A - E", "D - G", "P - V", etc.)
-        if ' - ' in group_name:
-            parts = group_name.split(' - ')
-            if len(parts) == 2:
-                start_letter = parts[0].strip()
-                end_letter = parts[1].strip()
-                return start_letter <= letter <= end_letter
-        
-        # Handle dash groups (like "A-B", "C-F", etc.)
-        if '-' in group_name and ' ' not in group_name:
-            parts = group_name.split('-')
-            if len(parts) == 2:
-                start_letter = parts[0].strip()
-                end_letter = parts[1].strip()
-                return start_letter <= letter <= end_letter
-        
-        # Fallback: check if letter is mentioned in group name
-        return letter in group_name
-
-    def _find_location_in_letter_group(self, letter_group_url: str, location: str) -> Optional[str]:
-        """Find location in letter group page using HTML parsing (more reliable than Playwright)"""
+    def _fetch_location_links(self, letter_group_url: str, rate_limited: bool = True) -> Optional[List[Dict]]:
+        """Download a letter group page and extract its station links (None on failure)"""
         
         try:
             print(f"🌐 Parsing letter group page with HTML: {letter_group_url}")
             
             # Use enhanced HTTP client for letter group page
-            response = self.http_client.get_with_retry(letter_group_url, max_retries=3)
+            response = self.http_client.get_with_retry(letter_group_url, max_retries=3, rate_limited=rate_limited)
             
             if not response:
                 print(f"❌ Failed to fetch letter group page after retries")
@@ -301,19 +558,13 @@ class SmartHTMLParsingBOMScraper:
             
             print(f"✅ Downloaded {len(response.text)} characters of HTML")
             
-            # Parse HTML to find location links
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
             # Look for all links that contain 'latest.shtml' (these are the location links)
             location_links = []
-            all_links = soup.find_all('a', href=True)
             
-            for link in all_links:
-                href = link['href']
-                text = link.get_text().strip()
-                
+            for href, text in extract_links(response.text):
                 # Check if this is a location link
-                if 'latest.shtml' in href and 'IDCJDW' in href:
+                station_match = re.search(r'/(IDCJDW\d+)\.latest\.shtml', href)
+                if 'latest.shtml' in href and 'IDCJDW' in href and station_match:
                     # Construct full URL if relative
                     if href.startswith('/'):
                         full_url = f"{self.base_url}{href}"
@@ -323,187 +574,18 @@ class SmartHTMLParsingBOMScraper:
                     location_links.append({
                         'text': text,
                         'href': href,
-                        'full_url': full_url
+                        'full_url': full_url,
+                        'station_id': station_match.group(1)
                     })
                     print(f"   📍 Found location link: '{text}' → {href}")
             
             print(f"🔍 Found {len(location_links)} location links in HTML")
-            
-            # Find the best match using improved matching algorithm
-            best_match = self._find_best_location_match(location, location_links)
-            
-            if best_match:
-                link_text = best_match['text']
-                href = best_match['href']
-                
-                print(f"✅ Found matching location: '{link_text}'")
-                
-                # Extract station ID from href
-                station_match = re.search(r'/(IDCJDW\d+)\.latest\.shtml', href)
-                if station_match:
-                    station_id = station_match.group(1)
-                    print(f"🏢 Extracted Station ID: {station_id}")
-                    return station_id
-            
-            print(f"❌ No matching location found for '{location}'")
-            print(f"   Available locations: {[link['text'] for link in location_links]}")
-            return None
+            return location_links
             
         except Exception as e:
             print(f"❌ HTML parsing of letter group failed: {str(e)}")
             return None
 
-    def _location_matches(self, target_location: str, bom_location: str) -> bool:
-        """Check if BOM location matches target location with improved precision"""
-        target_lower = target_location.lower().strip()
-        bom_lower = bom_location.lower().strip()
-        
-        # Exact match (highest priority)
-        if target_lower == bom_lower:
-            return True
-        
-        # Handle compound locations like "Mount Gambier" vs "Mount Barker"
-        target_words = target_lower.split()
-        bom_words = bom_lower.split()
-        
-        # For multi-word locations, require more precise matching
-        if len(target_words) > 1:
-            # Full substring match (e.g., "mount gambier" in "mount gambier airport")
-            if target_lower in bom_lower:
-                return True
-            
-            # Check if all target words appear in BOM location in order
-            if len(target_words) >= 2 and len(bom_words) >= 2:
-                # For locations like "Mount Gambier", both words must match
-                if all(word in bom_words for word in target_words):
-                    # Ensure they appear in similar positions (not scattered)
-                    target_str = ' '.join(target_words)
-                    if target_str in bom_lower:
-                        return True
-        else:
-            # Single word matching - more flexible
-            if target_lower in bom_lower or bom_lower in target_lower:
-                return True
-        
-        # First word match for compound locations (but only if length > 4 to avoid short matches)
-        if len(target_words) > 0 and len(bom_words) > 0:
-            target_first = target_words[0]
-            bom_first = bom_words[0]
-            if target_first == bom_first and len(target_first) > 4:
-                # Additional check: ensure it's not a common prefix like "mount" or "port"
-                common_prefixes = {'mount', 'port', 'cape', 'lake', 'point', 'north', 'south', 'east', 'west'}
-                if target_first not in common_prefixes:
-                    return True
-        
-        return False
-    def _find_best_location_match(self, target_location: str, location_links: List[Dict]) -> Optional[Dict]:
-        """Find the best matching location from available links with improved accuracy"""
-        target_lower = target_location.lower().strip()
-        
-        # Score each potential match
-        matches = []
-        for link_info in location_links:
-            link_text = link_info['text']
-            bom_lower = link_text.lower().strip()
-            
-            score = 0
-            match_type = ""
-            
-            # Exact match (highest priority)
-            if target_lower == bom_lower:
-                score = 1000
-                match_type = "exact"
-            
-            # Full substring match 
-            elif target_lower in bom_lower:
-                score = 500 + (100 - len(bom_lower))  # Prefer shorter matches
-                match_type = "substring"
-            
-            # Word-by-word matching for multi-word locations
-            elif len(target_lower.split()) > 1:
-                target_words = target_lower.split()
-                bom_words = bom_lower.split()
-                
-                if all(word in bom_words for word in target_words):
-                    # Bonus for maintaining word order
-                    words_in_order = ' '.join(target_words) in bom_lower
-                    score = 400 if words_in_order else 300
-                    match_type = "multi_word"
-            
-            # Single word partial match
-            elif target_lower in bom_lower or bom_lower in target_lower:
-                score = 200
-                match_type = "partial"
-            
-            if score > 0:
-                matches.append({
-                    'link_info': link_info,
-                    'score': score,
-                    'match_type': match_type,
-                    'text': link_text
-                })
-        
-        if matches:
-            # Sort by score (highest first)
-            matches.sort(key=lambda x: x['score'], reverse=True)
-            best_match = matches[0]
-            
-            print(f"   🎯 Best match for '{target_location}': '{best_match['text']}' (score: {best_match['score']}, type: {best_match['match_type']})")
-            
-            # Show other potential matches for debugging
-            if len(matches) > 1:
-                print(f"   🔍 Other matches considered:")
-                for match in matches[1:4]:  # Show up to 3 alternatives
-                    print(f"      - '{match['text']}' (score: {match['score']}, type: {match['match_type']})")
-            
-            return best_match['link_info']
-        
-        return None
-
-    def _location_matches(self, target_location: str, bom_location: str) -> bool:
-        """Check if BOM location matches target location with improved precision"""
-        target_lower = target_location.lower().strip()
-        bom_lower = bom_location.lower().strip()
-        
-        # Exact match (highest priority)
-        if target_lower == bom_lower:
-            return True
-        
-        # Handle compound locations like "Mount Gambier" vs "Mount Barker"
-        target_words = target_lower.split()
-        bom_words = bom_lower.split()
-        
-        # For multi-word locations, require more precise matching
-        if len(target_words) > 1:
-            # Full substring match (e.g., "mount gambier" in "mount gambier airport")
-            if target_lower in bom_lower:
-                return True
-            
-            # Check if all target words appear in BOM location in order
-            if len(target_words) >= 2 and len(bom_words) >= 2:
-                # For locations like "Mount Gambier", both words must match
-                if all(word in bom_words for word in target_words):
-                    # Ensure they appear in similar positions (not scattered)
-                    target_str = ' '.join(target_words)
-                    if target_str in bom_lower:
-                        return True
-        else:
-            # Single word matching - more flexible
-            if target_lower in bom_lower or bom_lower in target_lower:
-                return True
-        
-        # First word match for compound locations (but only if length > 4 to avoid short matches)
-        if len(target_words) > 0 and len(bom_words) > 0:
-            target_first = target_words[0]
-            bom_first = bom_words[0]
-            if target_first == bom_first and len(target_first) > 4:
-                # Additional check: ensure it's not a common prefix like "mount" or "port"
-                common_prefixes = {'mount', 'port', 'cape', 'lake', 'point', 'north', 'south', 'east', 'west'}
-                if target_first not in common_prefixes:
-                    return True
-        
-        return False
-
     def _extract_csv_data(self, station_id: str, target_dates: List[str], location: str, state: str) -> Dict:
         """Extract weather data using CSV method"""
         
@@ -517,66 +599,105 @@ class SmartHTMLParsingBOMScraper:
             
             print(f"📊 Required months: {sorted(required_months)}")
             
-            # Download CSV data for each month
+            # Load CSV data for each month - local store first, then download the rest concurrently
             all_records = []
             successful_months = 0
-            
-            for month_key in sorted(required_months):
-                print(f"\n📅 Processing {month_key}...")
-                
-                csv_url = f"{self.base_url}/climate/dwo/{month_key}/text/{station_id}.{month_key}.csv"
-                print(f"🔗 CSV URL: {csv_url}")
-                
-                try:
-                    response = self.http_client.get_with_retry(csv_url, max_retries=2)
+            month_records = {}
+            pending_months = []
+            errored_months = []
+            
+            downloads_started = time.time()
+            with timed_phase('csv_download'):
+                stored_csvs = {}
+                for month_key in sorted(required_months):
+                    print(f"\n📅 Processing {month_key}...")
+                    stored = self.csv_store.get(station_id, month_key)
                     
-                    if response:
-                        records = self._parse_bom_csv(response.text, month_key)
-                        all_records.extend(records)
-                        successful_months += 1
-                        print(f"✅ Downloaded {len(records)} records for {month_key}")
+                    if stored and stored['fresh']:
+                        print(f"⚡ CSV store hit: {station_id} {month_key} ({'immutable' if stored['immutable'] else 'fresh'})")
+                        stored_csvs[month_key] = stored['content']
+                    elif self.negative_cache.get('month', (station_id, month_key)):
+                        print(f"⚡ Negative cache hit: no CSV for {station_id} {month_key}")
                     else:
-                        print(f"❌ Failed to download CSV for {month_key}")
-                        
-                except Exception as e:
-                    print(f"❌ Error downloading {month_key}: {str(e)}")
+                        pending_months.append(month_key)
+                
+                if len(pending_months) > 1:
+                    month_records.update(self._download_months_concurrently(station_id, pending_months))
+                else:
+                    for month_key in pending_months:
+                        try:
+                            csv_content = self._download_month_csv(station_id, month_key)
+                            if csv_content is not None:
+                                stored_csvs[month_key] = csv_content
+                        except Exception as e:
+                            print(f"❌ Error downloading {month_key}: {str(e)}")
+                            errored_months.append(month_key)
+            
+            with timed_phase('parse_filter'):
+                for month_key, csv_content in stored_csvs.items():
+                    month_records[month_key] = self._parse_bom_csv(csv_content, month_key)
+            
+            # A month we had to download but which BOM did not (re)validate came from a stale stored copy
+            stale_months = [
+                month_key for month_key in pending_months
+                if month_key in month_records
+                and (self.csv_store.get(station_id, month_key) or {}).get('validated_at', 0) < downloads_started
+            ]
+            
+            for month_key in sorted(required_months):
+                records = month_records.get(month_key)
+                if records is None:
+                    print(f"❌ Failed to download CSV for {month_key}")
                     continue
+                all_records.extend(records)
+                successful_months += 1
+                print(f"✅ Loaded {len(records)} records for {month_key}")
             
             # Filter for target dates
-            target_records = [r for r in all_records if r.get('date') in target_dates]
-            
-            # Create output
-            result_data = {
-                'metadata': {
-                    'location': f"{location}, {state}",
-                    'station_id': station_id,
-                    'extraction_timestamp': datetime.now().isoformat(),
-                    'method': 'Smart HTML Parsing + Plain Text CSV',
-                    'target_dates': target_dates,
-                    'months_processed': successful_months,
-                    'total_records': len(all_records),
-                    'target_records': len(target_records)
-                },
-                'weather_data': target_records
-            }
+            with timed_phase('parse_filter'):
+                target_date_set = set(target_dates)
+                target_records = [r for r in all_records if r.get('date') in target_date_set]
             
-            # Save results
-            output_file = self._save_results(result_data, location, state)
+            # Archive parsed months in the background (deduplicated by content)
+            for month_key, records in month_records.items():
+                self.archive.submit(station_id, month_key, records, location=f"{location}, {state}")
             
             # Success only if we actually extracted target date records
             extraction_successful = len(target_records) > 0 and successful_months > 0
             
+            # Months BOM failed to serve (as opposed to months it has no CSV for)
+            circuit_open = self._circuit_open()
+            upstream_failed_months = [
+                month_key for month_key in pending_months
+                if month_key not in month_records
+                and (circuit_open or month_key in errored_months
+                     or self._month_failed_upstream(station_id, month_key))
+            ]
+            upstream_error = not extraction_successful and bool(upstream_failed_months)
+            
+            if extraction_successful:
+                error = None
+            elif upstream_error:
+                error = (f"BOM is unavailable - could not download "
+                         f"{', '.join(upstream_failed_months)} for {station_id}; try again shortly")
+            else:
+                error = "No data extracted for target dates"
+            
             return {
                 'success': extraction_successful,
                 'target_records': target_records,
+                'month_records': month_records,
                 'station_id': station_id,
-                'output_file': str(output_file),
+                'stale': bool(stale_months),
+                'stale_months': stale_months,
+                'upstream_failed_months': upstream_failed_months,
                 'summary': {
                     'months_processed': successful_months,
                     'total_records': len(all_records),
                     'target_records': len(target_records)
                 },
-                'error': None if extraction_successful else f"No data extracted for target dates"
+                'error': error,
+                **({'upstream_error': True} if upstream_error else {})
             }
             
         except Exception as e:
@@ -585,80 +706,135 @@ class SmartHTMLParsingBOMScraper:
                 'error': str(e)
             }
 
-    def _parse_bom_csv(self, csv_content: str, month_key: str) -> List[Dict]:
-        """Parse BOM CSV content into structured records"""
+    def _csv_url(self, station_id: str, month_key: str) -> str:
+        """Build the plain text CSV URL for a station month"""
+        return f"{self.base_url}/climate/dwo/{month_key}/text/{station_id}.{month_key}.csv"
+
+    def _download_month_csv(self, station_id: str, month_key: str, rate_limited: bool = True,
+                            revalidate: bool = False) -> Optional[str]:
+        """Download a monthly CSV, coalescing concurrent requests for the same station month"""
         
-        lines = csv_content.strip().split('\n')
-        daily_records = []
+        return self.single_flight.do(('csv', station_id, month_key), self._fetch_month_csv,
+                                     station_id, month_key, rate_limited=rate_limited, revalidate=revalidate)
+
+    def _fetch_month_csv(self, station_id: str, month_key: str, rate_limited: bool = True,
+                         revalidate: bool = False) -> Optional[str]:
+        """Download (or revalidate) a monthly CSV and record it in the CSV store"""
         
-        # Find header line
-        header_line_idx = None
-        for i, line in enumerate(lines):
-            if line.startswith(',"Date"'):
-                header_line_idx = i
-                break
+        # Another request (or worker) may have stored it while we waited our turn
+        stored = self.csv_store.get(station_id, month_key)
+        if stored and (stored['immutable'] or (stored['fresh'] and not revalidate)):
+            return stored['content']
         
-        if header_line_idx is None:
-            return []
+        if not stored and self.negative_cache.get('month', (station_id, month_key)):
+            return None
         
-        # Parse header
-        header_line = lines[header_line_idx]
-        reader = csv.reader(io.StringIO(header_line))
-        headers = next(reader)[1:]
+        csv_url = self._csv_url(station_id, month_key)
+        print(f"🔗 CSV URL: {csv_url}")
         
-        # Parse data rows
-        for line_idx in range(header_line_idx + 1, len(lines)):
-            line = lines[line_idx].strip()
-            
-            if not line or line.startswith('"'):
-                continue
-                
-            try:
-                reader = csv.reader(io.StringIO(line))
-                row_data = next(reader)[1:]
-                
-                if len(row_data) >= len(headers) and row_data[0]:
-                    record = {'month_key': month_key}
-                    
-                    for i, header in enumerate(headers):
-                        if i < len(row_data):
-                            clean_header = (header
-                                          .replace('(', '').replace(')', '')
-                                          .replace('°C', 'c').replace('°', '_degrees')
-                                          .replace(' ', '_').replace('-', '_')
-                                          .replace('/', '_').replace('%', 'percent')
-                                          .lower())
-                            record[clean_header] = row_data[i]
-                    
-                    # Fix date format
-                    if 'date' in record and record['date']:
-                        try:
-                            date_obj = datetime.strptime(record['date'], "%Y-%m-%d")
-                            record['date'] = date_obj.strftime("%Y-%m-%d")
-                        except:
-                            pass
-                    
-                    daily_records.append(record)
-                    
-            except:
-                continue
+        response = self.http_client.get_with_retry(csv_url, max_retries=2, rate_limited=rate_limited,
+                                                   headers=self.csv_store.conditional_headers(stored) or None,
+                                                   not_found_ok=True)
         
-        return daily_records
+        if response is not None and response.status_code == 404:
+            print(f"❌ No CSV published for {station_id} {month_key} (404)")
+            self.negative_cache.put('month', (station_id, month_key), "No CSV published for this month (404)")
+            self._note_month_outcome(station_id, month_key, upstream_failed=False)
+            return stored['content'] if stored else None
+        
+        content = self._store_month_response(station_id, month_key, response, stored)
+        # None here means get_with_retry gave up (errors, 403s, open circuit) with no stored copy
+        self._note_month_outcome(station_id, month_key, upstream_failed=content is None)
+        return content
+
+    def _note_month_outcome(self, station_id: str, month_key: str, upstream_failed: bool) -> None:
+        """Remember whether a station-month's last download failed because of BOM"""
+        
+        key = (station_id, month_key)
+        with self._upstream_failures_lock:
+            self._upstream_failures.pop(key, None)
+            if upstream_failed:
+                self._upstream_failures[key] = time.time()
+                while len(self._upstream_failures) > 10000:
+                    self._upstream_failures.popitem(last=False)
 
-    def _save_results(self, result_data: Dict, location: str, state: str) -> Path:
-        """Save results to JSON file"""
+    def _month_failed_upstream(self, station_id: str, month_key: str) -> bool:
+        with self._upstream_failures_lock:
+            return (station_id, month_key) in self._upstream_failures
+
+    def _store_month_response(self, station_id: str, month_key: str, response,
+                              stored: Optional[Dict] = None) -> Optional[str]:
+        """Store a downloaded month, falling back to a stale stored copy if the download failed"""
+        
+        if response is not None and response.status_code == 304 and stored:
+            # Conditional GET: BOM confirmed our copy is current - just extend its freshness
+            print(f"⚡ CSV unchanged (304): {station_id} {month_key}")
+            self.csv_store.mark_validated(station_id, month_key,
+                                          etag=response.headers.get('ETag'),
+                                          last_modified=response.headers.get('Last-Modified'))
+            return stored['content']
+        
+        if response is not None and response.status_code != 304:
+            self.csv_store.put(station_id, month_key, response.text,
+                               etag=response.headers.get('ETag'),
+                               last_modified=response.headers.get('Last-Modified'))
+            return response.text
+        
+        if stored:
+            # Upstream failed - a stale copy is better than nothing
+            print(f"⚠️ Using stale stored CSV for {station_id} {month_key}")
+            return stored['content']
+        
+        return None
+
+    def _download_months_concurrently(self, station_id: str, month_keys: List[str]) -> Dict[str, List[ObservationRecord]]:
+        """Download several months concurrently, parsing each one as soon as it arrives"""
+        
+        print(f"🚀 Downloading {len(month_keys)} months concurrently "
+              f"(max {self.fetch_engine.max_concurrency} in flight)")
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        location_clean = re.sub(r'[^a-zA-Z0-9_-]', '_', location)
-        state_clean = re.sub(r'[^a-zA-Z0-9_-]', '_', state)
+        # Handlers run on worker threads - hand them the request's timer explicitly
+        timer = current_timer()
         
-        output_file = self.download_dir / f"SMART_HTML_{location_clean}_{state_clean}_{timestamp}.json"
+        def lookup(month_key):
+            # Stored months are served before the engine spends a token on them
+            stored = self.csv_store.get(station_id, month_key)
+            if stored and (stored['immutable'] or stored['fresh']):
+                return stored['content']
+            return None
+        
+        attempted = set()
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(result_data, f, indent=2, default=str)
+        def fetch(month_key, url, headers):
+            # The engine has already taken a token from the shared rate limiter
+            attempted.add(month_key)
+            try:
+                return self._download_month_csv(station_id, month_key, rate_limited=False)
+            except Exception as e:
+                # e.g. RateLimitExceeded on a retry - the other months carry on
+                print(f"❌ Error downloading {month_key}: {str(e)}")
+                self._note_month_outcome(station_id, month_key, upstream_failed=True)
+                return None
+        
+        def handle(month_key, csv_content):
+            if csv_content is None:
+                if month_key not in attempted:
+                    # Skipped by the engine (no rate limit budget) - not a missing month
+                    self._note_month_outcome(station_id, month_key, upstream_failed=True)
+                return None
+            if timer is None:
+                return self._parse_bom_csv(csv_content, month_key)
+            with timer.phase('parse_filter'):
+                return self._parse_bom_csv(csv_content, month_key)
+        
+        jobs = [(month_key, self._csv_url(station_id, month_key)) for month_key in month_keys]
+        results = self.fetch_engine.fetch_all(jobs, handle, fetcher=fetch, lookup=lookup)
+        return {month_key: records for month_key, records in results.items() if records is not None}
+
+    def _parse_bom_csv(self, csv_content: str, month_key: str) -> List[ObservationRecord]:
+        """Parse BOM CSV content into typed records (single-pass streaming parser)"""
         
-        print(f"💾 Results saved to: {output_file.name}")
-        return output_file
+        return parse_observations(csv_content, month_key)
 
 def test_smart_html_parsing():
     """Test the smart HTML parsing approach"""
@@ -702,7 +878,6 @@ def test_smart_html_parsing():
                 print(f"\n✅ SMART PARSING SUCCESS: {location}, {state}")
                 print(f"   🏢 Discovered Station ID: {result['station_id']}")
                 print(f"   📊 Records: {result['summary']['target_records']}/{len(target_dates)} dates")
-                print(f"   💾 File: {Path(result['output_file']).name}")
                 
                 # Show comprehensive weather data
                 if result['target_records']:
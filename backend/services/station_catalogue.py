@@ -0,0 +1,340 @@
+"""
+BOM Station Catalogue (Coordinates + Spatial Index)
+Version: v1.0 • Updated: 2026-10-16 15:40 AEST (Brisbane)
+
+Coordinates for every BOM daily weather observation (DWO) station, with a
+uniform-grid spatial index for nearest-station lookups by latitude/longitude.
+
+The catalogue is built by joining the DWO station links in the station
+directory (IDCJDWxxxx, name, state) with BOM's station site list
+(stations.txt: site number, name, state, lat/lon) on normalised name and
+state, and is persisted to BOM_DATA_DIR/station_catalogue.json.
+"""
+
+import re
+import math
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bom_storage import get_data_dir, atomic_write_json, read_json
+from location_index import LocationIndex, normalise_tokens
+
+logger = logging.getLogger(__name__)
+
+CATALOGUE_VERSION = 1
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.195
+
+# State codes used in BOM's site list → station directory state keys
+STATE_CODES = {
+    'QLD': 'queensland',
+    'NSW': 'new south wales',
+    'VIC': 'victoria',
+    'WA': 'western australia',
+    'SA': 'south australia',
+    'TAS': 'tasmania',
+    'NT': 'northern territory',
+    'ACT': 'australian capital territory',
+}
+
+# "  91311 091  LAUNCESTON (TI TREE BEND)  1980  ..  -41.4194  147.1219 GPS  TAS ..."
+_SITE_LINE = re.compile(
+    r'^\s*(?P<site>\d+)\s+\S+\s+(?P<name>.+?)\s+(?P<start>\d{4}|\.\.)\s+(?P<end>\d{4}|\.\.)\s+'
+    r'(?P<lat>-?\d+\.\d+)\s+(?P<lon>-?\d+\.\d+)\s+.*?\b(?P<state>' + '|'.join(STATE_CODES) + r')\b'
+)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_station_list(text: str) -> List[Dict]:
+    """
+    Parse BOM's station site list (stations.txt)
+
+    Returns:
+        Site dicts: bom_site, name, state (directory key), latitude, longitude, open
+    """
+    sites = []
+    for line in text.splitlines():
+        match = _SITE_LINE.match(line)
+        if not match:
+            continue
+        sites.append({
+            'bom_site': match.group('site').zfill(6),
+            'name': match.group('name').strip(),
+            'state': STATE_CODES[match.group('state')],
+            'latitude': float(match.group('lat')),
+            'longitude': float(match.group('lon')),
+            'open': match.group('end') == '..'
+        })
+    return sites
+
+
+class SpatialGrid:
+    """Uniform lat/lon grid over points for k-nearest queries"""
+
+    def __init__(self, points: Iterable[Tuple[float, float]], cell_degrees: float = 1.0):
+        self.cell_degrees = cell_degrees
+        self.points: List[Tuple[float, float]] = []
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        for lat, lon in points:
+            self._cells.setdefault(self._cell(lat, lon), []).append(len(self.points))
+            self.points.append((lat, lon))
+        self._max_ring = int(math.ceil(360 / cell_degrees))
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lon / self.cell_degrees))
+
+    def nearest(self, lat: float, lon: float, k: int = 1,
+                max_distance_km: Optional[float] = None) -> List[Tuple[float, int]]:
+        """
+        Find the k nearest points
+
+        Searches rings of cells outward from the query cell and stops once no
+        unvisited cell can hold a point closer than the current k-th best.
+
+        Returns:
+            (distance_km, point index) pairs, nearest first
+        """
+        if not self.points or k <= 0:
+            return []
+
+        centre_row, centre_col = self._cell(lat, lon)
+        found: List[Tuple[float, int]] = []
+
+        for ring in range(self._max_ring + 1):
+            for row, col in self._ring_cells(centre_row, centre_col, ring):
+                for index in self._cells.get((row, col), ()):
+                    point_lat, point_lon = self.points[index]
+                    found.append((haversine_km(lat, lon, point_lat, point_lon), index))
+
+            # Anything outside this ring is at least `ring` whole cells away
+            outside_km = self._ring_min_distance_km(lat, ring)
+            if max_distance_km is not None and outside_km > max_distance_km:
+                break
+            if len(found) >= k:
+                found.sort()
+                if found[k - 1][0] <= outside_km:
+                    break
+
+        found.sort()
+        if max_distance_km is not None:
+            found = [item for item in found if item[0] <= max_distance_km]
+        return found[:k]
+
+    @staticmethod
+    def _ring_cells(centre_row: int, centre_col: int, ring: int) -> Iterable[Tuple[int, int]]:
+        if ring == 0:
+            yield centre_row, centre_col
+            return
+        for col in range(centre_col - ring, centre_col + ring + 1):
+            yield centre_row - ring, col
+            yield centre_row + ring, col
+        for row in range(centre_row - ring + 1, centre_row + ring):
+            yield row, centre_col - ring
+            yield row, centre_col + ring
+
+    def _ring_min_distance_km(self, lat: float, ring: int) -> float:
+        # Longitude degrees shrink towards the poles - use the narrowest row in reach
+        widest_lat = min(89.9, abs(lat) + (ring + 1) * self.cell_degrees)
+        return ring * self.cell_degrees * KM_PER_DEGREE * math.cos(math.radians(widest_lat))
+
+
+class StationCatalogue:
+    """Persistent DWO station coordinates with a nearest-station index"""
+
+    def __init__(self, path: Optional[Path] = None, cell_degrees: float = 1.0):
+        """
+        Initialize the station catalogue
+
+        Args:
+            path: JSON file backing the catalogue (defaults to BOM_DATA_DIR/station_catalogue.json)
+            cell_degrees: Spatial grid cell size in degrees
+        """
+        self.path = Path(path) if path else get_data_dir() / "station_catalogue.json"
+        self.cell_degrees = cell_degrees
+
+        self._lock = threading.RLock()
+        self._data = self._empty()
+        self._loaded_mtime = None
+        self._stations: List[Dict] = []
+        self._grid = SpatialGrid((), cell_degrees)
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def nearest(self, latitude: float, longitude: float, k: int = 3,
+                state: Optional[str] = None, max_distance_km: Optional[float] = None) -> List[Dict]:
+        """
+        Find the k nearest DWO stations to a point
+
+        Args:
+            latitude: Latitude in decimal degrees (negative south)
+            longitude: Longitude in decimal degrees
+            k: Number of stations to return
+            state: Only consider stations in this state
+            max_distance_km: Ignore stations further away than this
+
+        Returns:
+            Station dicts (station_id, name, state, latitude, longitude, bom_site)
+            with distance_km, nearest first
+        """
+        with self._lock:
+            self._reload_if_changed()
+            stations, grid = self._stations, self._grid
+
+        state_key = state.lower().strip() if state else None
+        # Over-fetch when filtering by state so k matches remain after filtering
+        wanted = k if state_key is None else k * 8
+        results = []
+        for distance_km, index in grid.nearest(latitude, longitude, wanted, max_distance_km):
+            station = stations[index]
+            if state_key and station['state'] != state_key:
+                continue
+            results.append({**station, 'distance_km': round(distance_km, 2)})
+            if len(results) >= k:
+                break
+        return results
+
+    def get(self, station_id: str) -> Optional[Dict]:
+        """Get a station by DWO station ID"""
+        with self._lock:
+            self._reload_if_changed()
+            station = self._data['stations'].get(station_id)
+            return dict(station) if station else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._reload_if_changed()
+            return len(self._stations)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def build(self, dwo_stations: Iterable[Dict], sites: List[Dict]) -> Dict:
+        """
+        Rebuild the catalogue by joining DWO stations with BOM site coordinates
+
+        Args:
+            dwo_stations: Station directory catalogue entries (text, station_id, state)
+            sites: Parsed site list (see parse_station_list)
+
+        Returns:
+            Dict with matched and unmatched station counts
+        """
+        sites_by_name: Dict[Tuple[str, str], List[Dict]] = {}
+        sites_by_state: Dict[str, List[Dict]] = {}
+        for site in sites:
+            key = (site['state'], ' '.join(normalise_tokens(site['name'])))
+            sites_by_name.setdefault(key, []).append(site)
+            sites_by_state.setdefault(site['state'], []).append(site)
+
+        state_indexes: Dict[str, LocationIndex] = {}
+        stations = {}
+        unmatched = []
+
+        for dwo in dwo_stations:
+            station_id, name, state = dwo.get('station_id'), dwo.get('text'), dwo.get('state')
+            if not station_id or not name or station_id in stations:
+                continue
+
+            candidates = sites_by_name.get((state, ' '.join(normalise_tokens(name))))
+            if not candidates:
+                # Names differ slightly between products (e.g. "Mount Gambier" vs "MOUNT GAMBIER AERO")
+                if state not in state_indexes:
+                    state_indexes[state] = LocationIndex(
+                        ({'text': site['name'], 'station_id': i, 'site': site}
+                         for i, site in enumerate(sites_by_state.get(state, []), start=1)),
+                        min_score=0.9
+                    )
+                ranked = state_indexes[state].search(name, limit=1)
+                candidates = [ranked[0]['station']['site']] if ranked else []
+
+            if not candidates:
+                unmatched.append(station_id)
+                continue
+
+            # Several sites can share a name - prefer the one still open
+            site = sorted(candidates, key=lambda s: not s['open'])[0]
+            stations[station_id] = {
+                'station_id': station_id,
+                'name': name,
+                'state': state,
+                'latitude': site['latitude'],
+                'longitude': site['longitude'],
+                'bom_site': site['bom_site']
+            }
+
+        with self._lock:
+            self._data = {'version': CATALOGUE_VERSION, 'updated': time.time(), 'stations': stations}
+            self._index()
+            self._save()
+
+        logger.info(f"Station catalogue built: {len(stations)} stations, {len(unmatched)} without coordinates")
+        return {
+            'success': bool(stations),
+            'stations': len(stations),
+            'unmatched': len(unmatched),
+            'unmatched_station_ids': unmatched
+        }
+
+    def get_stats(self) -> Dict:
+        """Get catalogue statistics"""
+        with self._lock:
+            self._reload_if_changed()
+            return {
+                'path': str(self.path),
+                'stations': len(self._stations),
+                'updated': self._data.get('updated'),
+                'cell_degrees': self.cell_degrees
+            }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _empty() -> Dict:
+        return {'version': CATALOGUE_VERSION, 'updated': None, 'stations': {}}
+
+    def _index(self) -> None:
+        self._stations = list(self._data['stations'].values())
+        self._grid = SpatialGrid(((s['latitude'], s['longitude']) for s in self._stations), self.cell_degrees)
+
+    def _load(self) -> None:
+        data = read_json(self.path)
+        if isinstance(data, dict) and data.get('version') == CATALOGUE_VERSION:
+            self._data = data
+        self._index()
+        try:
+            self._loaded_mtime = self.path.stat().st_mtime
+        except OSError:
+            self._loaded_mtime = None
+
+    def _reload_if_changed(self) -> None:
+        """Pick up a catalogue rebuilt by another worker"""
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            self._load()
+
+    def _save(self) -> None:
+        try:
+            atomic_write_json(self.path, self._data)
+            self._loaded_mtime = self.path.stat().st_mtime
+        except OSError as e:
+            logger.warning(f"Could not persist station catalogue: {str(e)}")
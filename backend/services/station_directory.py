@@ -0,0 +1,266 @@
+"""
+BOM Station Directory
+Version: v1.2 • Updated: 2026-10-16 22:10 AEST (Brisbane)
+Updates re-read, merge and write the file under a cross-worker lock file
+
+Persistent index of BOM daily weather observation (DWO) stations.
+
+Stores what phases 2-4 of the smart HTML scraper discover:
+- Letter group links for each state DWO page (e.g. "A - E" → IDCJDW0700 group page)
+- Station links found on each letter group page (name → IDCJDWxxxx)
+- Resolved location lookups (location, state → station_id, letter group)
+
+A warm lookup lets the scraper skip straight to the monthly CSV phase.
+Entries older than the refresh interval are treated as missing so the
+directory is rebuilt from BOM on a schedule.
+
+The file is shared by every gunicorn worker: each update takes
+BOM_DATA_DIR/locks/station-directory.lock (the same flock-based lock
+SingleFlight uses), re-reads the file and merges into it, so workers
+discovering different letter groups at once do not lose each other's entries.
+"""
+
+import os
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from bom_storage import get_data_dir, atomic_write_json, read_json
+from single_flight import _FileLock, fcntl
+
+logger = logging.getLogger(__name__)
+
+DIRECTORY_VERSION = 1
+
+
+class StationDirectory:
+    """Persistent location → station lookup built from DWO letter group pages"""
+
+    def __init__(self, path: Optional[Path] = None, refresh_interval_hours: Optional[float] = None):
+        """
+        Initialize the station directory
+
+        Args:
+            path: JSON file backing the directory (defaults to BOM_DATA_DIR/station_directory.json)
+            refresh_interval_hours: Age after which entries are refreshed from BOM
+        """
+        self.path = Path(path) if path else get_data_dir() / "station_directory.json"
+        if refresh_interval_hours is None:
+            refresh_interval_hours = float(os.environ.get('BOM_STATION_DIRECTORY_REFRESH_HOURS', '168'))
+        self.refresh_interval_seconds = refresh_interval_hours * 3600
+
+        self._lock = threading.RLock()
+        # Cross-worker lock around read-merge-write (not available on Windows)
+        self._file_lock = _FileLock(get_data_dir("locks") / "station-directory.lock", 10.0) \
+            if fcntl is not None else None
+        self._data = self._empty()
+        self._loaded_mtime = None
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def lookup(self, location: str, state: str) -> Optional[Dict]:
+        """Get a previously resolved station for a location (None if missing or stale)"""
+        with self._lock:
+            self._reload_if_changed()
+            entry = self._data['locations'].get(self._location_key(location, state))
+            if entry and self._is_fresh(entry.get('updated')):
+                return dict(entry)
+            return None
+
+    def get_letter_groups(self, state: str) -> Optional[Dict[str, str]]:
+        """Get letter group links for a state (None if missing or stale)"""
+        with self._lock:
+            self._reload_if_changed()
+            state_data = self._data['states'].get(self._state_key(state))
+            if state_data and state_data.get('letter_groups') and self._is_fresh(state_data.get('letter_groups_updated')):
+                return dict(state_data['letter_groups'])
+            return None
+
+    def get_group_stations(self, state: str, letter_group: str) -> Optional[List[Dict]]:
+        """Get station links on a letter group page (None if missing or stale)"""
+        with self._lock:
+            self._reload_if_changed()
+            state_data = self._data['states'].get(self._state_key(state), {})
+            group = state_data.get('groups', {}).get(letter_group)
+            if group and self._is_fresh(group.get('updated')):
+                return [dict(station) for station in group['stations']]
+            return None
+
+    def get_state_stations(self, state: str, include_stale: bool = False) -> List[Dict]:
+        """Get every known station link for a state across all letter groups"""
+        with self._lock:
+            self._reload_if_changed()
+            state_data = self._data['states'].get(self._state_key(state), {})
+            stations = []
+            for group_name, group in state_data.get('groups', {}).items():
+                if not include_stale and not self._is_fresh(group.get('updated')):
+                    continue
+                for station in group['stations']:
+                    stations.append({**station, 'letter_group': group_name})
+            return stations
+
+    def get_missing_groups(self, state: str) -> Optional[Dict[str, str]]:
+        """Get letter groups (name → URL) whose station lists are missing or stale (None if groups unknown)"""
+        letter_groups = self.get_letter_groups(state)
+        if letter_groups is None:
+            return None
+        return {
+            group_name: group_url
+            for group_name, group_url in letter_groups.items()
+            if self.get_group_stations(state, group_name) is None
+        }
+
+    def get_catalogue(self) -> List[Dict]:
+        """Get every known station across all states (stale entries included)"""
+        with self._lock:
+            self._reload_if_changed()
+            return [
+                {**station, 'state': state, 'letter_group': group_name}
+                for state, state_data in self._data['states'].items()
+                for group_name, group in state_data.get('groups', {}).items()
+                for station in group['stations']
+            ]
+
+    def get_catalogue_signature(self) -> Tuple:
+        """Cheap fingerprint of the station lists (changes whenever any group is re-crawled)"""
+        with self._lock:
+            self._reload_if_changed()
+            return tuple(
+                (state, group_name, group.get('updated'))
+                for state, state_data in sorted(self._data['states'].items())
+                for group_name, group in sorted(state_data.get('groups', {}).items())
+            )
+
+    def get_known_states(self) -> List[str]:
+        """Get the states that have been crawled at least once"""
+        with self._lock:
+            self._reload_if_changed()
+            return list(self._data['states'].keys())
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def set_letter_groups(self, state: str, letter_groups: Dict[str, str]) -> None:
+        """Record the letter group links parsed from a state DWO page"""
+        with self._update():
+            state_data = self._data['states'].setdefault(self._state_key(state), {'groups': {}})
+            state_data['letter_groups'] = dict(letter_groups)
+            state_data['letter_groups_updated'] = time.time()
+
+    def set_group_stations(self, state: str, letter_group: str, stations: List[Dict]) -> None:
+        """Record the station links parsed from a letter group page"""
+        with self._update():
+            state_data = self._data['states'].setdefault(self._state_key(state), {'groups': {}})
+            state_data.setdefault('groups', {})[letter_group] = {
+                'updated': time.time(),
+                'stations': [
+                    {'text': s['text'], 'href': s['href'], 'station_id': s.get('station_id')}
+                    for s in stations
+                ]
+            }
+
+    def remember(self, location: str, state: str, station_id: str,
+                 letter_group: Optional[str] = None, station_name: Optional[str] = None) -> None:
+        """Record a resolved location → station lookup"""
+        with self._update():
+            self._data['locations'][self._location_key(location, state)] = {
+                'station_id': station_id,
+                'state': state,
+                'letter_group': letter_group,
+                'station_name': station_name,
+                'updated': time.time()
+            }
+
+    def clear(self) -> Dict:
+        """Remove every entry from the directory"""
+        with self._update():
+            locations = len(self._data['locations'])
+            self._data = self._empty()
+        logger.info(f"Station directory cleared ({locations} locations)")
+        return {'success': True, 'locations_cleared': locations}
+
+    def get_stats(self) -> Dict:
+        """Get directory statistics"""
+        with self._lock:
+            self._reload_if_changed()
+            stations = sum(
+                len(group['stations'])
+                for state_data in self._data['states'].values()
+                for group in state_data.get('groups', {}).values()
+            )
+            fresh_locations = sum(1 for entry in self._data['locations'].values()
+                                  if self._is_fresh(entry.get('updated')))
+            return {
+                'path': str(self.path),
+                'refresh_interval_hours': self.refresh_interval_seconds / 3600,
+                'states': len(self._data['states']),
+                'stations': stations,
+                'locations': len(self._data['locations']),
+                'fresh_locations': fresh_locations
+            }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _empty() -> Dict:
+        return {'version': DIRECTORY_VERSION, 'states': {}, 'locations': {}}
+
+    @staticmethod
+    def _state_key(state: str) -> str:
+        return state.lower().strip()
+
+    @classmethod
+    def _location_key(cls, location: str, state: str) -> str:
+        return f"{cls._state_key(state)}|{' '.join(location.lower().split())}"
+
+    def _is_fresh(self, updated: Optional[float]) -> bool:
+        return updated is not None and time.time() - updated < self.refresh_interval_seconds
+
+    def _load(self) -> None:
+        data = read_json(self.path)
+        if isinstance(data, dict) and data.get('version') == DIRECTORY_VERSION:
+            self._data = data
+        try:
+            self._loaded_mtime = self.path.stat().st_mtime
+        except OSError:
+            self._loaded_mtime = None
+
+    def _reload_if_changed(self) -> None:
+        """Pick up writes made by other workers sharing the same file"""
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            self._load()
+
+    @contextmanager
+    def _update(self):
+        """Read-merge-write: hold the cross-worker lock, apply the change to the latest file, save"""
+        with self._lock:
+            if self._file_lock is None:
+                self._reload_if_changed()
+                yield
+                self._save()
+                return
+            with self._file_lock:
+                # Another worker may have written within our mtime resolution - always re-read
+                self._load()
+                yield
+                self._save()
+
+    def _save(self) -> None:
+        try:
+            atomic_write_json(self.path, self._data)
+            self._loaded_mtime = self.path.stat().st_mtime
+        except OSError as e:
+            logger.warning(f"Could not persist station directory: {str(e)}")